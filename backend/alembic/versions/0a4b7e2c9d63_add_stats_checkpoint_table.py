@@ -0,0 +1,38 @@
+"""Add stats checkpoint table
+
+Revision ID: 0a4b7e2c9d63
+Revises: f9c2e8b41d07
+Create Date: 2026-10-17 21:47:55.318064
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a4b7e2c9d63'
+down_revision: Union[str, None] = 'f9c2e8b41d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Checkpoints are written by the first ?as_of= queries that replay
+    # past them (see app/stats_checkpoints.py)
+    op.create_table('statscheckpoint',
+    sa.Column('match_id', sa.Integer(), nullable=False),
+    sa.Column('played_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('week', sa.Integer(), nullable=False),
+    sa.Column('players', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['match_id'], ['match.id'], ),
+    sa.PrimaryKeyConstraint('match_id')
+    )
+    op.create_index(op.f('ix_statscheckpoint_played_at'), 'statscheckpoint', ['played_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_statscheckpoint_played_at'), table_name='statscheckpoint')
+    op.drop_table('statscheckpoint')
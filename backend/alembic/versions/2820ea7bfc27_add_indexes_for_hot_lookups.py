@@ -0,0 +1,42 @@
+"""Add indexes for hot lookups
+
+Revision ID: 2820ea7bfc27
+Revises: 06112e2b1618
+Create Date: 2026-10-17 09:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2820ea7bfc27'
+down_revision: Union[str, None] = '06112e2b1618'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Foreign keys used to load games and a player's matches
+    op.create_index(op.f('ix_gamescore_match_id'), 'gamescore', ['match_id'], unique=False)
+    op.create_index(op.f('ix_match_home_id'), 'match', ['home_id'], unique=False)
+    op.create_index(op.f('ix_match_away_id'), 'match', ['away_id'], unique=False)
+
+    # Per-player archive lookups
+    op.create_index(op.f('ix_weeklyarchive_player_id'), 'weeklyarchive', ['player_id'], unique=False)
+
+    # Week leaderboards are read by week_start ordered by rank; the composite
+    # index also serves plain week_start lookups, so the single-column one goes
+    op.create_index('ix_weeklyarchive_week_start_rank', 'weeklyarchive', ['week_start', 'rank'], unique=False)
+    op.drop_index('ix_weeklyarchive_week_start', table_name='weeklyarchive')
+
+
+def downgrade() -> None:
+    op.create_index('ix_weeklyarchive_week_start', 'weeklyarchive', ['week_start'], unique=False)
+    op.drop_index('ix_weeklyarchive_week_start_rank', table_name='weeklyarchive')
+    op.drop_index(op.f('ix_weeklyarchive_player_id'), table_name='weeklyarchive')
+    op.drop_index(op.f('ix_match_away_id'), table_name='match')
+    op.drop_index(op.f('ix_match_home_id'), table_name='match')
+    op.drop_index(op.f('ix_gamescore_match_id'), table_name='gamescore')
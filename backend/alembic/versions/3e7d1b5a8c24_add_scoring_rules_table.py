@@ -0,0 +1,36 @@
+"""Add scoring rules table
+
+Revision ID: 3e7d1b5a8c24
+Revises: 0a4b7e2c9d63
+Create Date: 2026-10-17 22:31:08.274516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7d1b5a8c24'
+down_revision: Union[str, None] = '0a4b7e2c9d63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No rows: until a version is added the defaults (3 points per win) apply
+    op.create_table('scoringrules',
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('win_points', sa.Integer(), nullable=False),
+    sa.Column('loss_points', sa.Integer(), nullable=False),
+    sa.Column('sweep_bonus', sa.Integer(), nullable=False),
+    sa.Column('game_difference_points', sa.Integer(), nullable=False),
+    sa.Column('created_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.PrimaryKeyConstraint('version')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scoringrules')
@@ -0,0 +1,69 @@
+"""Move player stats to epoch-keyed table
+
+Revision ID: 3f8a61d0b7c2
+Revises: 9d27b6e4f035
+Create Date: 2026-10-17 14:21:08.663290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a61d0b7c2'
+down_revision: Union[str, None] = '9d27b6e4f035'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('statsepoch',
+    sa.Column('epoch', sa.Integer(), nullable=False),
+    sa.Column('started_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.PrimaryKeyConstraint('epoch')
+    )
+    op.create_table('playerweekstats',
+    sa.Column('epoch', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('wins', sa.Integer(), nullable=False),
+    sa.Column('losses', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ),
+    sa.PrimaryKeyConstraint('epoch', 'player_id')
+    )
+
+    # Existing stats become epoch 0, the current epoch until the next reset
+    op.execute(
+        "INSERT INTO playerweekstats (epoch, player_id, wins, losses, points) "
+        "SELECT 0, id, wins, losses, points FROM player "
+        "WHERE wins != 0 OR losses != 0 OR points != 0"
+    )
+
+    # Plain ALTER TABLE ... DROP COLUMN (SQLite 3.35+) rather than a batch
+    # table rebuild, which would drop the player_fts triggers
+    op.drop_index('ix_player_points_wins', table_name='player')
+    op.drop_column('player', 'points')
+    op.drop_column('player', 'losses')
+    op.drop_column('player', 'wins')
+
+
+def downgrade() -> None:
+    op.add_column('player', sa.Column('wins', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('player', sa.Column('losses', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('player', sa.Column('points', sa.Integer(), nullable=False, server_default='0'))
+
+    # Restore the current epoch's stats onto the player rows
+    op.execute(
+        "UPDATE player SET "
+        "wins = s.wins, losses = s.losses, points = s.points "
+        "FROM playerweekstats AS s "
+        "WHERE s.player_id = player.id "
+        "AND s.epoch = (SELECT coalesce(max(epoch), 0) FROM statsepoch)"
+    )
+    op.create_index('ix_player_points_wins', 'player', [sa.text('points DESC'), sa.text('wins DESC')], unique=False)
+
+    op.drop_table('playerweekstats')
+    op.drop_table('statsepoch')
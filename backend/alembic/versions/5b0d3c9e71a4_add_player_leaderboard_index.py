@@ -0,0 +1,31 @@
+"""Add player leaderboard index
+
+Revision ID: 5b0d3c9e71a4
+Revises: 2820ea7bfc27
+Create Date: 2026-10-17 10:02:18.774205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0d3c9e71a4'
+down_revision: Union[str, None] = '2820ea7bfc27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_player_points_wins',
+        'player',
+        [sa.text('points DESC'), sa.text('wins DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_player_points_wins', table_name='player')
@@ -0,0 +1,59 @@
+"""Add match outcome columns
+
+Revision ID: 7a2f9d4c1e85
+Revises: 3e7d1b5a8c24
+Create Date: 2026-10-17 23:12:46.905137
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2f9d4c1e85'
+down_revision: Union[str, None] = '3e7d1b5a8c24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('match', sa.Column('winner_id', sa.Integer(), nullable=True))
+    op.add_column('match', sa.Column('home_games_won', sa.Integer(), nullable=True))
+    op.add_column('match', sa.Column('away_games_won', sa.Integer(), nullable=True))
+    op.add_column('match', sa.Column('point_differential', sa.Integer(), nullable=True))
+
+    # Backfill from gamescore; as in compute_winner, every game the home
+    # side did not win counts for the away side and a tie goes away
+    op.execute(
+        "UPDATE match SET "
+        "home_games_won = (SELECT count(*) FROM gamescore AS g "
+        "WHERE g.match_id = match.id AND g.home > g.away), "
+        "away_games_won = (SELECT count(*) FROM gamescore AS g "
+        "WHERE g.match_id = match.id AND g.home <= g.away), "
+        "point_differential = (SELECT coalesce(sum(g.home - g.away), 0) FROM gamescore AS g "
+        "WHERE g.match_id = match.id)"
+    )
+    op.execute(
+        "UPDATE match SET winner_id = "
+        "CASE WHEN home_games_won > away_games_won THEN home_id ELSE away_id END"
+    )
+
+    with op.batch_alter_table('match') as batch_op:
+        batch_op.alter_column('winner_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('home_games_won', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('away_games_won', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('point_differential', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_match_winner_id_player', 'player', ['winner_id'], ['id'])
+    op.create_index('ix_match_winner_id_played_at', 'match', ['winner_id', 'played_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_match_winner_id_played_at', table_name='match')
+    with op.batch_alter_table('match') as batch_op:
+        batch_op.drop_constraint('fk_match_winner_id_player', type_='foreignkey')
+        batch_op.drop_column('point_differential')
+        batch_op.drop_column('away_games_won')
+        batch_op.drop_column('home_games_won')
+        batch_op.drop_column('winner_id')
@@ -0,0 +1,57 @@
+"""Add archive week summary table
+
+Revision ID: 7c5e2a9b4d16
+Revises: 3f8a61d0b7c2
+Create Date: 2026-10-17 15:02:47.118426
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c5e2a9b4d16'
+down_revision: Union[str, None] = '3f8a61d0b7c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('archiveweek',
+    sa.Column('week_start', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('week_end', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('winner_id', sa.Integer(), nullable=False),
+    sa.Column('winner_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('total_players', sa.Integer(), nullable=False),
+    sa.Column('total_matches', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['winner_id'], ['player.id'], ),
+    sa.PrimaryKeyConstraint('week_start')
+    )
+
+    # Backfill one summary per archived week, as summarize_week() builds it:
+    # the latest snapshot's winner, with distinct players and matches (the
+    # sum of wins) counted across all of the week's rows
+    op.execute(
+        "INSERT INTO archiveweek "
+        "(week_start, week_end, winner_id, winner_name, total_players, total_matches) "
+        "SELECT latest.week_start, totals.week_end, latest.winner_id, "
+        "coalesce(("
+        "  SELECT w.player_name FROM weeklyarchive AS w "
+        "  WHERE w.week_start = latest.week_start AND w.player_id = latest.winner_id "
+        "  ORDER BY w.id DESC LIMIT 1"
+        "), 'Unknown'), "
+        "totals.total_players, totals.total_matches "
+        "FROM weeklyarchive AS latest "
+        "JOIN ("
+        "  SELECT week_start, max(id) AS last_id, max(week_end) AS week_end, "
+        "  count(DISTINCT player_id) AS total_players, coalesce(sum(wins), 0) AS total_matches "
+        "  FROM weeklyarchive GROUP BY week_start"
+        ") AS totals ON latest.id = totals.last_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archiveweek')
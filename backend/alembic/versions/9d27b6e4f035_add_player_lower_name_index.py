@@ -0,0 +1,27 @@
+"""Add player lower(name) index
+
+Revision ID: 9d27b6e4f035
+Revises: c4e1a8f2d913
+Create Date: 2026-10-17 13:05:22.417391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d27b6e4f035'
+down_revision: Union[str, None] = 'c4e1a8f2d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /api/players orders and paginates by lower(name), id
+    op.create_index('ix_player_lower_name', 'player', [sa.text('lower(name)')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_player_lower_name', table_name='player')
@@ -0,0 +1,31 @@
+"""Add player history index
+
+Revision ID: a6d3f19c8e42
+Revises: e2b9d47a1c58
+Create Date: 2026-10-17 18:41:09.275316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3f19c8e42'
+down_revision: Union[str, None] = 'e2b9d47a1c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /api/players/{id}/history reads one player's weeks ordered by
+    # week_start; the composite index also serves plain player_id lookups,
+    # so the single-column one goes
+    op.create_index('ix_weeklyarchive_player_id_week_start', 'weeklyarchive', ['player_id', 'week_start'], unique=False)
+    op.drop_index('ix_weeklyarchive_player_id', table_name='weeklyarchive')
+
+
+def downgrade() -> None:
+    op.create_index('ix_weeklyarchive_player_id', 'weeklyarchive', ['player_id'], unique=False)
+    op.drop_index('ix_weeklyarchive_player_id_week_start', table_name='weeklyarchive')
@@ -0,0 +1,148 @@
+"""Key archived weeks by integer
+
+Revision ID: b81c4e7a9f30
+Revises: a6d3f19c8e42
+Create Date: 2026-10-17 19:26:51.840237
+
+"""
+from datetime import date, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81c4e7a9f30'
+down_revision: Union[str, None] = 'a6d3f19c8e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Weeks are keyed by days from 1970-01-01 to the week's Sunday (app.db.week_key)
+WEEK_KEY_EPOCH = date(1970, 1, 1)
+
+
+def week_key(week_start: str) -> int:
+    return (date.fromisoformat(week_start[:10]) - WEEK_KEY_EPOCH).days
+
+
+def week_bounds(week: int) -> tuple[str, str]:
+    week_start = WEEK_KEY_EPOCH + timedelta(days=week)
+    week_end = week_start + timedelta(days=6)
+    return f"{week_start.isoformat()}T00:00:00", f"{week_end.isoformat()}T23:59:59"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Converted in Python, once per distinct week, so this runs unchanged
+    # on SQLite and PostgreSQL
+    op.add_column('weeklyarchive', sa.Column('week', sa.Integer(), nullable=True))
+    for (week_start,) in bind.execute(sa.text("SELECT DISTINCT week_start FROM weeklyarchive")).fetchall():
+        bind.execute(
+            sa.text("UPDATE weeklyarchive SET week = :week WHERE week_start = :week_start"),
+            {"week": week_key(week_start), "week_start": week_start},
+        )
+
+    op.drop_index('ix_weeklyarchive_player_id_week_start', table_name='weeklyarchive')
+    op.drop_index('ix_weeklyarchive_week_start_rank', table_name='weeklyarchive')
+    op.drop_index('ix_weeklyarchive_week_end', table_name='weeklyarchive')
+    with op.batch_alter_table('weeklyarchive') as batch_op:
+        batch_op.alter_column('week', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('week_end')
+        batch_op.drop_column('week_start')
+    op.create_index('ix_weeklyarchive_week_rank', 'weeklyarchive', ['week', 'rank'], unique=False)
+    op.create_index('ix_weeklyarchive_player_id_week', 'weeklyarchive', ['player_id', 'week'], unique=False)
+
+    # The week summaries change primary key, so rebuild the table
+    summaries = bind.execute(sa.text(
+        "SELECT week_start, winner_id, winner_name, total_players, total_matches FROM archiveweek"
+    )).fetchall()
+    op.drop_table('archiveweek')
+    archiveweek = op.create_table('archiveweek',
+    sa.Column('week', sa.Integer(), nullable=False),
+    sa.Column('winner_id', sa.Integer(), nullable=False),
+    sa.Column('winner_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('total_players', sa.Integer(), nullable=False),
+    sa.Column('total_matches', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['winner_id'], ['player.id'], ),
+    sa.PrimaryKeyConstraint('week')
+    )
+    op.bulk_insert(archiveweek, [
+        {
+            "week": week_key(week_start),
+            "winner_id": winner_id,
+            "winner_name": winner_name,
+            "total_players": total_players,
+            "total_matches": total_matches,
+        }
+        for week_start, winner_id, winner_name, total_players, total_matches in summaries
+    ])
+
+    # Snapshots are re-rendered on their first view (see app/archive_snapshots.py)
+    op.drop_table('archivesnapshot')
+    op.create_table('archivesnapshot',
+    sa.Column('week', sa.Integer(), nullable=False),
+    sa.Column('etag', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('body', sa.LargeBinary(), nullable=False),
+    sa.Column('body_gzip', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('week')
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    op.drop_table('archivesnapshot')
+    op.create_table('archivesnapshot',
+    sa.Column('week_start', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('etag', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('body', sa.LargeBinary(), nullable=False),
+    sa.Column('body_gzip', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('week_start')
+    )
+
+    summaries = bind.execute(sa.text(
+        "SELECT week, winner_id, winner_name, total_players, total_matches FROM archiveweek"
+    )).fetchall()
+    op.drop_table('archiveweek')
+    archiveweek = op.create_table('archiveweek',
+    sa.Column('week_start', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('week_end', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('winner_id', sa.Integer(), nullable=False),
+    sa.Column('winner_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('total_players', sa.Integer(), nullable=False),
+    sa.Column('total_matches', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['winner_id'], ['player.id'], ),
+    sa.PrimaryKeyConstraint('week_start')
+    )
+    op.bulk_insert(archiveweek, [
+        {
+            "week_start": week_bounds(week)[0],
+            "week_end": week_bounds(week)[1],
+            "winner_id": winner_id,
+            "winner_name": winner_name,
+            "total_players": total_players,
+            "total_matches": total_matches,
+        }
+        for week, winner_id, winner_name, total_players, total_matches in summaries
+    ])
+
+    op.drop_index('ix_weeklyarchive_player_id_week', table_name='weeklyarchive')
+    op.drop_index('ix_weeklyarchive_week_rank', table_name='weeklyarchive')
+    op.add_column('weeklyarchive', sa.Column('week_start', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('weeklyarchive', sa.Column('week_end', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    for (week,) in bind.execute(sa.text("SELECT DISTINCT week FROM weeklyarchive")).fetchall():
+        week_start, week_end = week_bounds(week)
+        bind.execute(
+            sa.text("UPDATE weeklyarchive SET week_start = :week_start, week_end = :week_end WHERE week = :week"),
+            {"week_start": week_start, "week_end": week_end, "week": week},
+        )
+    with op.batch_alter_table('weeklyarchive') as batch_op:
+        batch_op.alter_column('week_start', existing_type=sqlmodel.sql.sqltypes.AutoString(), nullable=False)
+        batch_op.alter_column('week_end', existing_type=sqlmodel.sql.sqltypes.AutoString(), nullable=False)
+        batch_op.drop_column('week')
+    op.create_index('ix_weeklyarchive_week_end', 'weeklyarchive', ['week_end'], unique=False)
+    op.create_index('ix_weeklyarchive_week_start_rank', 'weeklyarchive', ['week_start', 'rank'], unique=False)
+    op.create_index('ix_weeklyarchive_player_id_week_start', 'weeklyarchive', ['player_id', 'week_start'], unique=False)
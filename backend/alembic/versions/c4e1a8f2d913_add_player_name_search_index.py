@@ -0,0 +1,56 @@
+"""Add player name search index
+
+Revision ID: c4e1a8f2d913
+Revises: 5b0d3c9e71a4
+Create Date: 2026-10-17 11:26:53.418092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1a8f2d913'
+down_revision: Union[str, None] = '5b0d3c9e71a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # FTS5 is SQLite-only; other databases use the LIKE fallback in
+    # app/player_search.py
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS player_fts USING fts5("
+        "name, content='player', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS player_fts_ai AFTER INSERT ON player BEGIN "
+        "INSERT INTO player_fts(rowid, name) VALUES (new.id, new.name); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS player_fts_ad AFTER DELETE ON player BEGIN "
+        "INSERT INTO player_fts(player_fts, rowid, name) VALUES ('delete', old.id, old.name); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS player_fts_au AFTER UPDATE OF name ON player BEGIN "
+        "INSERT INTO player_fts(player_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO player_fts(rowid, name) VALUES (new.id, new.name); END"
+    )
+
+    # Index the players that already exist
+    op.execute("INSERT INTO player_fts(player_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS player_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS player_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS player_fts_ai")
+    op.execute("DROP TABLE IF EXISTS player_fts")
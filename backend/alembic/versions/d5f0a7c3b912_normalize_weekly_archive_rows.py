@@ -0,0 +1,42 @@
+"""Normalize weekly archive rows
+
+Revision ID: d5f0a7c3b912
+Revises: b81c4e7a9f30
+Create Date: 2026-10-17 20:14:37.506184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f0a7c3b912'
+down_revision: Union[str, None] = 'b81c4e7a9f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every archived week already has its archiveweek header (backfilled in
+    # 7c5e2a9b4d16), which holds the winner. player_name stays on each row,
+    # as the player was named that week, but nothing looks rows up by it
+    op.drop_index('ix_weeklyarchive_player_name', table_name='weeklyarchive')
+    with op.batch_alter_table('weeklyarchive') as batch_op:
+        batch_op.drop_column('winner_id')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('weeklyarchive') as batch_op:
+        batch_op.add_column(sa.Column('winner_id', sa.Integer(), nullable=True))
+
+    op.execute(
+        "UPDATE weeklyarchive SET "
+        "winner_id = (SELECT winner_id FROM archiveweek WHERE archiveweek.week = weeklyarchive.week)"
+    )
+
+    with op.batch_alter_table('weeklyarchive') as batch_op:
+        batch_op.alter_column('winner_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_weeklyarchive_winner_id_player', 'player', ['winner_id'], ['id'])
+    op.create_index('ix_weeklyarchive_player_name', 'weeklyarchive', ['player_name'], unique=False)
@@ -0,0 +1,35 @@
+"""Add archive snapshot table
+
+Revision ID: e2b9d47a1c58
+Revises: 7c5e2a9b4d16
+Create Date: 2026-10-17 15:48:33.902157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b9d47a1c58'
+down_revision: Union[str, None] = '7c5e2a9b4d16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Snapshots of weeks archived before this revision are rendered on
+    # their first view (see app/archive_snapshots.py)
+    op.create_table('archivesnapshot',
+    sa.Column('week_start', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('etag', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('body', sa.LargeBinary(), nullable=False),
+    sa.Column('body_gzip', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('week_start')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archivesnapshot')
@@ -0,0 +1,56 @@
+"""Add player Elo rating
+
+Revision ID: f9c2e8b41d07
+Revises: d5f0a7c3b912
+Create Date: 2026-10-17 21:03:12.649821
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9c2e8b41d07'
+down_revision: Union[str, None] = 'd5f0a7c3b912'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rating constants as of this revision (app/db.py, app/ratings.py)
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+ELO_SCALE = 400.0
+
+
+def upgrade() -> None:
+    # Plain ADD COLUMN keeps the player_fts triggers (no table rebuild)
+    op.add_column('player', sa.Column('rating', sa.Float(), nullable=False, server_default=str(INITIAL_RATING)))
+
+    # Backfill by replaying existing matches in (played_at, id) order; a
+    # match's winner is the side that won more games
+    bind = op.get_bind()
+    matches = bind.execute(sa.text(
+        "SELECT m.home_id, m.away_id, "
+        "2 * sum(CASE WHEN g.home > g.away THEN 1 ELSE 0 END) > count(g.id) AS home_won "
+        "FROM match AS m JOIN gamescore AS g ON g.match_id = m.id "
+        "GROUP BY m.id, m.home_id, m.away_id, m.played_at "
+        "ORDER BY m.played_at, m.id"
+    )).fetchall()
+    ratings = {}
+    for home_id, away_id, home_won in matches:
+        winner_id, loser_id = (home_id, away_id) if home_won else (away_id, home_id)
+        winner = ratings.get(winner_id, INITIAL_RATING)
+        loser = ratings.get(loser_id, INITIAL_RATING)
+        change = K_FACTOR * (1.0 - 1.0 / (1.0 + 10.0 ** ((loser - winner) / ELO_SCALE)))
+        ratings[winner_id] = winner + change
+        ratings[loser_id] = loser - change
+    for player_id, rating in ratings.items():
+        bind.execute(
+            sa.text("UPDATE player SET rating = :rating WHERE id = :id"),
+            {"rating": rating, "id": player_id},
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('player', 'rating')
@@ -0,0 +1,142 @@
+"""
+Pre-serialized archived week leaderboards.
+
+archive_current_week renders each week's leaderboard to JSON (plus a
+gzipped copy) in ArchiveSnapshot. GET /api/archives/weeks/{week_start}
+serves those bytes as-is with a strong ETag, so a repeat view costs a
+single primary-key lookup, or a 304 when the client already has it.
+
+Snapshots are re-rendered, with a new ETag, when a week is archived again
+or its standings are rebuilt (match_replay, scoring), so clients may only
+reuse one briefly before revalidating.
+
+Weeks archived before snapshots existed, or whose snapshots a rebuild
+dropped, are rendered on their first view; a batch renders its missing
+weeks together.
+"""
+import gzip
+import hashlib
+import json
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from .db import ArchiveSnapshot, WeeklyArchive
+from .schemas.archives import WeeklyArchiveOut
+
+# Reuse briefly, then revalidate with If-None-Match (a 304 while unchanged)
+SNAPSHOT_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+
+_leaderboard_adapter = TypeAdapter(List[WeeklyArchiveOut])
+
+
+def render_snapshot(session: Session, week: int) -> Optional[ArchiveSnapshot]:
+    """
+    Serialize a week's archived leaderboard, ordered by rank.
+
+    Returns None if the week has no archive rows. The caller adds the
+    snapshot to the session (merge, to replace an existing one) and commits.
+    """
+    return render_snapshots(session, [week]).get(week)
+
+
+def render_snapshots(session: Session, weeks: List[int]) -> Dict[int, ArchiveSnapshot]:
+    """
+    Serialize several weeks' archived leaderboards with one IN query.
+
+    Weeks with no archive rows are left out. As with render_snapshot, the
+    caller stores the snapshots and commits.
+    """
+    statement = (
+        select(WeeklyArchive)
+        .where(WeeklyArchive.week.in_(weeks))
+        .order_by(WeeklyArchive.week, WeeklyArchive.rank.asc())
+    )
+    snapshots = {}
+    for week, archives in groupby(session.exec(statement), key=attrgetter("week")):
+        rows = _leaderboard_adapter.validate_python(list(archives), from_attributes=True)
+        body = _leaderboard_adapter.dump_json(rows)
+        snapshots[week] = ArchiveSnapshot(
+            week=week,
+            etag=hashlib.sha256(body).hexdigest()[:32],
+            body=body,
+            # mtime=0 keeps the gzipped bytes identical for identical input
+            body_gzip=gzip.compress(body, mtime=0),
+        )
+    return snapshots
+
+
+def get_snapshot(session: Session, week: int) -> Optional[ArchiveSnapshot]:
+    """Return the stored snapshot for a week, rendering and storing it if missing."""
+    snapshot = session.get(ArchiveSnapshot, week)
+    if snapshot is None:
+        snapshot = render_snapshot(session, week)
+        if snapshot is not None:
+            session.add(snapshot)
+            session.commit()
+    return snapshot
+
+
+def get_snapshots(session: Session, weeks: List[int]) -> Dict[int, ArchiveSnapshot]:
+    """
+    Return the stored snapshots for several weeks with one IN query.
+
+    Weeks without a snapshot are rendered together and stored in one
+    commit; weeks with no archive rows are left out of the result.
+    """
+    statement = select(ArchiveSnapshot).where(ArchiveSnapshot.week.in_(weeks))
+    snapshots = {snapshot.week: snapshot for snapshot in session.exec(statement)}
+    missing = [week for week in weeks if week not in snapshots]
+    if missing:
+        rendered = render_snapshots(session, missing)
+        if rendered:
+            # Core insert: the snapshots stay out of the session, so the
+            # commit does not expire them and reading them issues no queries
+            session.execute(insert(ArchiveSnapshot), [
+                {"week": snapshot.week, "etag": snapshot.etag, "body": snapshot.body,
+                 "body_gzip": snapshot.body_gzip}
+                for snapshot in rendered.values()
+            ])
+            session.commit()
+            snapshots.update(rendered)
+    return snapshots
+
+
+def join_snapshots(snapshots: List[ArchiveSnapshot]) -> bytes:
+    """Splice stored leaderboard bodies into one [{week_start, leaderboard}] JSON array."""
+    return b"[" + b",".join(
+        b'{"week_start":' + json.dumps(snapshot.week_start).encode()
+        + b',"leaderboard":' + snapshot.body + b"}"
+        for snapshot in snapshots
+    ) + b"]"
+
+
+def entity_tag(snapshot: ArchiveSnapshot, gzipped: bool) -> str:
+    """Strong ETag for one representation; the gzip and identity bodies differ."""
+    return f'"{snapshot.etag}-gzip"' if gzipped else f'"{snapshot.etag}"'
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header value allows a gzip response."""
+    if not accept_encoding:
+        return False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def matches_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
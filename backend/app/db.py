@@ -1,4 +1,7 @@
-from sqlmodel import SQLModel, Session, create_engine, Field
+from sqlalchemy import DDL, Index, and_, event, func, text
+from sqlalchemy.orm import column_property
+from sqlmodel import SQLModel, Session, create_engine, Field, select
+from datetime import date, datetime, time, timedelta
 from typing import Generator, Optional
 from typing import List
 import os
@@ -20,46 +23,273 @@ engine = create_engine(
 )
 
 
+# Elo rating every player starts from (see app/ratings.py)
+INITIAL_RATING = 1500.0
+
+
 # Database Models
 class Player(SQLModel, table=True):
-    """Player table - tracks player information and stats."""
+    """
+    Player table - tracks player information.
+    
+    Stats live in PlayerWeekStats; wins, losses and points are read-only
+    attributes holding the current epoch's values (mapped below). rating is
+    the player's all-time Elo rating, which the weekly reset leaves alone.
+    """
+    __table_args__ = (
+        # Serves case-insensitive name ordering, prefix and cursor lookups
+        Index("ix_player_lower_name", text("lower(name)")),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
     email: str = Field(unique=True, index=True)  # Required for login
-    wins: int = Field(default=0)
-    losses: int = Field(default=0)
-    points: int = Field(default=0)
+    rating: float = Field(default=INITIAL_RATING)
+
+
+# Full-text search index over player names (SQLite only). An external-content
+# FTS5 table with the trigram tokenizer supports substring, prefix and fuzzy
+# lookups; triggers keep it in sync with the player table.
+PLAYER_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS player_fts USING fts5("
+    "name, content='player', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS player_fts_ai AFTER INSERT ON player BEGIN "
+    "INSERT INTO player_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS player_fts_ad AFTER DELETE ON player BEGIN "
+    "INSERT INTO player_fts(player_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS player_fts_au AFTER UPDATE OF name ON player BEGIN "
+    "INSERT INTO player_fts(player_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO player_fts(rowid, name) VALUES (new.id, new.name); END",
+]
+
+for _statement in PLAYER_SEARCH_DDL:
+    event.listen(Player.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Player.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS player_fts").execute_if(dialect="sqlite"),
+)
 
 
 class Match(SQLModel, table=True):
-    """Match table - tracks individual matches between players."""
+    """
+    Match table - tracks individual matches between players.
+    
+    The outcome is stored with the match when it is written (see
+    match_outcome), so win counts, head-to-head records and streaks are
+    plain aggregates over this table, without joining gamescore.
+    """
+    __table_args__ = (
+        # Serves a player's wins in played order (and plain winner_id lookups)
+        Index("ix_match_winner_id_played_at", "winner_id", "played_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     played_at: str = Field(index=True)
-    home_id: int = Field(foreign_key="player.id")
-    away_id: int = Field(foreign_key="player.id")
+    home_id: int = Field(foreign_key="player.id", index=True)
+    away_id: int = Field(foreign_key="player.id", index=True)
+    winner_id: int = Field(foreign_key="player.id")
+    home_games_won: int
+    away_games_won: int
+    point_differential: int  # home points minus away points, over all games
 
 
 class GameScore(SQLModel, table=True):
     """GameScore table - tracks individual game scores within a match."""
     id: Optional[int] = Field(default=None, primary_key=True)
-    match_id: int = Field(foreign_key="match.id")
+    match_id: int = Field(foreign_key="match.id", index=True)
     home: int = Field(ge=0)
     away: int = Field(ge=0)
 
-class WeeklyArchive(SQLModel, table=True):
-    """WeeklyArchive table - tracks weekly winners."""
+# Keep IN lists below SQLite's bound-parameter limit
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# Archived weeks are keyed by the number of days from WEEK_KEY_EPOCH to the
+# week's first day (its Sunday, see weekly_reset.get_week_boundaries)
+WEEK_KEY_EPOCH = date(1970, 1, 1)
+
+
+# Keys whose whole week is within the dates Python can represent
+MIN_WEEK_KEY = (date.min - WEEK_KEY_EPOCH).days
+MAX_WEEK_KEY = (date.max - WEEK_KEY_EPOCH).days - 6
+
+
+def week_key(week_start: date) -> int:
+    """Integer key of the week starting on a date (or datetime)."""
+    if isinstance(week_start, datetime):
+        week_start = week_start.date()
+    return (week_start - WEEK_KEY_EPOCH).days
+
+
+def week_bounds(week: int) -> tuple[datetime, datetime]:
+    """First and last moment of a keyed week, as get_week_boundaries returns them."""
+    week_start = datetime.combine(WEEK_KEY_EPOCH + timedelta(days=week), time())
+    return week_start, week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+
+
+def parse_week(value: str) -> Optional[int]:
+    """
+    Week key for an API week parameter, or None if it is not one.
+    
+    Accepts the integer key itself or the week's start as an ISO date or
+    datetime ("2025-10-12" or "2025-10-12T00:00:00", as returned in week_start).
+    Keys outside MIN_WEEK_KEY..MAX_WEEK_KEY, which week_bounds cannot turn
+    into dates (nor SQLite store), are not weeks.
+    """
+    if value.lstrip("-").isdigit():
+        week = int(value)
+    else:
+        try:
+            week = week_key(datetime.fromisoformat(value))
+        except ValueError:
+            return None
+    return week if MIN_WEEK_KEY <= week <= MAX_WEEK_KEY else None
+
+
+class WeekBounds:
+    """ISO week_start/week_end strings derived from a model's integer week key."""
+    
+    @property
+    def week_start(self) -> str:
+        return week_bounds(self.week)[0].isoformat()
+    
+    @property
+    def week_end(self) -> str:
+        return week_bounds(self.week)[1].isoformat()
+
+
+class WeeklyArchive(WeekBounds, SQLModel, table=True):
+    """
+    WeeklyArchive table - one player's result in an archived week.
+    
+    Rows hold the player's result and their name that week; the week's
+    details live once in its ArchiveWeek header. winner_id is loaded with
+    each row (see below).
+    """
+    __table_args__ = (
+        # Serves week lookups ordered by rank (and plain week lookups)
+        Index("ix_weeklyarchive_week_rank", "week", "rank"),
+        # Serves a player's history newest week first (and plain player_id lookups)
+        Index("ix_weeklyarchive_player_id_week", "player_id", "week"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
-    week_start: str = Field(index=True)
-    week_end: str = Field(index=True)
-    winner_id: int = Field(foreign_key="player.id")
+    week: int
     player_id: int = Field(foreign_key="player.id")
-    player_name: str = Field(index=True)
+    # As the player was named when archived; later renames leave it alone
+    player_name: str
     wins: int = Field(default=0)
     losses: int = Field(default=0)
     points: int = Field(default=0)
     rank: int = Field(default=0)
 
 
+class ArchiveWeek(WeekBounds, SQLModel, table=True):
+    """ArchiveWeek table - one summary row per archived week, written with its WeeklyArchive rows."""
+    week: int = Field(primary_key=True)
+    winner_id: int = Field(foreign_key="player.id")
+    winner_name: str
+    total_players: int
+    total_matches: int
+
+
+class ArchiveSnapshot(WeekBounds, SQLModel, table=True):
+    """ArchiveSnapshot table - a week's archived leaderboard, pre-serialized for serving."""
+    week: int = Field(primary_key=True)
+    etag: str
+    body: bytes
+    body_gzip: bytes
+
+
+# Loaded with every WeeklyArchive from the week's header, so archive
+# responses keep their winner_id field
+WeeklyArchive.winner_id = column_property(
+    select(ArchiveWeek.winner_id).where(ArchiveWeek.week == WeeklyArchive.week).scalar_subquery()
+)
+
+
+class StatsEpoch(SQLModel, table=True):
+    """
+    StatsEpoch table - one row per weekly reset.
+    
+    The highest epoch is the current one; before the first reset there are
+    no rows and the current epoch is 0. Resetting stats is inserting a row.
+    """
+    epoch: int = Field(primary_key=True)
+    started_at: str
+
+
+class PlayerWeekStats(SQLModel, table=True):
+    """
+    PlayerWeekStats table - a player's stats within one epoch.
+    
+    Rows are created on a player's first match of the epoch; players without
+    a row have not played since the last reset.
+    """
+    epoch: int = Field(primary_key=True)
+    player_id: int = Field(foreign_key="player.id", primary_key=True)
+    wins: int = Field(default=0)
+    losses: int = Field(default=0)
+    points: int = Field(default=0)
+
+
+class StatsCheckpoint(SQLModel, table=True):
+    """
+    StatsCheckpoint table - every player's rating and week-to-date stats
+    after one match, replaying matches in (played_at, id) order.
+    
+    players is a packed NumPy record array (see app/stats_checkpoints.py).
+    """
+    match_id: int = Field(foreign_key="match.id", primary_key=True)
+    played_at: str = Field(index=True)
+    week: int
+    players: bytes
+
+
+def current_epoch():
+    """Scalar subquery for the current stats epoch."""
+    return select(func.coalesce(func.max(StatsEpoch.epoch), 0)).scalar_subquery()
+
+
+def _current_stat(column):
+    return column_property(
+        func.coalesce(
+            select(column)
+            .where(PlayerWeekStats.player_id == Player.id, PlayerWeekStats.epoch == current_epoch())
+            .scalar_subquery(),
+            0,
+        )
+    )
+
+
+# Loaded with every Player, so API responses keep their wins/losses/points
+Player.wins = _current_stat(PlayerWeekStats.wins)
+Player.losses = _current_stat(PlayerWeekStats.losses)
+Player.points = _current_stat(PlayerWeekStats.points)
+
+
+def player_stats(epoch=None):
+    """
+    Subquery of every player's stats in an epoch (default: the current one).
+    
+    Columns: player_id, name, wins, losses, points. Players who did not play
+    in the epoch are included with zeros.
+    """
+    epoch = current_epoch() if epoch is None else epoch
+    return (
+        select(
+            Player.id.label("player_id"),
+            Player.name,
+            func.coalesce(PlayerWeekStats.wins, 0).label("wins"),
+            func.coalesce(PlayerWeekStats.losses, 0).label("losses"),
+            func.coalesce(PlayerWeekStats.points, 0).label("points"),
+        )
+        .select_from(Player)
+        .outerjoin(
+            PlayerWeekStats,
+            and_(PlayerWeekStats.player_id == Player.id, PlayerWeekStats.epoch == epoch),
+        )
+        .subquery("stats")
+    )
+
+
 def create_db_and_tables() -> None:
     """
     Create all tables in the database.
@@ -83,7 +313,47 @@ def get_session() -> Generator[Session, None, None]:
 
 
 # Constants
-WIN_POINTS = 3  # scoring rule: 3 points per match win
+WIN_POINTS = 3  # scoring rule: 3 points per match win (the default ScoringRules)
+
+
+class ScoringRules(SQLModel, table=True):
+    """
+    ScoringRules table - one row per version of the scoring rules.
+    
+    The highest version is in force; before the first row the defaults
+    apply (WIN_POINTS per win, nothing else). Rules apply retroactively:
+    after adding a version, app.scoring.recompute_scores re-scores history.
+    """
+    version: int = Field(primary_key=True)
+    win_points: int = Field(default=WIN_POINTS)
+    loss_points: int = Field(default=0)
+    sweep_bonus: int = Field(default=0)  # extra for a winner who dropped no game
+    game_difference_points: int = Field(default=0)  # per game of the winner's margin
+    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    
+    def match_points(self, winner_games: int, loser_games: int) -> tuple[int, int]:
+        """Points (winner, loser) for a match won winner_games to loser_games."""
+        winner_points = (
+            self.win_points
+            + (self.sweep_bonus if loser_games == 0 else 0)
+            + self.game_difference_points * (winner_games - loser_games)
+        )
+        return winner_points, self.loss_points
+
+
+def scoring_rules(session: Session) -> ScoringRules:
+    """Return the scoring rules in force (the defaults if no version was added)."""
+    rules = session.exec(select(ScoringRules).order_by(ScoringRules.version.desc()).limit(1)).first()
+    return rules if rules is not None else ScoringRules(version=0)
+
+
+def leaderboard_order(stats) -> tuple:
+    """
+    Ranking order over a player_stats() subquery, shared by the live
+    leaderboard and weekly archives. Players tied on both keys are ranked
+    equally.
+    """
+    return (stats.c.points.desc(), stats.c.wins.desc())
 
 
 def compute_winner(games: List["GameScore"]) -> str:
@@ -92,3 +362,14 @@ def compute_winner(games: List["GameScore"]) -> str:
     away_wins = len(games) - home_wins
     return "home" if home_wins > away_wins else "away"
 
+
+def match_outcome(home_id: int, away_id: int, games: List["GameScore"]) -> dict:
+    """Outcome columns stored on a Match, from its games; the winner follows compute_winner."""
+    home_games_won = sum(1 for g in games if g.home > g.away)
+    return {
+        "winner_id": home_id if compute_winner(games) == "home" else away_id,
+        "home_games_won": home_games_won,
+        "away_games_won": len(games) - home_games_won,
+        "point_differential": sum(g.home - g.away for g in games),
+    }
+
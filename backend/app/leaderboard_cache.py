@@ -0,0 +1,231 @@
+"""
+Process-local leaderboard cache.
+
+Keeps every player's stats in memory together with their ranking keys in
+sorted order, so GET /api/leaderboard is served without touching the database.
+
+- Built from the current epoch's stats on the first read (a miss)
+- Updated incrementally when matches are written
+- Rebuilt after the weekly reset (a new stats epoch)
+- Invalidated whenever Player or stats rows change through the ORM (new
+  players, direct edits), and rebuilt on the next read
+"""
+import threading
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from .db import Player, PlayerWeekStats, StatsEpoch, leaderboard_order, player_stats
+from .ranked_keys import RankedKeys
+
+
+@dataclass
+class CachedPlayer:
+    """Stats held in the cache for one player."""
+    name: str
+    wins: int
+    losses: int
+    points: int
+
+    def sort_key(self, player_id: int) -> Tuple[int, int, int]:
+        # Matches leaderboard_order (points desc, wins desc), then id
+        return (-self.points, -self.wins, player_id)
+
+
+class LeaderboardCache:
+    """
+    Sorted in-memory leaderboard.
+
+    Ranking keys live in a RankedKeys skip list, so moving a player after a
+    match, locating them or computing a rank is O(log n). Writers must hold `lock` across their
+    database commit and the matching cache update, so a concurrent rebuild
+    can never observe a committed match whose delta is applied twice.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self._players: Dict[int, CachedPlayer] = {}
+        self._keys = RankedKeys()
+        self._built = False
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def invalidate(self) -> None:
+        """Drop the cached leaderboard; the next read rebuilds it."""
+        with self.lock:
+            self._players = {}
+            self._keys = RankedKeys()
+            self._built = False
+
+    def rebuild(self, session: Session) -> None:
+        """Load every player's current-epoch stats from the database in ranking order."""
+        with self.lock:
+            stats = player_stats()
+            statement = select(*stats.c).order_by(*leaderboard_order(stats), stats.c.player_id)
+            players = {}
+            keys = []
+            for player_id, name, wins, losses, points in session.exec(statement):
+                cached = CachedPlayer(name=name, wins=wins, losses=losses, points=points)
+                players[player_id] = cached
+                keys.append(cached.sort_key(player_id))
+            self._players = players
+            self._keys = RankedKeys.from_sorted(keys)
+            self._built = True
+
+    def apply_deltas(self, deltas: Dict[int, Dict[str, int]]) -> None:
+        """
+        Add committed stat deltas ({player_id: {"wins", "losses", "points"}}).
+
+        Does nothing if the cache is not built. An unknown player id means the
+        cache missed a roster change, so it is invalidated instead.
+        """
+        with self.lock:
+            if not self._built:
+                return
+            if any(player_id not in self._players for player_id in deltas):
+                self.invalidate()
+                return
+            for player_id, delta in deltas.items():
+                cached = self._players[player_id]
+                self._keys.remove(cached.sort_key(player_id))
+                cached.wins += delta.get("wins", 0)
+                cached.losses += delta.get("losses", 0)
+                cached.points += delta.get("points", 0)
+                self._keys.add(cached.sort_key(player_id))
+
+    def _ensure_built(self, session: Session) -> None:
+        """Count a hit, or count a miss and rebuild. Caller holds the lock."""
+        if self._built:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.rebuild(session)
+
+    def _entry(self, key: Tuple[int, int, int]) -> dict:
+        """Build the leaderboard row for a ranking key."""
+        neg_points, neg_wins, player_id = key
+        cached = self._players[player_id]
+        games_played = cached.wins + cached.losses
+        return {
+            # Tied players share the rank of the first key with their score
+            "rank": self._keys.bisect_left((neg_points, neg_wins)) + 1,
+            "player_id": player_id,
+            "name": cached.name,
+            "wins": cached.wins,
+            "losses": cached.losses,
+            "points": cached.points,
+            "win_rate": cached.wins / games_played if games_played else 0.0,
+        }
+
+    def page(self, session: Session, limit: int, offset: int) -> List[dict]:
+        """
+        Return leaderboard rows [offset, offset + limit), rebuilding on a miss.
+
+        Rows carry the same fields as the SQL leaderboard: rank (ties share a
+        rank), player_id, name, wins, losses, points and win_rate.
+        """
+        with self.lock:
+            self._ensure_built(session)
+            return [self._entry(key) for key in islice(self._keys.iter_from(offset), limit)]
+
+    def player_rank(self, session: Session, player_id: int) -> Optional[dict]:
+        """
+        Locate one player in O(log n) and return their row with neighbours.
+
+        Returns None if the player does not exist. Otherwise a dict with the
+        player's row, the rows immediately above and below (None at either
+        end), the total number of players and a percentile: the share of
+        other players ranked below this one, from 0 (last) to 100 (first).
+        """
+        with self.lock:
+            self._ensure_built(session)
+            cached = self._players.get(player_id)
+            if cached is None:
+                return None
+
+            position = self._keys.bisect_left(cached.sort_key(player_id))
+            entry = self._entry(self._keys[position])
+            total = len(self._keys)
+            # Everyone after the last player tied with this one ranks below
+            tie_end = self._keys.bisect_right((-cached.points, -cached.wins, float("inf")))
+            ranked_below = total - tie_end
+            return {
+                "player": entry,
+                "above": self._entry(self._keys[position - 1]) if position > 0 else None,
+                "below": self._entry(self._keys[position + 1]) if position + 1 < total else None,
+                "total_players": total,
+                "percentile": 100.0 * ranked_below / (total - 1) if total > 1 else 100.0,
+            }
+
+    def check_consistency(self, session: Session) -> List[int]:
+        """
+        Compare the cache against the player table.
+
+        Scans every player, so it is for tests and maintenance scripts
+        rather than request handlers.
+
+        Returns the ids of players whose cached stats differ from the database
+        (including players missing on either side). An unbuilt cache is
+        trivially consistent.
+        """
+        with self.lock:
+            if not self._built:
+                return []
+            statement = select(*player_stats().c)
+            db_players = {
+                player_id: CachedPlayer(name=name, wins=wins, losses=losses, points=points)
+                for player_id, name, wins, losses, points in session.exec(statement)
+            }
+            mismatched = {
+                player_id for player_id in db_players.keys() | self._players.keys()
+                if db_players.get(player_id) != self._players.get(player_id)
+            }
+            return sorted(mismatched)
+
+    def stats(self) -> dict:
+        """Return cache counters for monitoring."""
+        with self.lock:
+            return {
+                "built": self._built,
+                "size": len(self._players),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+leaderboard_cache = LeaderboardCache()
+
+
+# Player, stats and epoch rows changed through the ORM (registration, direct
+# edits, deletes, resets) bypass apply_deltas, so flag the session and
+# invalidate once it commits.
+@event.listens_for(Player, "after_insert")
+@event.listens_for(Player, "after_update")
+@event.listens_for(Player, "after_delete")
+@event.listens_for(PlayerWeekStats, "after_insert")
+@event.listens_for(PlayerWeekStats, "after_update")
+@event.listens_for(PlayerWeekStats, "after_delete")
+@event.listens_for(StatsEpoch, "after_insert")
+def _flag_player_change(mapper, connection, target):
+    session = OrmSession.object_session(target)
+    if session is not None:
+        session.info["leaderboard_stale"] = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("leaderboard_stale", False):
+        leaderboard_cache.invalidate()
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _clear_flag_after_rollback(session):
+    session.info.pop("leaderboard_stale", None)
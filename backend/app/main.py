@@ -2,7 +2,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
-from .routers import health, players, matches, auth, archives
+from .routers import health, players, matches, auth, archives, leaderboard
 from .scheduler import start_scheduler, shutdown_scheduler
 
 
@@ -27,6 +27,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Pagination cursor for GET /api/matches, /api/players and player history
 )
 
 # Note: Database migrations are now handled by Alembic
@@ -37,3 +38,4 @@ app.include_router(auth.router)
 app.include_router(players.router)
 app.include_router(matches.router)
 app.include_router(archives.router)
+app.include_router(leaderboard.router)
@@ -0,0 +1,229 @@
+"""
+Match-log replay.
+
+Player stats (PlayerWeekStats) and weekly archives are derived from the
+match table. replay_matches regenerates them from its stored outcomes
+alone, e.g. after they drift or the scoring rules change:
+
+- Matches are streamed in (played_at, id) order, REPLAY_CHUNK_SIZE per query
+- Each Sunday-to-Saturday week's standings are accumulated, then ranked as
+  archive_current_week ranks them. A week's roster is the players it was
+  last archived with (under the names archived then) plus whoever played
+  in it, so players who registered later are not added to it
+- WeeklyArchive and ArchiveWeek are rewritten for every week before the
+  current one; their ArchiveSnapshot rows are dropped and re-rendered on
+  their next view
+- The current epoch's PlayerWeekStats are rewritten from the current week
+
+Weeks follow played_at (see stats_checkpoints.week_of), not the epoch a
+match happened to be recorded in; matches without a date count towards
+the current week. Run it with backend/replay_matches.py.
+"""
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_
+from sqlmodel import Session, select
+
+from .db import (
+    ArchiveSnapshot, ArchiveWeek, Match, Player, PlayerWeekStats, StatsCheckpoint, StatsEpoch,
+    WeeklyArchive, scoring_rules, week_key,
+)
+from .leaderboard_cache import leaderboard_cache
+from .stats_checkpoints import tie_ranks, week_of
+from .weekly_reset import get_week_boundaries
+
+# Matches read per query while streaming the match log
+REPLAY_CHUNK_SIZE = 10_000
+
+
+@dataclass
+class ReplayReport:
+    """What replay_matches rewrote and how long it took."""
+    matches: int
+    archived_weeks: int
+    seconds: float
+
+    @property
+    def matches_per_second(self) -> float:
+        return self.matches / self.seconds if self.seconds else 0.0
+
+
+def rank_players(stats: Iterable[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int, int]]:
+    """
+    Rank (player_id, wins, losses, points) rows like leaderboard_order.
+
+    Returns (rank, player_id, wins, losses, points) ordered by points and
+    wins descending, then player_id. Tied players share the rank of the
+    first of them, as RANK() does.
+    """
+    rows = sorted(stats, key=lambda row: (-row[3], -row[1], row[0]))
+    ranks = tie_ranks([(points, wins) for _, wins, _, points in rows])
+    return [(rank, *row) for rank, row in zip(ranks, rows)]
+
+
+def iter_results(session: Session, chunk_size: int = REPLAY_CHUNK_SIZE) -> Iterator[Tuple[str, int, int, int, int]]:
+    """
+    Yield (played_at, winner_id, loser_id, winner_games, loser_games) for
+    every match in (played_at, id) order.
+
+    Reads chunk_size matches per query, continuing after the last one
+    read, so memory stays flat however long the history is.
+    """
+    statement = (
+        select(
+            Match.id, Match.played_at, Match.home_id, Match.away_id, Match.winner_id,
+            Match.home_games_won, Match.away_games_won,
+        )
+        .order_by(Match.played_at, Match.id)
+        .limit(chunk_size)
+    )
+    after: Optional[Tuple[str, int]] = None
+    while True:
+        chunk = statement
+        if after is not None:
+            chunk = statement.where(
+                or_(Match.played_at > after[0], and_(Match.played_at == after[0], Match.id > after[1]))
+            )
+        rows = session.exec(chunk).all()
+        for match_id, played_at, home_id, away_id, winner_id, home_games_won, away_games_won in rows:
+            if winner_id == home_id:
+                yield played_at, home_id, away_id, home_games_won, away_games_won
+            else:
+                yield played_at, away_id, home_id, away_games_won, home_games_won
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1].played_at, rows[-1].id)
+
+
+def archived_rosters(session: Session, current_week: int) -> Dict[int, Dict[int, str]]:
+    """Map each week before current_week to its archived {player_id: player_name}."""
+    rosters: Dict[int, Dict[int, str]] = {}
+    for week, player_id, player_name in session.exec(
+        select(WeeklyArchive.week, WeeklyArchive.player_id, WeeklyArchive.player_name)
+        .where(WeeklyArchive.week < current_week)
+    ):
+        rosters.setdefault(week, {})[player_id] = player_name
+    return rosters
+
+
+def clear_standings(session: Session, current_week: int) -> int:
+    """
+    Delete the archives of weeks before current_week, the current epoch's
+    stats and every stats checkpoint.
+
+    The first step of rewriting standings; the caller inserts the new rows
+    and calls commit_standings. Checkpoints hold standings as they were
+    computed, so they go too and are rebuilt by build_checkpoints.
+    Returns the current epoch.
+    """
+    epoch = session.exec(select(func.coalesce(func.max(StatsEpoch.epoch), 0))).one()
+    session.execute(delete(ArchiveSnapshot).where(ArchiveSnapshot.week < current_week))
+    session.execute(delete(ArchiveWeek).where(ArchiveWeek.week < current_week))
+    session.execute(delete(WeeklyArchive).where(WeeklyArchive.week < current_week))
+    session.execute(delete(PlayerWeekStats).where(PlayerWeekStats.epoch == epoch))
+    session.execute(delete(StatsCheckpoint))
+    return epoch
+
+
+def commit_standings(session: Session) -> None:
+    """Commit rewritten standings and drop the cached leaderboard."""
+    # Bulk statements skip the ORM events that invalidate the cache
+    with leaderboard_cache.lock:
+        session.commit()
+        leaderboard_cache.invalidate()
+
+
+def _archive_week(
+    session: Session, week: int, stats: Dict[int, List[int]], archived: Dict[int, str], names: Dict[int, str]
+) -> bool:
+    """
+    Insert a replayed week's WeeklyArchive rows and ArchiveWeek header.
+
+    Returns False, archiving nothing, if none of the week's players remain.
+    """
+    # Archived players who did not play keep their zero rows (as in archive_current_week)
+    roster = {player_id: name for player_id, name in archived.items() if player_id in names}
+    for player_id in stats:
+        if player_id in names:
+            roster.setdefault(player_id, names[player_id])
+    if not roster:
+        return False
+    ranked = rank_players(
+        (player_id, *stats.get(player_id, (0, 0, 0))) for player_id in roster
+    )
+    session.execute(insert(WeeklyArchive), [
+        {"week": week, "player_id": player_id, "player_name": roster[player_id],
+         "wins": wins, "losses": losses, "points": points, "rank": rank}
+        for rank, player_id, wins, losses, points in ranked
+    ])
+    winner_id = ranked[0][1]
+    session.execute(insert(ArchiveWeek), [{
+        "week": week,
+        "winner_id": winner_id,
+        "winner_name": roster[winner_id],
+        "total_players": len(ranked),
+        "total_matches": sum(wins for _, _, wins, _, _ in ranked),
+    }])
+    return True
+
+
+def replay_matches(session: Session, chunk_size: int = REPLAY_CHUNK_SIZE) -> ReplayReport:
+    """
+    Rebuild weekly archives and current stats from the match log and commit.
+
+    Points follow the scoring rules in force. Everything is rewritten in
+    one transaction; on SQLite its first delete takes the write lock, so
+    matches posted meanwhile wait for it. Weeks before the current one
+    with no matches end up without an archive.
+
+    A match whose player row is gone (the foreign key is not enforced on
+    SQLite) still counts for the opponent; the missing player gets no
+    archive or stats row.
+    """
+    started = time.perf_counter()
+    current_week = week_key(get_week_boundaries()[0])
+    names = dict(session.exec(select(Player.id, Player.name).order_by(Player.id)).all())
+    rules = scoring_rules(session)
+    rosters = archived_rosters(session, current_week)
+    epoch = clear_standings(session, current_week)
+
+    # Past weeks arrive one after another in played order; each is archived
+    # once the next begins
+    week: Optional[int] = None
+    stats: Dict[int, List[int]] = {}
+    current: Dict[int, List[int]] = {}
+    matches = archived_weeks = 0
+    for played_at, winner_id, loser_id, winner_games, loser_games in iter_results(session, chunk_size):
+        # Matches dated after the current week, or without a date, count towards it
+        match_week = min(week_of(played_at) or current_week, current_week)
+        if match_week == current_week:
+            standings = current
+        else:
+            if match_week != week:
+                if week is not None:
+                    archived_weeks += _archive_week(session, week, stats, rosters.get(week, {}), names)
+                week, stats = match_week, {}
+            standings = stats
+        winner_points, loser_points = rules.match_points(winner_games, loser_games)
+        winner = standings.setdefault(winner_id, [0, 0, 0])
+        winner[0] += 1
+        winner[2] += winner_points
+        loser = standings.setdefault(loser_id, [0, 0, 0])
+        loser[1] += 1
+        loser[2] += loser_points
+        matches += 1
+
+    if week is not None:
+        archived_weeks += _archive_week(session, week, stats, rosters.get(week, {}), names)
+    current_rows = [
+        {"epoch": epoch, "player_id": player_id, "wins": wins, "losses": losses, "points": points}
+        for player_id, (wins, losses, points) in current.items()
+        if player_id in names
+    ]
+    if current_rows:
+        session.execute(insert(PlayerWeekStats), current_rows)
+
+    commit_standings(session)
+    return ReplayReport(matches, archived_weeks, time.perf_counter() - started)
@@ -0,0 +1,156 @@
+"""
+Player name search for typeahead.
+
+On SQLite, searches the trigram FTS5 index (player_fts, see app/db.py):
+- Queries of 3+ characters match any player sharing a trigram with the
+  query, so misspellings still find candidates. Prefix matches rank first,
+  then substring matches, then the rest by bm25 (more shared trigrams rank
+  higher).
+- Shorter queries cannot form a trigram and fall back to a name prefix
+  match, answered as a range scan on ix_player_lower_name.
+
+Other databases fall back to a case-insensitive prefix/substring match.
+
+Queries are compared with lower(name), so they are lower-cased as the
+database's lower() would (see fold_case).
+"""
+import string
+import sys
+from typing import List, Optional
+
+from sqlalchemy import and_, case, column, func, literal_column, table
+from sqlmodel import Session, select
+
+from .db import Player
+
+# Shortest query the trigram tokenizer can match
+TRIGRAM_LENGTH = 3
+
+# SQLite's built-in lower() only folds ASCII letters
+ASCII_LOWERCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Surrogates cannot be encoded, so the code point after them is the next string character
+SURROGATES = range(0xD800, 0xE000)
+
+# Lightweight handle on the FTS5 virtual table created in app/db.py
+player_fts = table("player_fts", column("rowid"), column("name"))
+
+
+def trigram_query(q: str) -> str:
+    """Build an FTS5 MATCH expression OR-ing every trigram of q."""
+    q = q.lower()
+    trigrams = dict.fromkeys(q[i:i + TRIGRAM_LENGTH] for i in range(len(q) - TRIGRAM_LENGTH + 1))
+    # Quote each trigram as an FTS5 string, doubling embedded quotes
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in trigrams)
+
+
+def escape_like(q: str) -> str:
+    """Escape LIKE wildcards so user input matches literally (ESCAPE '\\')."""
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fold_case(session: Session, text: str) -> str:
+    """Lower-case text as the database's lower() does, so it compares with lower(name)."""
+    if session.get_bind().dialect.name == "sqlite":
+        return text.translate(ASCII_LOWERCASE)
+    return text.lower()
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """
+    Smallest string above every string starting with prefix.
+
+    Returns None if there is none, i.e. prefix is all U+10FFFF.
+    """
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    next_code_point = ord(stripped[-1]) + 1
+    if next_code_point in SURROGATES:
+        next_code_point = SURROGATES.stop
+    return stripped[:-1] + chr(next_code_point)
+
+
+def name_prefix_range(session: Session, prefix: str):
+    """
+    Filter clause for names starting with prefix, ignoring case.
+
+    Expressed as lower(name) >= prefix AND lower(name) < next-prefix so it
+    can use ix_player_lower_name, which LIKE cannot.
+    """
+    prefix = fold_case(session, prefix)
+    upper_bound = prefix_upper_bound(prefix)
+    lower_name = func.lower(Player.name)
+    if upper_bound is None:
+        return lower_name >= prefix
+    return and_(lower_name >= prefix, lower_name < upper_bound)
+
+
+def name_contains(session: Session, q: str):
+    """
+    Filter clause for names containing q, ignoring case.
+
+    On SQLite, queries of 3+ characters are answered by the trigram index,
+    which accelerates LIKE; otherwise a plain LIKE is used.
+    """
+    folded = fold_case(session, q)
+    escaped = escape_like(folded)
+    # FTS5 only accelerates LIKE without an ESCAPE clause, so queries that
+    # contain wildcard characters take the plain LIKE path
+    if (
+        session.get_bind().dialect.name == "sqlite"
+        and len(q) >= TRIGRAM_LENGTH
+        and escaped == folded
+    ):
+        matching_ids = select(player_fts.c.rowid).where(player_fts.c.name.like(f"%{escaped}%"))
+        return Player.id.in_(matching_ids)
+    return func.lower(Player.name).like(f"%{escaped}%", escape="\\")
+
+
+def search_players(session: Session, q: str, limit: int) -> List[Player]:
+    """Return up to `limit` players whose names best match q, best first."""
+    q = q.strip()
+    if not q:
+        return []
+
+    pattern = escape_like(fold_case(session, q))
+    prefix_match = func.lower(Player.name).like(f"{pattern}%", escape="\\")
+    substring_match = func.lower(Player.name).like(f"%{pattern}%", escape="\\")
+
+    if len(q) < TRIGRAM_LENGTH:
+        statement = (
+            select(Player)
+            .where(name_prefix_range(session, q))
+            .order_by(func.lower(Player.name), Player.id)
+            .limit(limit)
+        )
+        return session.exec(statement).all()
+
+    if session.get_bind().dialect.name != "sqlite":
+        statement = (
+            select(Player)
+            .where(substring_match)
+            .order_by(case((prefix_match, 0), else_=1), func.lower(Player.name))
+            .limit(limit)
+        )
+        return session.exec(statement).all()
+
+    matches = (
+        select(
+            player_fts.c.rowid.label("player_id"),
+            func.bm25(literal_column("player_fts")).label("score"),
+        )
+        .where(literal_column("player_fts").op("MATCH")(trigram_query(q)))
+        .subquery()
+    )
+    statement = (
+        select(Player)
+        .join(matches, Player.id == matches.c.player_id)
+        .order_by(
+            case((prefix_match, 0), (substring_match, 1), else_=2),
+            matches.c.score,
+            func.lower(Player.name),
+        )
+        .limit(limit)
+    )
+    return session.exec(statement).all()
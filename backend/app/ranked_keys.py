@@ -0,0 +1,155 @@
+"""
+Sorted keys with positional lookups.
+
+RankedKeys is an indexable skip list: every link records how many keys it
+skips, so inserting, removing, finding a key's position and reading the
+key at a position all take expected O(log n) time. The leaderboard cache
+keeps its ranking keys in one.
+"""
+import random
+from typing import Any, Iterable, Iterator, List, Optional
+
+# Enough levels for far more keys than any roster
+MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Any, level: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * level
+        # Positions advanced by following next at each level
+        self.width = [1] * level
+
+
+class RankedKeys:
+    """
+    Sorted multiset of comparable keys.
+
+    Positions are 0-based, as in a sorted list: bisect_left and
+    bisect_right behave like the bisect module's, and keys[i] is the i-th
+    smallest key.
+    """
+
+    def __init__(self, keys: Iterable = (), seed: Optional[int] = None):
+        self._random = random.Random(seed)
+        self._head = _Node(None, MAX_LEVEL)
+        self._levels = 1
+        self._size = 0
+        for key in keys:
+            self.add(key)
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable, seed: Optional[int] = None) -> "RankedKeys":
+        """Build from keys already in ascending order in O(n)."""
+        ranked = cls(seed=seed)
+        # The last node linked at each level, and its position
+        last = [ranked._head] * MAX_LEVEL
+        last_positions = [0] * MAX_LEVEL
+        position = 0
+        for key in keys:
+            position += 1
+            level = ranked._random_level()
+            node = _Node(key, level)
+            for i in range(level):
+                last[i].next[i] = node
+                last[i].width[i] = position - last_positions[i]
+                last[i], last_positions[i] = node, position
+            ranked._levels = max(ranked._levels, level)
+        ranked._size = position
+        return ranked
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        return self.iter_from(0)
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find(self, key: Any, inclusive: bool):
+        """
+        Walk to the last node before key (at or before it if inclusive).
+
+        Returns that node's predecessor at every level with its position
+        (the head is position 0, the first key position 1).
+        """
+        predecessors = [self._head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        node, position = self._head, 0
+        for level in reversed(range(self._levels)):
+            following = node.next[level]
+            while following is not None and (following.key <= key if inclusive else following.key < key):
+                position += node.width[level]
+                node, following = following, following.next[level]
+            predecessors[level] = node
+            positions[level] = position
+        return predecessors, positions
+
+    def bisect_left(self, key: Any) -> int:
+        """Number of keys less than key."""
+        return self._find(key, inclusive=False)[1][0]
+
+    def bisect_right(self, key: Any) -> int:
+        """Number of keys less than or equal to key."""
+        return self._find(key, inclusive=True)[1][0]
+
+    def add(self, key: Any) -> None:
+        """Insert key after any keys equal to it."""
+        predecessors, positions = self._find(key, inclusive=True)
+        level = self._random_level()
+        self._levels = max(self._levels, level)
+        node = _Node(key, level)
+        position = positions[0] + 1
+        for i in range(level):
+            before = predecessors[i]
+            node.next[i] = before.next[i]
+            # The old successor moves up one, so it is one further from the new node
+            node.width[i] = positions[i] + before.width[i] - position + 1
+            before.next[i] = node
+            before.width[i] = position - positions[i]
+        for i in range(level, self._levels):
+            predecessors[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key: Any) -> None:
+        """Remove one occurrence of key; raises ValueError if it is absent."""
+        predecessors, _ = self._find(key, inclusive=False)
+        node = predecessors[0].next[0]
+        if node is None or node.key != key:
+            raise ValueError(f"{key!r} not in RankedKeys")
+        for i in range(self._levels):
+            before = predecessors[i]
+            if before.next[i] is node:
+                before.width[i] += node.width[i] - 1
+                before.next[i] = node.next[i]
+            else:
+                before.width[i] -= 1
+        self._size -= 1
+
+    def _node_at(self, index: int) -> _Node:
+        if not 0 <= index < self._size:
+            raise IndexError("RankedKeys index out of range")
+        node, position = self._head, 0
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not None and position + node.width[level] <= index + 1:
+                position += node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int) -> Any:
+        return self._node_at(index).key
+
+    def iter_from(self, index: int) -> Iterator:
+        """Yield keys in order starting at position index."""
+        if index >= self._size:
+            return
+        node: Optional[_Node] = self._node_at(index)
+        while node is not None:
+            yield node.key
+            node = node.next[0]
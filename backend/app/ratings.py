@@ -0,0 +1,171 @@
+"""
+Elo ratings.
+
+Every player starts at INITIAL_RATING. After a match the winner takes
+K_FACTOR * (1 - expected) points from the loser, where expected is the
+winner's win probability given both ratings, so beating a stronger player
+gains more than beating a weaker one and the total is conserved.
+
+- apply_results updates ratings incrementally as matches are created; a
+  match played before ones already recorded is rated in played order by
+  replaying from it instead (stats_checkpoints.rerate_from)
+- recompute_ratings replays every match in chronological order with NumPy
+"""
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from .db import INITIAL_RATING, Match, Player
+
+# Largest rating change a single match can cause
+K_FACTOR = 32.0
+
+# Rating difference at which the stronger player is expected to win 10:1
+ELO_SCALE = 400.0
+
+# Average matches per round below which replay_ratings skips NumPy: with
+# only a few players each round is tiny and per-call overhead dominates
+MIN_ROUND_WIDTH = 8
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """Probability that a player rated `rating` beats one rated `opponent_rating`."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / ELO_SCALE))
+
+
+def rating_change(winner_rating: float, loser_rating: float) -> float:
+    """Points the winner gains (and the loser loses) for one match."""
+    return K_FACTOR * (1.0 - expected_score(winner_rating, loser_rating))
+
+
+def apply_results(session: Session, results: Iterable[Tuple[int, int]]) -> Dict[int, float]:
+    """
+    Update ratings for (winner_id, loser_id) results, applied in order.
+
+    Runs inside the caller's transaction, which commits. Call it after the
+    transaction's first write: on SQLite that write already holds the
+    database write lock, so the read-modify-write below cannot interleave
+    with another match; on PostgreSQL the player rows are locked FOR UPDATE.
+
+    Returns the players' new ratings.
+    """
+    results = list(results)
+    player_ids = {player_id for result in results for player_id in result}
+    ratings = dict(session.exec(
+        select(Player.id, Player.rating)
+        .where(Player.id.in_(player_ids))
+        .order_by(Player.id)
+        .with_for_update()
+    ).all())
+    for winner_id, loser_id in results:
+        change = rating_change(ratings[winner_id], ratings[loser_id])
+        ratings[winner_id] += change
+        ratings[loser_id] -= change
+
+    # Bulk UPDATE by primary key; skips the ORM flush and its Player events
+    session.execute(
+        update(Player), [{"id": player_id, "rating": rating} for player_id, rating in ratings.items()]
+    )
+    return ratings
+
+
+def replay_ratings(
+    home: np.ndarray, away: np.ndarray, home_won: np.ndarray, player_count: int
+) -> np.ndarray:
+    """
+    Replay matches in order and return every player's final rating.
+
+    home and away are player indexes in [0, player_count), one entry per
+    match in chronological order; home_won is a boolean array. The result
+    equals applying rating_change to one match at a time.
+
+    Each match is placed in the earliest round after both of its players'
+    previous matches. Matches in a round share no player, so a whole round
+    is one vectorized update, and every player's matches stay in order.
+    """
+    ratings = np.full(player_count, INITIAL_RATING)
+    if len(home) == 0:
+        return ratings
+
+    rounds = np.empty(len(home), dtype=np.int64)
+    next_round = [0] * player_count
+    for index, (h, a) in enumerate(zip(home.tolist(), away.tolist())):
+        round_ = max(next_round[h], next_round[a])
+        rounds[index] = round_
+        next_round[h] = next_round[a] = round_ + 1
+
+    round_count = int(rounds.max()) + 1
+    if len(home) < MIN_ROUND_WIDTH * round_count:
+        return _replay_sequential(home, away, home_won, ratings)
+
+    order = np.argsort(rounds, kind="stable")
+    home, away, score = home[order], away[order], home_won[order].astype(float)
+    bounds = np.searchsorted(rounds[order], np.arange(round_count + 1))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        h, a = home[start:end], away[start:end]
+        expected = 1.0 / (1.0 + 10.0 ** ((ratings[a] - ratings[h]) / ELO_SCALE))
+        change = K_FACTOR * (score[start:end] - expected)
+        ratings[h] += change
+        ratings[a] -= change
+    return ratings
+
+
+def _replay_sequential(
+    home: np.ndarray, away: np.ndarray, home_won: np.ndarray, ratings: np.ndarray
+) -> np.ndarray:
+    """Replay one match at a time; faster than NumPy when rounds are narrow."""
+    current = ratings.tolist()
+    for h, a, won in zip(home.tolist(), away.tolist(), home_won.tolist()):
+        change = K_FACTOR * (won - 1.0 / (1.0 + 10.0 ** ((current[a] - current[h]) / ELO_SCALE)))
+        current[h] += change
+        current[a] -= change
+    return np.array(current)
+
+
+def recompute_ratings(session: Session) -> int:
+    """
+    Rebuild every player's rating from the full match history and commit.
+
+    Matches are replayed in (played_at, id) order with their stored
+    winner_id. Players without matches go back to INITIAL_RATING. A match
+    against a player whose row is gone still moves the opponent's rating.
+
+    Matches recorded while it runs may be overwritten, so run it while
+    none are being created (e.g. after changing K_FACTOR).
+
+    Returns the number of matches replayed.
+    """
+    player_ids = np.array(session.exec(select(Player.id).order_by(Player.id)).all(), dtype=np.int64)
+    matches = np.array(
+        [
+            tuple(row) for row in session.exec(
+                select(Match.home_id, Match.away_id, Match.winner_id).order_by(Match.played_at, Match.id)
+            )
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    home_won = matches[:, 2] == matches[:, 0]
+
+    # Players whose row is gone (SQLite does not enforce the foreign key)
+    # keep a rating during the replay, so their opponents' ratings match
+    # the ones recorded incrementally; only existing players are updated
+    ids = np.union1d(player_ids, matches[:, :2])
+    ratings = replay_ratings(
+        np.searchsorted(ids, matches[:, 0]),
+        np.searchsorted(ids, matches[:, 1]),
+        home_won,
+        len(ids),
+    )
+    if len(player_ids):
+        session.execute(
+            update(Player),
+            [
+                {"id": player_id, "rating": rating}
+                for player_id, rating in zip(player_ids.tolist(), ratings[np.searchsorted(ids, player_ids)].tolist())
+            ],
+        )
+    session.commit()
+    return len(matches)
+
@@ -3,16 +3,23 @@ API endpoints for weekly archives.
 
 Endpoints for viewing historical weekly leaderboards and manual reset trigger.
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlmodel import Session, select, func
-from typing import List
-from ..schemas.archives import WeeklyArchiveOut, WeekInfo, ResetResponse
-from ..db import WeeklyArchive, Player, get_session
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Response
+from sqlmodel import Session, select
+from typing import List, Optional
+from ..schemas.archives import WeeklyArchiveOut, WeekInfo, WeekLeaderboard, ResetResponse
+from ..db import ArchiveWeek, get_session, parse_week
 from ..auth import get_current_user
 from ..weekly_reset import perform_weekly_reset
+from ..archive_snapshots import (
+    SNAPSHOT_CACHE_CONTROL, accepts_gzip, entity_tag, get_snapshot, get_snapshots,
+    join_snapshots, matches_etag,
+)
 
 router = APIRouter(prefix="/api/archives", tags=["archives"])
 
+# Most weeks accepted by one GET /api/archives/weeks/batch request
+MAX_BATCH_WEEKS = 52
+
 
 @router.get("/weeks", response_model=List[WeekInfo])
 def list_archived_weeks(session: Session = Depends(get_session)):
@@ -20,64 +27,85 @@ def list_archived_weeks(session: Session = Depends(get_session)):
     List all available archived weeks with summary information.
     Returns weeks in descending order (newest first).
     (Public endpoint)
-    """
-    # Get distinct weeks with winner info
-    statement = (
-        select(
-            WeeklyArchive.week_start,
-            WeeklyArchive.week_end,
-            WeeklyArchive.winner_id,
-            func.count(WeeklyArchive.id).label('total_players')
-        )
-        .group_by(WeeklyArchive.week_start, WeeklyArchive.week_end, WeeklyArchive.winner_id)
-        .order_by(WeeklyArchive.week_start.desc())
-    )
     
-    results = session.exec(statement).all()
+    Reads the ArchiveWeek summaries written at archive time, so this is a
+    single scan of one row per week.
+    """
+    statement = select(ArchiveWeek).order_by(ArchiveWeek.week.desc())
+    return session.exec(statement).all()
+
+
+@router.get("/weeks/batch", response_model=List[WeekLeaderboard])
+def get_weekly_leaderboards(
+    week_start: List[str] = Query([]),
+    session: Session = Depends(get_session),
+):
+    """
+    Get the full leaderboards for several weeks in one request.
+    Repeat the parameter: ?week_start=...&week_start=...
+    (Public endpoint)
     
-    # Build response with winner names
-    weeks = []
-    for week_start, week_end, winner_id, total_players in results:
-        # Get winner name
-        winner = session.get(Player, winner_id)
-        winner_name = winner.name if winner else "Unknown"
-        
-        weeks.append(WeekInfo(
-            week_start=week_start,
-            week_end=week_end,
-            winner_id=winner_id,
-            winner_name=winner_name,
-            total_players=total_players
-        ))
+    Returns one {week_start, leaderboard} entry per archived week, in the
+    order requested; weeks with no archived data are left out. Built from
+    the weeks' stored snapshots, fetched with a single query.
     
-    return weeks
+    Each week_start may be given as for GET /weeks/{week_start}; entries
+    carry the canonical ISO week_start.
+    """
+    # Checked here: a required list Query breaks FastAPI's 422 response
+    # when the parameter is missing
+    if not 1 <= len(week_start) <= MAX_BATCH_WEEKS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Request between 1 and {MAX_BATCH_WEEKS} weeks"
+        )
+    weeks = list(dict.fromkeys(week for week in map(parse_week, week_start) if week is not None))
+    snapshots = get_snapshots(session, weeks)
+    body = join_snapshots([snapshots[week] for week in weeks if week in snapshots])
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/weeks/{week_start}", response_model=List[WeeklyArchiveOut])
-def get_weekly_leaderboard(week_start: str, session: Session = Depends(get_session)):
+def get_weekly_leaderboard(
+    week_start: str,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    session: Session = Depends(get_session),
+):
     """
     Get the full leaderboard for a specific week.
     Returns players ordered by rank (ascending).
     (Public endpoint)
     
+    Served from the week's pre-serialized snapshot with a strong ETag and a
+    short max-age; a matching If-None-Match gets a 304.
+    
     Args:
-        week_start: ISO format date string (e.g., "2025-10-27T00:00:00")
+        week_start: ISO format date string (e.g., "2025-10-27T00:00:00"),
+            a plain date ("2025-10-27") or the integer week key
     """
-    statement = (
-        select(WeeklyArchive)
-        .where(WeeklyArchive.week_start == week_start)
-        .order_by(WeeklyArchive.rank.asc())
-    )
-    
-    archives = session.exec(statement).all()
+    week = parse_week(week_start)
+    snapshot = get_snapshot(session, week) if week is not None else None
     
-    if not archives:
+    if snapshot is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No archived data found for week starting {week_start}"
         )
     
-    return archives
+    gzipped = accepts_gzip(accept_encoding)
+    etag = entity_tag(snapshot, gzipped)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": SNAPSHOT_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if matches_etag(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=snapshot.body_gzip, media_type="application/json", headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 
 # @router.post("/reset", response_model=ResetResponse)
@@ -0,0 +1,60 @@
+"""
+API endpoints for the current week's leaderboard.
+
+Rows are ranked server-side and served from the in-memory leaderboard cache,
+so clients never download and sort the full player table. Past leaderboards
+(?as_of=) are replayed from stats checkpoints.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import Session
+from typing import List, Optional
+from ..schemas.leaderboard import LeaderboardEntry, LeaderboardCacheStats
+from ..db import get_session
+from ..leaderboard_cache import leaderboard_cache
+from ..stats_checkpoints import leaderboard_as_of, parse_as_of
+
+router = APIRouter(prefix="/api/leaderboard", tags=["leaderboard"])
+
+# Page size bounds for GET /api/leaderboard
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+@router.get("", response_model=List[LeaderboardEntry])
+def get_leaderboard(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    as_of: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    Get the current week's leaderboard, best first. (Public endpoint)
+    
+    Ordered by points then wins; tied players share a rank.
+    
+    - as_of: ISO 8601 date or datetime; a date means the end of that day,
+      and offsets are converted to UTC to compare with match played_at.
+      Returns the leaderboard of the week containing it as it stood then,
+      counting matches played up to as_of, with each player's rating.
+    """
+    if as_of is None:
+        return leaderboard_cache.page(session, limit, offset)
+    try:
+        moment = parse_as_of(as_of)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="as_of must be an ISO 8601 date or datetime",
+        )
+    return leaderboard_as_of(session, moment, limit, offset)
+
+
+@router.get("/cache", response_model=LeaderboardCacheStats)
+def get_leaderboard_cache_stats():
+    """
+    Report leaderboard cache counters. (Public endpoint)
+    
+    Reads no tables; LeaderboardCache.check_consistency, which scans every
+    player, is run from tests and maintenance scripts instead.
+    """
+    return LeaderboardCacheStats(**leaderboard_cache.stats())
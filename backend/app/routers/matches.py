@@ -1,36 +1,140 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from collections import defaultdict
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response, Body
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session, select
-from typing import List
-from ..schemas.matches import MatchIn, MatchOut, GameScore as GameScoreSchema
-from ..db import Match, GameScore, Player, get_session, compute_winner, WIN_POINTS
+from typing import Any, Dict, List, Optional
+from ..schemas.matches import MatchIn, MatchOut, BulkMatchError, GameScore as GameScoreSchema
+from ..db import (
+    IN_CLAUSE_CHUNK_SIZE, Match, GameScore, Player, PlayerWeekStats, get_session, current_epoch, match_outcome,
+    scoring_rules,
+)
 from ..auth import get_current_user
+from ..leaderboard_cache import leaderboard_cache
+from ..ratings import apply_results
+from ..stats_checkpoints import invalidate_checkpoints, rerate_from
 
 router = APIRouter(prefix="/api/matches", tags=["matches"])
 
+# Page size bounds for GET /api/matches
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Response header carrying the cursor for the next (older) page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Upper bound on matches accepted by one POST /api/matches/bulk request
+MAX_BULK_MATCHES = 500
+
+# INSERT constructs supporting ON CONFLICT DO UPDATE, by dialect
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def load_games_by_match(session: Session, match_ids: List[int]) -> Dict[int, List[GameScore]]:
+    """
+    Load the games for many matches with batched IN queries.
+
+    Returns a dict mapping match id to its games in insertion order, so
+    callers can build responses without one query per match.
+    """
+    games_by_match: Dict[int, List[GameScore]] = {match_id: [] for match_id in match_ids}
+
+    for start in range(0, len(match_ids), IN_CLAUSE_CHUNK_SIZE):
+        chunk = match_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+        statement = (
+            select(GameScore)
+            .where(GameScore.match_id.in_(chunk))
+            .order_by(GameScore.match_id, GameScore.id)
+        )
+        for game in session.exec(statement):
+            games_by_match[game.match_id].append(game)
+    return games_by_match
+
+
+def played_later(session: Session, played_at: str, first_new_id: int) -> bool:
+    """Whether a match recorded before first_new_id was played after played_at."""
+    return session.exec(
+        select(Match.id).where(Match.played_at > played_at, Match.id < first_new_id).limit(1)
+    ).first() is not None
+
+
+def increment_player_stats(
+    session: Session, player_id: int, wins: int = 0, losses: int = 0, points: int = 0
+) -> None:
+    """
+    Add deltas to a player's stats for the current epoch.
+
+    A single INSERT ... ON CONFLICT DO UPDATE SET col = col + delta creates
+    the player's row on their first match of the epoch and increments it
+    inside the database afterwards, so concurrent writers never lose updates.
+    The epoch is resolved by the same statement, so a match lands wholly in
+    the epoch that was current when it was written.
+    """
+    upsert = UPSERT_INSERTS[session.get_bind().dialect.name]
+    statement = upsert(PlayerWeekStats).values(
+        epoch=current_epoch(), player_id=player_id, wins=wins, losses=losses, points=points
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[PlayerWeekStats.epoch, PlayerWeekStats.player_id],
+            set_={
+                "wins": PlayerWeekStats.wins + statement.excluded.wins,
+                "losses": PlayerWeekStats.losses + statement.excluded.losses,
+                "points": PlayerWeekStats.points + statement.excluded.points,
+            },
+        )
+    )
+
 
 @router.get("", response_model=List[MatchOut])
-def list_matches(session: Session = Depends(get_session)):
-    """List all matches, most recent first. (Public endpoint)"""
-    statement = select(Match).order_by(Match.id.desc())
+def list_matches(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before_id: Optional[int] = Query(None, ge=1),
+    session: Session = Depends(get_session),
+):
+    """
+    List matches, most recent first. (Public endpoint)
+    
+    Uses keyset pagination on Match.id: pass the X-Next-Cursor header value
+    from the previous response as before_id to fetch the next (older) page.
+    The header is omitted on the last page.
+    """
+    statement = select(Match).order_by(Match.id.desc()).limit(limit + 1)
+    if before_id is not None:
+        statement = statement.where(Match.id < before_id)
     matches = session.exec(statement).all()
     
-    # Build response with games for each match
-    result = []
-    for match in matches:
-        games_statement = select(GameScore).where(GameScore.match_id == match.id)
-        games = session.exec(games_statement).all()
-        
-        result.append(
-            MatchOut(
-                id=match.id,
-                played_at=match.played_at,
-                home_id=match.home_id,
-                away_id=match.away_id,
-                games=[GameScoreSchema(home=g.home, away=g.away) for g in games],
-            )
-        )
+    # Fetched one extra row to learn whether another page exists
+    if len(matches) > limit:
+        matches = matches[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = str(matches[-1].id)
     
-    return result
+    # Fetch games for every match in one query and group them in memory
+    games_by_match = load_games_by_match(session, [match.id for match in matches])
+    
+    return [
+        MatchOut(
+            id=match.id,
+            played_at=match.played_at,
+            home_id=match.home_id,
+            away_id=match.away_id,
+            games=[GameScoreSchema(home=g.home, away=g.away) for g in games_by_match[match.id]],
+            winner_id=match.winner_id,
+            home_games_won=match.home_games_won,
+            away_games_won=match.away_games_won,
+            point_differential=match.point_differential,
+        )
+        for match in matches
+    ]
+
+
+def match_result(match_in: MatchIn, outcome: dict) -> tuple[int, int, int, int]:
+    """Return (winner_id, loser_id, winner_games, loser_games) from a match's outcome columns."""
+    if outcome["winner_id"] == match_in.home_id:
+        return match_in.home_id, match_in.away_id, outcome["home_games_won"], outcome["away_games_won"]
+    return match_in.away_id, match_in.home_id, outcome["away_games_won"], outcome["home_games_won"]
 
 
 @router.post("", response_model=MatchOut, status_code=status.HTTP_201_CREATED)
@@ -39,7 +143,7 @@ def create_match(
     session: Session = Depends(get_session),
     current_user: Player = Depends(get_current_user)
 ):
-    """Create a new match and update player stats. (Protected - requires authentication)"""
+    """Create a new match and update player stats and ratings. (Protected - requires authentication)"""
     # Validate that one of the players is the current user
     if current_user.id not in [payload.home_id, payload.away_id]:
         raise HTTPException(
@@ -48,62 +152,174 @@ def create_match(
         )
     
     # Validate players exist
-    home_player = session.get(Player, payload.home_id)
-    away_player = session.get(Player, payload.away_id)
+    existing_ids = session.exec(
+        select(Player.id).where(Player.id.in_([payload.home_id, payload.away_id]))
+    ).all()
     
-    if not home_player or not away_player:
+    if len(existing_ids) != 2:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Both home_id and away_id must refer to existing players.",
         )
 
-    # Create match record
+    # Create match record; flush (not commit) to obtain match.id so the
+    # match, its games and the stat updates land in one transaction
+    outcome = match_outcome(payload.home_id, payload.away_id, payload.games)
     match = Match(
         played_at=payload.played_at,
         home_id=payload.home_id,
         away_id=payload.away_id,
+        **outcome,
     )
     session.add(match)
-    session.commit()
-    session.refresh(match)
+    session.flush()
+    match_id = match.id
 
     # Create game score records
-    game_scores = []
-    for game in payload.games:
-        game_score = GameScore(
-            match_id=match.id,
-            home=game.home,
-            away=game.away,
-        )
-        session.add(game_score)
-        game_scores.append(game_score)
-    
-    session.commit()
-    for gs in game_scores:
-        session.refresh(gs)
-
-    # Determine winner and update player stats
-    winner = compute_winner(game_scores)
-    home_won = winner == "home"
-
-    if home_won:
-        home_player.wins += 1
-        away_player.losses += 1
-        home_player.points += WIN_POINTS
+    game_scores = [
+        GameScore(match_id=match_id, home=game.home, away=game.away)
+        for game in payload.games
+    ]
+    session.add_all(game_scores)
+
+    # Determine winner and update player stats in SQL so concurrent
+    # submissions for the same player cannot overwrite each other
+    winner_id, loser_id, winner_games, loser_games = match_result(payload, outcome)
+    winner_points, loser_points = scoring_rules(session).match_points(winner_games, loser_games)
+
+    deltas = {
+        winner_id: {"wins": 1, "losses": 0, "points": winner_points},
+        loser_id: {"wins": 0, "losses": 1, "points": loser_points},
+    }
+    for player_id, delta in deltas.items():
+        increment_player_stats(session, player_id, **delta)
+    invalidate_checkpoints(session, payload.played_at)
+    if played_later(session, payload.played_at, match_id):
+        rerate_from(session, payload.played_at)
     else:
-        away_player.wins += 1
-        home_player.losses += 1
-        away_player.points += WIN_POINTS
+        apply_results(session, [(winner_id, loser_id)])
 
-    session.add(home_player)
-    session.add(away_player)
-    session.commit()
+    # Commit and update the cached leaderboard as one step for cache readers
+    with leaderboard_cache.lock:
+        session.commit()
+        leaderboard_cache.apply_deltas(deltas)
 
-    # Return match with games
+    # Build the response from the payload; no need to re-read committed rows
     return MatchOut(
-        id=match.id,
-        played_at=match.played_at,
-        home_id=match.home_id,
-        away_id=match.away_id,
-        games=[GameScoreSchema(home=g.home, away=g.away) for g in game_scores],
+        id=match_id,
+        played_at=payload.played_at,
+        home_id=payload.home_id,
+        away_id=payload.away_id,
+        games=payload.games,
+        **outcome,
     )
+
+
+@router.post("/bulk", response_model=List[MatchOut], status_code=status.HTTP_201_CREATED)
+def create_matches_bulk(
+    payload: List[Dict[str, Any]] = Body(...),
+    session: Session = Depends(get_session),
+    current_user: Player = Depends(get_current_user)
+):
+    """
+    Create many matches in a single transaction. (Protected - requires authentication)
+    
+    Every item is validated as a MatchIn first. If any item is invalid, nothing
+    is written and a 422 is returned whose detail lists the errors per item index.
+    Otherwise all Match and GameScore rows are bulk inserted, each player's stats
+    are incremented once with their aggregated deltas, ratings are updated
+    match by match in played_at order (replaying later matches too if any
+    are played before ones already recorded), and the session commits once.
+    """
+    if len(payload) > MAX_BULK_MATCHES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_MATCHES} matches can be uploaded at once.",
+        )
+
+    # Validate every item before touching the database
+    matches_in: List[MatchIn] = []
+    errors: List[BulkMatchError] = []
+    for index, item in enumerate(payload):
+        try:
+            matches_in.append(MatchIn.model_validate(item))
+        except ValidationError as e:
+            errors.append(BulkMatchError(index=index, errors=[err["msg"] for err in e.errors()]))
+
+    if not errors:
+        player_ids = {m.home_id for m in matches_in} | {m.away_id for m in matches_in}
+        existing_ids = set(session.exec(select(Player.id).where(Player.id.in_(player_ids))).all())
+        for index, match_in in enumerate(matches_in):
+            item_errors = []
+            if current_user.id not in (match_in.home_id, match_in.away_id):
+                item_errors.append("You can only create matches where you are one of the players.")
+            if match_in.home_id not in existing_ids or match_in.away_id not in existing_ids:
+                item_errors.append("Both home_id and away_id must refer to existing players.")
+            if item_errors:
+                errors.append(BulkMatchError(index=index, errors=item_errors))
+
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[e.model_dump() for e in errors],
+        )
+
+    if not matches_in:
+        return []
+
+    # Insert all matches in one executemany, keeping ids in payload order
+    outcomes = [match_outcome(m.home_id, m.away_id, m.games) for m in matches_in]
+    match_ids = session.execute(
+        insert(Match).returning(Match.id, sort_by_parameter_order=True),
+        [
+            {"played_at": m.played_at, "home_id": m.home_id, "away_id": m.away_id, **outcome}
+            for m, outcome in zip(matches_in, outcomes)
+        ],
+    ).scalars().all()
+
+    session.execute(
+        insert(GameScore),
+        [
+            {"match_id": match_id, "home": g.home, "away": g.away}
+            for match_id, m in zip(match_ids, matches_in)
+            for g in m.games
+        ],
+    )
+
+    # Aggregate stat deltas so each player is updated once
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: {"wins": 0, "losses": 0, "points": 0})
+    results = []
+    rules = scoring_rules(session)
+    for m, outcome in sorted(zip(matches_in, outcomes), key=lambda pair: pair[0].played_at):
+        winner_id, loser_id, winner_games, loser_games = match_result(m, outcome)
+        winner_points, loser_points = rules.match_points(winner_games, loser_games)
+        deltas[winner_id]["wins"] += 1
+        deltas[winner_id]["points"] += winner_points
+        deltas[loser_id]["losses"] += 1
+        deltas[loser_id]["points"] += loser_points
+        results.append((winner_id, loser_id))
+
+    for player_id, delta in deltas.items():
+        increment_player_stats(session, player_id, **delta)
+    earliest = min(m.played_at for m in matches_in)
+    invalidate_checkpoints(session, earliest)
+    if played_later(session, earliest, min(match_ids)):
+        rerate_from(session, earliest)
+    else:
+        apply_results(session, results)
+
+    with leaderboard_cache.lock:
+        session.commit()
+        leaderboard_cache.apply_deltas(deltas)
+
+    return [
+        MatchOut(
+            id=match_id,
+            played_at=m.played_at,
+            home_id=m.home_id,
+            away_id=m.away_id,
+            games=m.games,
+            **outcome,
+        )
+        for match_id, m, outcome in zip(match_ids, matches_in, outcomes)
+    ]
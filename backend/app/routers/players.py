@@ -1,24 +1,106 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import base64
+import binascii
+import json
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from sqlalchemy import and_, func, or_
 from sqlmodel import Session, select
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from ..schemas.players import PlayerOut
-from ..db import Player, get_session
+from ..schemas.leaderboard import PlayerRank
+from ..schemas.archives import WeeklyArchiveOut
+from ..db import Player, WeeklyArchive, get_session, parse_week
+from ..leaderboard_cache import leaderboard_cache
+from ..player_search import search_players, name_contains
 
 router = APIRouter(prefix="/api/players", tags=["players"])
 
+# Page size bounds for GET /api/players (also caps the ids= batch size)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Result bounds for GET /api/players/search
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+
+def encode_cursor(key: str, row_id: int) -> str:
+    """Encode the last row's (key, id) sort key as an opaque cursor."""
+    raw = json.dumps([key, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a cursor from encode_cursor, raising 400 if it is malformed."""
+    try:
+        key, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(key, str) or not isinstance(row_id, int):
+            raise ValueError
+        return key, row_id
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
 
 @router.get("", response_model=List[PlayerOut])
-def list_players(q: Optional[str] = None, session: Session = Depends(get_session)):
-    """List all players, optionally filtered by name query. (Public endpoint)"""
-    statement = select(Player)
+def list_players(
+    response: Response,
+    q: Optional[str] = None,
+    ids: Optional[List[int]] = Query(None, max_length=MAX_PAGE_SIZE),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    List players ordered by name (case-insensitive). (Public endpoint)
+    
+    - q: only players whose name contains q, ignoring case
+    - ids: only these players (repeat the parameter: ?ids=1&ids=2)
+    - limit/cursor: keyset pagination on (lower(name), id); pass the
+      X-Next-Cursor header from the previous response as cursor. The header
+      is omitted on the last page.
+    """
+    lower_name = func.lower(Player.name)
+    # lower(name) is selected too so the cursor holds the value SQL sorted by;
+    # Python's str.lower() folds more characters than SQLite's lower()
+    statement = select(Player, lower_name).order_by(lower_name, Player.id).limit(limit + 1)
     if q:
-        q_lower = q.lower()
-        statement = statement.where(Player.name.ilike(f"%{q_lower}%"))
+        statement = statement.where(name_contains(session, q))
+    if ids:
+        statement = statement.where(Player.id.in_(ids))
+    if cursor:
+        after_name, after_id = decode_cursor(cursor)
+        # Written as a range on lower(name) so SQLite can seek ix_player_lower_name
+        statement = statement.where(
+            and_(
+                lower_name >= after_name,
+                or_(lower_name > after_name, Player.id > after_id),
+            )
+        )
+    
+    rows = session.exec(statement).all()
+    
+    # Fetched one extra row to learn whether another page exists
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_player, last_name = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last_name, last_player.id)
+    return [player for player, _ in rows]
+
+
+@router.get("/search", response_model=List[PlayerOut])
+def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    session: Session = Depends(get_session),
+):
+    """
+    Typeahead search over player names, best matches first. (Public endpoint)
     
-    players = session.exec(statement).all()
-    # Sort by name for determinism
-    players.sort(key=lambda p: p.name.lower())
-    return players
+    Supports prefix and fuzzy (shared-trigram) matching; see app/player_search.py.
+    """
+    return search_players(session, q, limit)
 
 
 @router.get("/{player_id}", response_model=PlayerOut)
@@ -28,3 +110,61 @@ def get_player(player_id: int, session: Session = Depends(get_session)):
     if not player:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
     return player
+
+
+@router.get("/{player_id}/rank", response_model=PlayerRank)
+def get_player_rank(player_id: int, session: Session = Depends(get_session)):
+    """
+    Get a player's current leaderboard rank, percentile and neighbours. (Public endpoint)
+    
+    Answered from the in-memory leaderboard cache with a binary search.
+    """
+    result = leaderboard_cache.player_rank(session, player_id)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+    return result
+
+
+@router.get("/{player_id}/history", response_model=List[WeeklyArchiveOut])
+def get_player_history(
+    player_id: int,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    Get a player's archived weekly results, most recent week first. (Public endpoint)
+    
+    Keyset pagination on (week, id), served by the (player_id, week)
+    index; pass the X-Next-Cursor header from the previous response as
+    cursor. The header is omitted on the last page.
+    """
+    if not session.get(Player, player_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+    
+    statement = (
+        select(WeeklyArchive)
+        .where(WeeklyArchive.player_id == player_id)
+        .order_by(WeeklyArchive.week.desc(), WeeklyArchive.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        before_week_start, before_id = decode_cursor(cursor)
+        before_week = parse_week(before_week_start)
+        if before_week is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        statement = statement.where(
+            and_(
+                WeeklyArchive.week <= before_week,
+                or_(WeeklyArchive.week < before_week, WeeklyArchive.id < before_id),
+            )
+        )
+    
+    weeks = session.exec(statement).all()
+    
+    # Fetched one extra row to learn whether another page exists
+    if len(weeks) > limit:
+        weeks = weeks[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(weeks[-1].week_start, weeks[-1].id)
+    return weeks
@@ -3,9 +3,11 @@ Background scheduler for periodic tasks.
 
 This module sets up APScheduler to run automated tasks:
 - Weekly leaderboard reset every Sunday at midnight
+- Stats checkpoints for past leaderboards, brought up to date hourly
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from .stats_checkpoints import update_checkpoints
 from .weekly_reset import perform_weekly_reset
 
 
@@ -19,6 +21,7 @@ def start_scheduler():
     
     Scheduled jobs:
     - Weekly reset: Every Sunday at 00:00:00 (midnight)
+    - Stats checkpoints: Every hour at half past
     """
     # Schedule weekly reset for Sunday at midnight
     scheduler.add_job(
@@ -30,6 +33,16 @@ def start_scheduler():
         misfire_grace_time=3600  # Allow up to 1 hour late execution if server was down
     )
     
+    # Checkpoint new matches off the request path, clear of the weekly reset
+    scheduler.add_job(
+        update_checkpoints,
+        trigger=CronTrigger(minute=30, second=0),
+        id='stats_checkpoints',
+        name='Stats Checkpoints',
+        replace_existing=True,
+        misfire_grace_time=3600
+    )
+    
     # Start the scheduler
     scheduler.start()
     print("Scheduler started. Weekly reset scheduled for Sundays at midnight.")
@@ -1,6 +1,8 @@
 """
 Schema models for weekly archive endpoints.
 """
+from typing import List
+
 from pydantic import BaseModel
 
 
@@ -18,6 +20,12 @@ class WeeklyArchiveOut(BaseModel):
     rank: int
 
 
+class WeekLeaderboard(BaseModel):
+    """One week's archived leaderboard, as returned by the batch endpoint."""
+    week_start: str
+    leaderboard: List[WeeklyArchiveOut]
+
+
 class WeekInfo(BaseModel):
     """Information about an available week."""
     week_start: str
@@ -25,6 +33,7 @@ class WeekInfo(BaseModel):
     winner_id: int
     winner_name: str
     total_players: int
+    total_matches: int
 
 
 class ResetResponse(BaseModel):
@@ -0,0 +1,34 @@
+"""
+Schema models for leaderboard endpoints.
+"""
+from pydantic import BaseModel
+from typing import Optional
+
+
+class LeaderboardEntry(BaseModel):
+    """A ranked row of the current week's leaderboard."""
+    rank: int
+    player_id: int
+    name: str
+    wins: int
+    losses: int
+    points: int
+    win_rate: float  # wins / (wins + losses), 0.0 when no matches played
+    rating: Optional[float] = None  # Elo rating then; only set for ?as_of= queries
+
+
+class PlayerRank(BaseModel):
+    """A player's leaderboard position with their immediate neighbours."""
+    player: LeaderboardEntry
+    above: Optional[LeaderboardEntry]  # None when the player is first
+    below: Optional[LeaderboardEntry]  # None when the player is last
+    total_players: int
+    percentile: float  # share of other players ranked below, 0-100
+
+
+class LeaderboardCacheStats(BaseModel):
+    """Leaderboard cache counters."""
+    built: bool
+    size: int
+    hits: int
+    misses: int
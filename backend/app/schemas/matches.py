@@ -38,3 +38,13 @@ class MatchOut(BaseModel):
     home_id: int
     away_id: int
     games: List[GameScore]
+    winner_id: int
+    home_games_won: int
+    away_games_won: int
+    point_differential: int  # home points minus away points
+
+
+class BulkMatchError(BaseModel):
+    """Validation errors for one item of a bulk match upload."""
+    index: int
+    errors: List[str]
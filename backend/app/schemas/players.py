@@ -9,3 +9,4 @@ class PlayerOut(BaseModel):
     wins: int
     losses: int
     points: int
+    rating: float
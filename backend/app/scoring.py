@@ -0,0 +1,224 @@
+"""
+Versioned scoring rules and the retroactive recompute.
+
+Points for a match follow the ScoringRules version in force (see
+ScoringRules.match_points): points per win and per loss, a bonus for a
+sweep and points per game of the winner's margin. Rules apply to all
+history, so changing them is two steps, normally in one transaction:
+
+- publish_rules adds the next version
+- recompute_scores re-scores every match with it
+
+recompute_scores rewrites the same rows as match_replay.replay_matches
+(past weekly archives and the current epoch's stats) but aggregates the
+match table's stored outcomes with NumPy instead of walking matches one
+by one, and writes the results with bulk inserts.
+"""
+import time
+
+import numpy as np
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from .db import (
+    ArchiveWeek, Match, Player, PlayerWeekStats, ScoringRules, WeeklyArchive, scoring_rules, week_key,
+)
+from .match_replay import ReplayReport, clear_standings, commit_standings
+from .stats_checkpoints import week_of
+from .weekly_reset import get_week_boundaries
+
+
+def publish_rules(session: Session, rules: ScoringRules) -> ScoringRules:
+    """
+    Add rules as the next version, in force from now on.
+
+    The caller runs recompute_scores (which commits) so that past weeks
+    are re-scored with them too.
+    """
+    rules.version = session.exec(select(func.coalesce(func.max(ScoringRules.version), 0))).one() + 1
+    session.add(rules)
+    session.flush()
+    return rules
+
+
+def columns(rows: list, count: int) -> list:
+    """
+    Split result rows into one list per column.
+
+    Much faster than np.array(rows), which converts Row objects one
+    element at a time.
+    """
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(count)]
+
+
+def match_weeks(played_at: list, current_week: int) -> np.ndarray:
+    """
+    Week key of each played_at, capped at current_week as in replay_matches.
+
+    week_of only reads the date a played_at starts with, so it runs once
+    per distinct date. Values without a date count towards current_week.
+    """
+    dates, inverse = np.unique(np.array([value[:10] for value in played_at], dtype=str), return_inverse=True)
+    date_weeks = np.array([week_of(date) or current_week for date in dates.tolist()], dtype=np.int64)
+    return np.minimum(date_weeks[inverse.reshape(-1)], current_week)
+
+
+def recompute_scores(session: Session) -> ReplayReport:
+    """
+    Re-score every match with the rules in force and rewrite standings; commits.
+
+    Produces the same archives, ranks and current stats as replay_matches,
+    including its per-week rosters and its handling of missing players.
+    Memory grows with the number of matches and archived rows.
+    """
+    started = time.perf_counter()
+    rules = scoring_rules(session)
+    current_week = week_key(get_week_boundaries()[0])
+    player_ids = np.array(session.exec(select(Player.id).order_by(Player.id)).all(), dtype=np.int64)
+    names = dict(session.exec(select(Player.id, Player.name)).all())
+    archived_week, archived_player, archived_name = columns(
+        session.exec(
+            select(WeeklyArchive.week, WeeklyArchive.player_id, WeeklyArchive.player_name)
+            .where(WeeklyArchive.week < current_week)
+        ).all(),
+        3,
+    )
+    epoch = clear_standings(session, current_week)
+
+    # Core execution on the session's connection skips ORM row processing
+    match_id, played_at, home_id, away_id, winner_id, home_games_won, away_games_won = columns(
+        session.connection().execute(
+            select(
+                Match.id, Match.played_at, Match.home_id, Match.away_id, Match.winner_id,
+                Match.home_games_won, Match.away_games_won,
+            ).order_by(Match.played_at, Match.id)
+        ).all(),
+        7,
+    )
+    home_id, away_id, winner_id, home_games_won, away_games_won = (
+        np.array(column, dtype=np.int64)
+        for column in (home_id, away_id, winner_id, home_games_won, away_games_won)
+    )
+
+    home_won = winner_id == home_id
+    loser_id = np.where(home_won, away_id, home_id)
+    winner_games = np.where(home_won, home_games_won, away_games_won)
+    loser_games = np.where(home_won, away_games_won, home_games_won)
+
+    # ScoringRules.match_points over every match at once
+    winner_points = (
+        rules.win_points
+        + np.where(loser_games == 0, rules.sweep_bonus, 0)
+        + rules.game_difference_points * (winner_games - loser_games)
+    )
+    loser_points = np.full(len(match_id), rules.loss_points)
+
+    weeks = match_weeks(played_at, current_week)
+    week_values, week_index = np.unique(weeks, return_inverse=True)
+    week_index = week_index.reshape(-1)
+
+    # Players are indexed over every id that occurs. A match may name a
+    # player whose row is gone (SQLite does not enforce the foreign key);
+    # as in replay_matches it still counts for the opponent, but the
+    # missing player gets no rows.
+    ids = np.union1d(player_ids, np.concatenate([winner_id, loser_id]))
+    known = np.isin(ids, player_ids)
+    span = len(ids)
+
+    # Past weeks' rosters as in replay_matches: current players the week was
+    # archived with, under the names archived then, plus whoever played.
+    # Archived weeks without matches drop out.
+    archived_week = np.array(archived_week, dtype=np.int64)
+    archived_player = np.array(archived_player, dtype=np.int64)
+    week_at = np.searchsorted(week_values, archived_week)
+    player_at = np.searchsorted(ids, archived_player)
+    listed = (week_at < len(week_values)) & (player_at < span)
+    listed[listed] = (
+        (week_values[week_at[listed]] == archived_week[listed])
+        & (ids[player_at[listed]] == archived_player[listed])
+    )
+    archived_keys = week_at[listed] * span + player_at[listed]
+    archived_names = dict(zip(archived_keys.tolist(), np.array(archived_name, dtype=object)[listed].tolist()))
+
+    # Wins, losses and points of the (week, player) pairs that occur, so
+    # memory follows the number of matches rather than weeks x players
+    matches = len(match_id)
+    pair_key, pair_of = np.unique(
+        np.concatenate([
+            week_index * span + np.searchsorted(ids, winner_id),
+            week_index * span + np.searchsorted(ids, loser_id),
+            archived_keys,
+        ]),
+        return_inverse=True,
+    )
+    pair_of = pair_of.reshape(-1)
+    pairs = len(pair_key)
+    wins = np.bincount(pair_of[:matches], minlength=pairs)
+    losses = np.bincount(pair_of[matches:2 * matches], minlength=pairs)
+    points = np.bincount(
+        pair_of[:2 * matches], weights=np.concatenate([winner_points, loser_points]), minlength=pairs
+    ).astype(np.int64)
+    pair_week = pair_key // span
+    pair_player = pair_key % span
+    kept = known[pair_player]
+
+    archived = np.flatnonzero(kept & (week_values[pair_week] < current_week))
+
+    # Rank within each week like rank_players: points, wins, then player id
+    order = archived[np.lexsort((pair_player[archived], -wins[archived], -points[archived], pair_week[archived]))]
+    sorted_week = pair_week[order]
+    new_week = np.ones(len(order), dtype=bool)
+    new_week[1:] = np.diff(sorted_week) != 0
+    new_group = new_week.copy()
+    new_group[1:] |= (np.diff(points[order]) != 0) | (np.diff(wins[order]) != 0)
+    positions = np.arange(len(order))
+    group_start = np.maximum.accumulate(np.where(new_group, positions, 0))
+    week_start = np.maximum.accumulate(np.where(new_week, positions, 0))
+    ranks = np.empty(pairs, dtype=np.int64)
+    ranks[order] = group_start - week_start + 1
+
+    def name(pair: int) -> str:
+        return archived_names.get(int(pair_key[pair])) or names[int(ids[pair_player[pair]])]
+
+    # Each week's first pair in ranked order is its winner
+    winner_pairs = order[new_week]
+    if len(archived):
+        session.execute(insert(WeeklyArchive), [
+            {"week": week, "player_id": player_id, "player_name": name(pair),
+             "wins": w, "losses": l, "points": p, "rank": r}
+            for pair, week, player_id, w, l, p, r in zip(
+                archived.tolist(),
+                week_values[pair_week[archived]].tolist(),
+                ids[pair_player[archived]].tolist(),
+                wins[archived].tolist(),
+                losses[archived].tolist(),
+                points[archived].tolist(),
+                ranks[archived].tolist(),
+            )
+        ])
+        rostered = np.bincount(pair_week[archived], minlength=len(week_values))
+        totals = np.bincount(pair_week[archived], weights=wins[archived], minlength=len(week_values)).astype(np.int64)
+        header_weeks = pair_week[winner_pairs]
+        session.execute(insert(ArchiveWeek), [
+            {"week": week, "winner_id": winner, "winner_name": name(pair),
+             "total_players": total_players, "total_matches": total}
+            for week, pair, winner, total_players, total in zip(
+                week_values[header_weeks].tolist(), winner_pairs.tolist(), ids[pair_player[winner_pairs]].tolist(),
+                rostered[header_weeks].tolist(), totals[header_weeks].tolist()
+            )
+        ])
+
+    current = np.flatnonzero(kept & (week_values[pair_week] == current_week))
+    if len(current):
+        session.execute(insert(PlayerWeekStats), [
+            {"epoch": epoch, "player_id": player_id, "wins": w, "losses": l, "points": p}
+            for player_id, w, l, p in zip(
+                ids[pair_player[current]].tolist(),
+                wins[current].tolist(),
+                losses[current].tolist(),
+                points[current].tolist(),
+            )
+        ])
+
+    commit_standings(session)
+    return ReplayReport(matches, len(winner_pairs), time.perf_counter() - started)
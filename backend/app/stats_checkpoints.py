@@ -0,0 +1,383 @@
+"""
+Stats checkpoints for "leaderboard as of" queries.
+
+Rebuilding the leaderboard at a past moment means replaying matches in
+played order, (played_at, id). A StatsCheckpoint stores every active
+player's rating and week-to-date stats at one position in that order, so
+a query loads the nearest checkpoint at or before the requested time and
+replays only the matches after it.
+
+- Checkpoints are written by a scheduled job (update_checkpoints), every
+  CHECKPOINT_INTERVAL matches; "as of" queries only read them
+- Recording a match played before existing checkpoints deletes them, since
+  they no longer include it
+- Weeks follow get_week_boundaries (Sunday to Saturday) applied to
+  played_at; week-to-date stats start over when the replay crosses one
+- Points follow the scoring rules in force; rewriting standings
+  (match_replay.clear_standings, run when they change) deletes every
+  checkpoint
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import islice
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, bindparam, delete, func, or_, update
+from sqlmodel import Session, select
+
+from .db import (
+    IN_CLAUSE_CHUNK_SIZE, INITIAL_RATING, Match, Player, ScoringRules, StatsCheckpoint, engine,
+    scoring_rules, week_key,
+)
+from .ratings import rating_change
+
+# Matches replayed between stored checkpoints
+CHECKPOINT_INTERVAL = 1000
+
+# One packed record per player in StatsCheckpoint.players
+CHECKPOINT_DTYPE = np.dtype([
+    ("player_id", "<i8"),
+    ("rating", "<f8"),
+    ("wins", "<i4"),
+    ("losses", "<i4"),
+    ("points", "<i4"),
+])
+
+
+@dataclass
+class PlayerState:
+    """A player's rating and week-to-date stats during a replay."""
+    rating: float = INITIAL_RATING
+    wins: int = 0
+    losses: int = 0
+    points: int = 0
+
+
+@dataclass
+class ReplayState:
+    """Every player's state after the match at (played_at, match_id)."""
+    played_at: Optional[str] = None
+    match_id: Optional[int] = None
+    week: Optional[int] = None
+    players: Dict[int, PlayerState] = field(default_factory=dict)
+
+    def start_week(self, week: Optional[int]) -> None:
+        """Zero week-to-date stats if `week` differs from the current one."""
+        if week is None or week == self.week:
+            return
+        for player in self.players.values():
+            player.wins = player.losses = player.points = 0
+        self.week = week
+
+
+def week_of(played_at: str) -> Optional[int]:
+    """Week key of the Sunday-to-Saturday week of the date a played_at starts with, or None."""
+    try:
+        day = date.fromisoformat(played_at[:10])
+    except ValueError:
+        return None
+    return week_key(day - timedelta(days=(day.weekday() + 1) % 7))
+
+
+def parse_as_of(as_of: str) -> datetime:
+    """
+    Return the moment an ISO 8601 as_of names, as a naive UTC datetime.
+
+    A date alone means the end of that day. A datetime with an offset is
+    converted to UTC; one without is taken as UTC, as played_at is.
+    Raises ValueError if as_of is not an ISO 8601 date or datetime.
+    """
+    try:
+        return datetime.combine(date.fromisoformat(as_of), time.max)
+    except ValueError:
+        pass
+    moment = datetime.fromisoformat(as_of)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def played_before(moment: datetime) -> str:
+    """
+    Exclusive played_at bound for matches played at or before moment, to the second.
+
+    The bound has no offset or fraction, so every played_at text in that
+    second ("...:00Z", "...:00.5") sorts below it.
+    """
+    return (moment.replace(microsecond=0) + timedelta(seconds=1)).isoformat()
+
+
+def load_checkpoint(session: Session, before: Optional[str] = None) -> ReplayState:
+    """Return the state at the latest checkpoint played before `before`, or the latest of all (empty if none)."""
+    statement = select(StatsCheckpoint)
+    if before is not None:
+        statement = statement.where(StatsCheckpoint.played_at < before)
+    checkpoint = session.exec(
+        statement
+        .order_by(StatsCheckpoint.played_at.desc(), StatsCheckpoint.match_id.desc())
+        .limit(1)
+    ).first()
+    if checkpoint is None:
+        return ReplayState()
+    records = np.frombuffer(checkpoint.players, dtype=CHECKPOINT_DTYPE)
+    return ReplayState(
+        played_at=checkpoint.played_at,
+        match_id=checkpoint.match_id,
+        week=checkpoint.week,
+        players={
+            player_id: PlayerState(rating, wins, losses, points)
+            for player_id, rating, wins, losses, points in records.tolist()
+        },
+    )
+
+
+def checkpoint_of(state: ReplayState) -> StatsCheckpoint:
+    """Return a checkpoint for the current replay position."""
+    records = np.array(
+        [
+            (player_id, player.rating, player.wins, player.losses, player.points)
+            for player_id, player in state.players.items()
+        ],
+        dtype=CHECKPOINT_DTYPE,
+    )
+    return StatsCheckpoint(
+        match_id=state.match_id,
+        played_at=state.played_at,
+        week=state.week,
+        players=records.tobytes(),
+    )
+
+
+def matches_after(state: ReplayState):
+    """Select the matches after the replay position, in played order."""
+    statement = (
+        select(
+            Match.id, Match.played_at, Match.home_id, Match.away_id, Match.winner_id,
+            Match.home_games_won, Match.away_games_won,
+        )
+        .order_by(Match.played_at, Match.id)
+    )
+    if state.match_id is not None:
+        statement = statement.where(
+            and_(
+                Match.played_at >= state.played_at,
+                or_(Match.played_at > state.played_at, Match.id > state.match_id),
+            )
+        )
+    return statement
+
+
+def apply_match(state: ReplayState, rules: ScoringRules, row) -> None:
+    """Advance the replay past one row of matches_after."""
+    match_id, played_at, home_id, away_id, winner_id, home_games_won, away_games_won = row
+    state.start_week(week_of(played_at))
+    if winner_id == home_id:
+        loser_id, winner_games, loser_games = away_id, home_games_won, away_games_won
+    else:
+        loser_id, winner_games, loser_games = home_id, away_games_won, home_games_won
+    winner = state.players.setdefault(winner_id, PlayerState())
+    loser = state.players.setdefault(loser_id, PlayerState())
+    change = rating_change(winner.rating, loser.rating)
+    winner.rating += change
+    loser.rating -= change
+    winner_points, loser_points = rules.match_points(winner_games, loser_games)
+    winner.wins += 1
+    winner.points += winner_points
+    loser.losses += 1
+    loser.points += loser_points
+    state.played_at, state.match_id = played_at, match_id
+
+
+def replay_until(session: Session, as_of: datetime) -> ReplayState:
+    """Replay matches played at or before as_of, starting from the nearest checkpoint. Writes nothing."""
+    before = played_before(as_of)
+    state = load_checkpoint(session, before)
+    rules = scoring_rules(session)
+    for row in session.exec(matches_after(state).where(Match.played_at < before)):
+        apply_match(state, rules, row)
+    return state
+
+
+def rerate_from(session: Session, played_at: str) -> None:
+    """
+    Rewrite ratings by replaying matches in played order from before played_at.
+
+    apply_results rates a new match after every match already recorded, so
+    a match played before some of them would be rated out of the
+    (played_at, id) order that recompute_ratings and as_of queries use.
+    Replays instead from the nearest checkpoint before played_at and
+    rewrites the rating of every player in the replayed matches.
+
+    Runs in the caller's transaction after the new matches are written,
+    which on SQLite holds the write lock, and after invalidate_checkpoints.
+    """
+    state = load_checkpoint(session, played_at)
+    rules = scoring_rules(session)
+    replayed = set()
+    for row in session.exec(matches_after(state)):
+        apply_match(state, rules, row)
+        replayed.update(row[2:4])
+
+    # Core executemany: players whose row is gone simply match nothing
+    player = Player.__table__
+    if replayed:
+        session.execute(
+            update(player).where(player.c.id == bindparam("player_id")).values(rating=bindparam("new_rating")),
+            [{"player_id": player_id, "new_rating": state.players[player_id].rating} for player_id in replayed],
+        )
+
+
+def build_checkpoints(session: Session) -> int:
+    """
+    Extend checkpoints through the newest match, one every CHECKPOINT_INTERVAL matches.
+
+    Returns the number of checkpoints added. If a match played before the
+    new checkpoints is recorded while they are built, they are discarded
+    and the next run starts over from the remaining ones.
+    """
+    newest_id = session.exec(select(func.max(Match.id))).one()
+    if newest_id is None:
+        return 0
+    state = load_checkpoint(session)
+    rules = scoring_rules(session)
+    checkpoints = []
+    for replayed, row in enumerate(session.exec(matches_after(state).where(Match.id <= newest_id)), 1):
+        apply_match(state, rules, row)
+        if replayed % CHECKPOINT_INTERVAL == 0:
+            checkpoints.append(checkpoint_of(state))
+    if not checkpoints:
+        return 0
+
+    session.add_all(checkpoints)
+    # The flush takes SQLite's write lock, so no match commits between this
+    # check and ours. A match recorded since newest_id was read has a higher
+    # id; played before the last checkpoint, the replay missed it and its
+    # invalidate_checkpoints ran before these rows existed.
+    session.flush()
+    missed = session.exec(
+        select(Match.id)
+        .where(Match.id > newest_id, Match.played_at < checkpoints[-1].played_at)
+        .limit(1)
+    ).first()
+    if missed is not None:
+        session.rollback()
+        return 0
+    session.commit()
+    return len(checkpoints)
+
+
+def update_checkpoints():
+    """Build checkpoints for matches recorded since the last run. Called by the scheduler."""
+    with Session(engine) as session:
+        try:
+            added = build_checkpoints(session)
+            print(f"Stats checkpoints updated: {added} added")
+        except Exception as e:
+            print(f"Error updating stats checkpoints: {e}")
+            session.rollback()
+            raise
+
+
+def tie_ranks(keys: List[tuple], start: int = 1) -> List[int]:
+    """
+    Rank keys already in leaderboard order, the first at position `start`.
+
+    Tied keys share the rank of the first of them, as SQL RANK() does.
+    """
+    ranks = []
+    rank = previous = None
+    for position, key in enumerate(keys, start):
+        if key != previous:
+            rank, previous = position, key
+        ranks.append(rank)
+    return ranks
+
+
+def leaderboard_as_of(session: Session, as_of: datetime, limit: int, offset: int) -> List[dict]:
+    """
+    Return leaderboard rows [offset, offset + limit) as they stood at as_of.
+
+    Rows carry the fields of the current leaderboard (points and wins are
+    for the week containing as_of) plus each player's Elo rating then.
+    Every current player is listed; those without matches by then have no
+    stats and the initial rating.
+
+    Players without points or wins all tie and are listed by id, so only
+    the others are sorted in Python; the tied run is read in id order up
+    to the page.
+    """
+    state = replay_until(session, as_of)
+    state.start_week(week_of(as_of.isoformat()))
+
+    scored = {player_id: player for player_id, player in state.players.items() if player.points or player.wins}
+    scored_list = list(scored)
+    current_ids = []
+    for start in range(0, len(scored_list), IN_CLAUSE_CHUNK_SIZE):
+        chunk = scored_list[start:start + IN_CLAUSE_CHUNK_SIZE]
+        current_ids += session.exec(select(Player.id).where(Player.id.in_(chunk))).all()
+    scored_ids = sorted(
+        current_ids, key=lambda player_id: (-scored[player_id].points, -scored[player_id].wins, player_id)
+    )
+    # Players with negative points rank below the tied run
+    above = [player_id for player_id in scored_ids if scored[player_id].points >= 0]
+    below = scored_ids[len(above):]
+
+    def keys(player_ids):
+        return [(scored[player_id].points, scored[player_id].wins) for player_id in player_ids]
+
+    end = offset + limit
+    page = list(zip(above, tie_ranks(keys(above))))[offset:end]
+    tied_offset = max(offset - len(above), 0)
+    tied_limit = end - max(offset, len(above))
+    tied_ids = []
+    if tied_limit > 0:
+        # Walk ids in order, skipping scored ones; at most every scored
+        # player sorts before the wanted rows
+        unscored = (
+            player_id for player_id in session.exec(
+                select(Player.id).order_by(Player.id).limit(tied_offset + tied_limit + len(scored_ids))
+            )
+            if player_id not in scored
+        )
+        tied_ids = list(islice(unscored, tied_offset, tied_offset + tied_limit))
+        page += [(player_id, len(above) + 1) for player_id in tied_ids]
+
+    if below and tied_limit > 0 and len(tied_ids) < tied_limit:
+        # The page runs past the tied run; its length is known unless the
+        # page starts beyond it
+        if tied_ids or tied_offset == 0:
+            tied_count = tied_offset + len(tied_ids)
+        else:
+            tied_count = session.exec(select(func.count(Player.id))).one() - len(scored_ids)
+        below_start = len(above) + tied_count
+        page += list(zip(below, tie_ranks(keys(below), below_start + 1)))[
+            max(offset - below_start, 0):end - below_start
+        ]
+
+    names = dict(session.exec(select(Player.id, Player.name).where(Player.id.in_([p for p, _ in page]))).all())
+    entries = []
+    for player_id, rank in page:
+        player = state.players.get(player_id, PlayerState())
+        games_played = player.wins + player.losses
+        entries.append({
+            "rank": rank,
+            "player_id": player_id,
+            "name": names[player_id],
+            "wins": player.wins,
+            "losses": player.losses,
+            "points": player.points,
+            "win_rate": player.wins / games_played if games_played else 0.0,
+            "rating": player.rating,
+        })
+    return entries
+
+
+def invalidate_checkpoints(session: Session, played_at: str) -> None:
+    """
+    Delete checkpoints that a new match played at `played_at` falls before.
+
+    New matches get the highest id, so checkpoints at the same played_at
+    still precede them and are kept. Runs in the caller's transaction.
+    """
+    session.execute(delete(StatsCheckpoint).where(StatsCheckpoint.played_at > played_at))
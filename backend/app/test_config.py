@@ -17,7 +17,9 @@ TEST_DATABASE_URL = f"sqlite:///./{TEST_DB_FILE}"
 test_engine = create_engine(
     TEST_DATABASE_URL,
     echo=False,
-    connect_args={"check_same_thread": False},
+    # Concurrent-writer stress tests can queue on SQLite's write lock for
+    # longer than the default 5 second busy timeout
+    connect_args={"check_same_thread": False, "timeout": 30},
     pool_pre_ping=True  # Helps with connection issues
 )
 
@@ -2,13 +2,23 @@
 Weekly reset functionality for the ping pong leaderboard.
 
 This module handles:
-- Archiving current week's stats to WeeklyArchive table
-- Resetting all player stats to 0
+- Archiving current week's stats to WeeklyArchive table, with a summary
+  row per week in ArchiveWeek and a pre-serialized leaderboard in
+  ArchiveSnapshot
+- Resetting all player stats to 0 by advancing the stats epoch
 - Scheduled execution every Sunday at midnight
 """
 from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import exists, func, insert, literal, or_
 from sqlmodel import Session, select
-from .db import Player, WeeklyArchive, engine
+from .db import (
+    ArchiveWeek, Player, PlayerWeekStats, StatsEpoch, WeeklyArchive, engine,
+    current_epoch, leaderboard_order, player_stats, week_bounds, week_key,
+)
+from .leaderboard_cache import leaderboard_cache
+from .archive_snapshots import render_snapshot
+from .stats_checkpoints import week_of
 
 
 def get_week_boundaries() -> tuple[datetime, datetime]:
@@ -30,59 +40,162 @@ def get_week_boundaries() -> tuple[datetime, datetime]:
     return week_start, week_end
 
 
-def archive_current_week(session: Session) -> int:
+def epoch_week(session: Session, epoch: Optional[int] = None) -> int:
     """
-    Archive all current player stats to WeeklyArchive table.
+    Week key of the Sunday-to-Saturday week an epoch covered.
     
-    Creates a snapshot of each player's current stats (wins, losses, points, rank)
-    for the current week. Skips archiving if no activity (all players at 0 points).
+    Each epoch after the first starts at the weekly reset on its week's
+    Sunday, so it covers the week its started_at falls in. Epoch 0 has no
+    row: it covers the current week until the first reset and the week
+    before the current one once it is closed. Matches are keyed the same
+    way by played_at (see stats_checkpoints.week_of), so a replay files
+    them under the same week.
     
     Args:
         session: Database session
+        epoch: Stats epoch (default: the current epoch)
+        
+    Returns:
+        int: Week key
+    """
+    epoch_value = current_epoch() if epoch is None else literal(epoch)
+    started_at, latest = session.exec(
+        select(
+            select(StatsEpoch.started_at).where(StatsEpoch.epoch == epoch_value).scalar_subquery(),
+            current_epoch(),
+        )
+    ).one()
+    week = week_of(started_at) if started_at is not None else None
+    if week is not None:
+        return week
+    current_week = week_key(get_week_boundaries()[0])
+    return current_week if epoch is None or epoch == latest else current_week - 7
+
+
+def archive_current_week(session: Session, epoch: Optional[int] = None) -> int:
+    """
+    Archive all player stats for an epoch to WeeklyArchive table.
+    
+    Creates a snapshot of each player's stats (wins, losses, points, rank)
+    in the given epoch, keyed by the week the epoch covered (see
+    epoch_week): after the Sunday reset, the week that just ended. Skips
+    archiving if no activity (all players at 0 points).
+    
+    The snapshot is a single INSERT ... SELECT: ranks come from RANK() over
+    the leaderboard order (tied players share a rank) and an EXISTS check
+    makes the statement insert nothing when no player has any activity.
+    The week's winner is recorded once, in its ArchiveWeek header.
+    
+    Args:
+        session: Database session
+        epoch: Stats epoch to archive (default: the current epoch)
         
     Returns:
         int: Number of players archived
     """
-    week_start, week_end = get_week_boundaries()
+    week = epoch_week(session, epoch)
+    week_start, week_end = week_bounds(week)
+    epoch = current_epoch() if epoch is None else epoch
+    stats = player_stats(epoch)
     
-    # Get all players sorted by points (descending) for ranking
-    # Secondary sort by wins to break ties
-    statement = select(Player).order_by(Player.points.desc(), Player.wins.desc())
-    players = session.exec(statement).all()
+    has_activity = exists().where(
+        PlayerWeekStats.epoch == epoch,
+        or_(PlayerWeekStats.points > 0, PlayerWeekStats.wins > 0),
+    ).correlate(None)
     
-    # Skip if no players or no activity (all at 0 points and wins)
-    if not players or all(p.points == 0 and p.wins == 0 for p in players):
+    snapshot = (
+        select(
+            literal(week),
+            stats.c.player_id,
+            stats.c.name,
+            stats.c.wins,
+            stats.c.losses,
+            stats.c.points,
+            func.rank().over(order_by=leaderboard_order(stats)),
+        )
+        .where(has_activity)
+        .order_by(*leaderboard_order(stats), stats.c.player_id)
+    )
+    statement = insert(WeeklyArchive).from_select(
+        ["week", "player_id", "player_name", "wins", "losses", "points", "rank"], snapshot
+    )
+    archived_count = session.exec(statement).rowcount
+    
+    if archived_count == 0:
+        # No players, or no activity (all at 0 points and wins)
         print(f"No activity this week ({week_start.date()} to {week_end.date()}), skipping archive")
         return 0
     
-    # Determine winner (player with most points)
-    winner_id = players[0].id if players else None
-    
-    # Create archive records for each player
-    archived_count = 0
-    for rank, player in enumerate(players, start=1):
-        archive = WeeklyArchive(
-            week_start=week_start.isoformat(),
-            week_end=week_end.isoformat(),
-            winner_id=winner_id,
-            player_id=player.id,
-            player_name=player.name,
-            wins=player.wins,
-            losses=player.losses,
-            points=player.points,
-            rank=rank
-        )
-        session.add(archive)
-        archived_count += 1
-    
+    # Winner is the top of the leaderboard; ties go to the earliest player
+    winner_id = session.exec(
+        select(stats.c.player_id).order_by(*leaderboard_order(stats), stats.c.player_id).limit(1)
+    ).one()
+    session.merge(summarize_week(session, week, winner_id))
+    session.merge(render_snapshot(session, week))
     session.commit()
     print(f"Archived {archived_count} players for week {week_start.date()} to {week_end.date()}")
     return archived_count
 
 
+def summarize_week(session: Session, week: int, winner_id: int) -> ArchiveWeek:
+    """
+    Build the ArchiveWeek header for a week from its WeeklyArchive rows.
+    
+    If the week was archived more than once, the latest snapshot's winner
+    (the one passed in) is used and matches are counted across all of its
+    rows; a player in several snapshots counts once. Each match has exactly
+    one winner, so total_matches is the sum of wins. The winner's name is
+    the one archived with their latest row, as the week's leaderboard shows.
+    """
+    total_players, total_matches = session.exec(
+        select(
+            func.count(WeeklyArchive.player_id.distinct()),
+            func.coalesce(func.sum(WeeklyArchive.wins), 0),
+        ).where(WeeklyArchive.week == week)
+    ).one()
+    winner_name = session.exec(
+        select(WeeklyArchive.player_name)
+        .where(WeeklyArchive.week == week, WeeklyArchive.player_id == winner_id)
+        .order_by(WeeklyArchive.id.desc())
+        .limit(1)
+    ).one()
+    return ArchiveWeek(
+        week=week,
+        winner_id=winner_id,
+        winner_name=winner_name,
+        total_players=total_players,
+        total_matches=total_matches,
+    )
+
+
+def advance_epoch(session: Session) -> int:
+    """
+    Start a new stats epoch, resetting every player's stats at once.
+    
+    Only a StatsEpoch row is written, so the reset takes the same time for
+    any number of players. Matches committed before it count towards the
+    closed epoch and matches after it towards the new one; readers see one
+    or the other, never a partly reset table.
+    
+    Args:
+        session: Database session
+        
+    Returns:
+        int: The epoch that was closed
+    """
+    closed = session.exec(select(func.coalesce(func.max(StatsEpoch.epoch), 0))).one()
+    session.add(StatsEpoch(epoch=closed + 1, started_at=datetime.now().isoformat()))
+    # Take the database write lock before the cache lock, as create_match does
+    session.flush()
+    with leaderboard_cache.lock:
+        session.commit()
+        leaderboard_cache.invalidate()
+    return closed
+
+
 def reset_player_stats(session: Session) -> int:
     """
-    Reset all player wins/losses/points to 0.
+    Reset all player wins/losses/points to 0 by advancing the stats epoch.
     
     Args:
         session: Database session
@@ -90,28 +203,24 @@ def reset_player_stats(session: Session) -> int:
     Returns:
         int: Number of players reset
     """
-    statement = select(Player)
-    players = session.exec(statement).all()
-    
-    for player in players:
-        player.wins = 0
-        player.losses = 0
-        player.points = 0
-        session.add(player)
-    
-    session.commit()
-    print(f"Reset stats for {len(players)} players")
-    return len(players)
+    advance_epoch(session)
+    reset_count = session.exec(select(func.count(Player.id))).one()
+    print(f"Reset stats for {reset_count} players")
+    return reset_count
 
 
 def perform_weekly_reset():
     """
-    Main function to archive current week and reset stats.
+    Main function to reset stats and archive the week that just ended.
     
     This function should be called by the scheduler every Sunday at midnight.
     It performs the following steps:
-    1. Archive current week's stats to WeeklyArchive table
-    2. Reset all player stats (wins, losses, points) to 0
+    1. Advance the stats epoch, resetting all player stats to 0 at once
+    2. Archive the closed epoch's stats to WeeklyArchive table
+    3. Rebuild the in-memory leaderboard cache from the new epoch
+    
+    Archiving reads the closed epoch, which no longer changes, so matches
+    recorded while it runs are neither lost nor archived twice.
     
     Raises:
         Exception: If archiving or reset fails
@@ -119,9 +228,10 @@ def perform_weekly_reset():
     with Session(engine) as session:
         try:
             print(f"Starting weekly reset at {datetime.now()}")
-            archived = archive_current_week(session)
-            reset = reset_player_stats(session)
-            print(f"Weekly reset completed: {archived} players archived, {reset} players reset")
+            closed_epoch = advance_epoch(session)
+            archived = archive_current_week(session, epoch=closed_epoch)
+            leaderboard_cache.rebuild(session)
+            print(f"Weekly reset completed: epoch {closed_epoch} closed, {archived} players archived")
         except Exception as e:
             print(f"Error during weekly reset: {e}")
             session.rollback()
@@ -0,0 +1,34 @@
+# backend/replay_matches.py
+"""
+Rebuild player stats and weekly archives by replaying the match log.
+
+Usage: python replay_matches.py [--chunk-size N] [--ratings]
+"""
+import argparse
+
+from app.db import engine
+from app.match_replay import REPLAY_CHUNK_SIZE, replay_matches
+from app.ratings import recompute_ratings
+from sqlmodel import Session
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=REPLAY_CHUNK_SIZE,
+                        help=f"matches read per query (default {REPLAY_CHUNK_SIZE})")
+    parser.add_argument("--ratings", action="store_true",
+                        help="also recompute every player's Elo rating")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        report = replay_matches(session, chunk_size=args.chunk_size)
+        print(
+            f"✓ Replayed {report.matches} matches in {report.seconds:.2f}s "
+            f"({report.matches_per_second:,.0f} matches/s), archived {report.archived_weeks} weeks"
+        )
+        if args.ratings:
+            print(f"✓ Recomputed ratings from {recompute_ratings(session)} matches")
+
+
+if __name__ == "__main__":
+    main()
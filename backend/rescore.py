@@ -0,0 +1,41 @@
+# backend/rescore.py
+"""
+Publish new scoring rules and re-score all match history with them.
+
+Usage: python rescore.py [--win-points N] [--loss-points N] [--sweep-bonus N]
+                         [--game-difference-points N]
+Without options, re-scores history with the rules already in force.
+"""
+import argparse
+
+from app.db import ScoringRules, engine, scoring_rules
+from app.scoring import publish_rules, recompute_scores
+from sqlmodel import Session
+
+RULE_FIELDS = ["win_points", "loss_points", "sweep_bonus", "game_difference_points"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    for name in RULE_FIELDS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int,
+                            help="default: the value in force")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        rules = scoring_rules(session)
+        changes = {name: getattr(args, name) for name in RULE_FIELDS if getattr(args, name) is not None}
+        if changes:
+            rules = publish_rules(session, ScoringRules(
+                **{name: getattr(rules, name) for name in RULE_FIELDS}, **changes
+            ))
+            print(f"✓ Published scoring rules version {rules.version}")
+        report = recompute_scores(session)
+        print(
+            f"✓ Re-scored {report.matches} matches in {report.seconds:.2f}s "
+            f"({report.matches_per_second:,.0f} matches/s), archived {report.archived_weeks} weeks"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,14 @@ This file contains reusable fixtures that set up test database,
 sessions, and test client for API testing.
 """
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel
 
 from app.main import app
 from app.db import get_session, Player, Match, GameScore  # Import all models
+from app.leaderboard_cache import leaderboard_cache
 from app.test_config import (
     test_engine,
     get_test_session,
@@ -49,6 +52,7 @@ def session():
     # Clean up any existing data before each test
     SQLModel.metadata.drop_all(test_engine)
     SQLModel.metadata.create_all(test_engine)
+    leaderboard_cache.invalidate()
     
     with Session(test_engine) as test_session:
         yield test_session
@@ -63,6 +67,7 @@ def client():
     # Clean and recreate database tables before each test
     SQLModel.metadata.drop_all(test_engine)
     SQLModel.metadata.create_all(test_engine)
+    leaderboard_cache.invalidate()
     
     # Override the get_session dependency
     app.dependency_overrides[get_session] = get_test_session
@@ -118,3 +123,76 @@ def sample_players(client):
             "charlie": charlie,
         }
 
+
+
+@pytest.fixture
+def registered_players(client):
+    """
+    Register sample players through the auth API.
+    Returns a dict keyed by lowercase name with each player's id and
+    Authorization headers, ready for protected endpoints.
+    """
+    players = {}
+    for name in ("Alice", "Bob", "Charlie"):
+        response = client.post("/api/auth/register", json={
+            "name": name,
+            "email": f"{name.lower()}@example.com"
+        })
+        data = response.json()
+        players[name.lower()] = {
+            "id": data["player"]["id"],
+            "headers": {"Authorization": f"Bearer {data['access_token']}"},
+        }
+    return players
+
+
+@pytest.fixture
+def play(client):
+    """
+    Record a match through the API, posted by the home player.
+    Players are registered_players entries; games are (home, away)
+    scores and default to one 11-9 game won by the home player.
+    Returns the created match.
+
+    Usage:
+        play(alice, bob)
+        play(bob, alice, games=[(11, 9), (9, 11), (11, 5)], played_at="2025-10-20T10:00:00Z")
+    """
+    def _play(home, away, games=((11, 9),), played_at="2025-10-27T14:30:00Z"):
+        response = client.post("/api/matches", json={
+            "played_at": played_at,
+            "home_id": home["id"],
+            "away_id": away["id"],
+            "games": [{"home": home_score, "away": away_score} for home_score, away_score in games]
+        }, headers=home["headers"])
+        assert response.status_code == 201
+        return response.json()
+
+    return _play
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Count SQL statements executed against the test engine.
+    Each entry is a (statement, parameters, executemany) tuple.
+
+    Usage:
+        with count_queries() as statements:
+            client.get("/api/matches")
+        assert len(statements) == 2
+    """
+    @contextmanager
+    def _count():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters, executemany))
+
+        event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+    return _count
@@ -1,14 +1,35 @@
 """
 Tests for archive API endpoints.
 
-Tests the /api/archives endpoints for viewing historical leaderboards.
+Tests the /api/archives endpoints for viewing historical leaderboards and
+GET /api/players/{id}/history for one player's archived weeks.
 """
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, update
 
+from app.db import MAX_WEEK_KEY, ArchiveSnapshot, ArchiveWeek, WeeklyArchive, parse_week, week_key
 from app.test_config import test_engine
-from app.weekly_reset import archive_current_week, reset_player_stats
+from app.weekly_reset import archive_current_week, get_week_boundaries, reset_player_stats
+
+
+@pytest.fixture
+def week_starts(client: TestClient, registered_players, play):
+    """Archive three weeks with different winners, returned newest first."""
+    alice = registered_players["alice"]
+    bob = registered_players["bob"]
+    weeks = ["2025-10-12T00:00:00", "2025-10-19T00:00:00", "2025-10-26T00:00:00"]
+    for week, (winner, loser) in zip(weeks, [(alice, bob), (bob, alice), (alice, bob)]):
+        play(winner, loser, played_at="2025-10-27T10:00:00Z")
+        with Session(test_engine) as session:
+            archive_current_week(session)
+            reset_player_stats(session)
+            # Relabel the week just archived so each gets its own week_start
+            current = week_key(get_week_boundaries()[0])
+            for model in (WeeklyArchive, ArchiveSnapshot, ArchiveWeek):
+                session.exec(update(model).where(model.week == current).values(week=parse_week(week)))
+            session.commit()
+    return weeks[::-1]
 
 
 class TestListArchivedWeeks:
@@ -118,6 +139,58 @@ class TestListArchivedWeeks:
             assert weeks[0]["week_start"] >= weeks[1]["week_start"]
 
 
+class TestArchiveWeekSummary:
+    """Test the per-week summaries behind GET /api/archives/weeks."""
+    
+    def test_summary_counts_matches(self, client: TestClient, registered_players, play):
+        """Test that the summary records the winner, players and match count."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        play(alice, bob)
+        play(alice, charlie, games=[(11, 5)])
+        play(bob, charlie, games=[(4, 11)])
+        
+        with Session(test_engine) as session:
+            archive_current_week(session)
+        
+        week = client.get("/api/archives/weeks").json()[0]
+        assert week["winner_id"] == alice["id"]
+        assert week["winner_name"] == "Alice"
+        assert week["total_players"] == 3
+        assert week["total_matches"] == 3
+    
+    def test_rearchived_week_counts_each_player_once(self, client: TestClient, registered_players, play):
+        """Test that a week archived in two epochs counts its players once and both epochs' matches."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        with Session(test_engine) as session:
+            for winner, loser in [(alice, bob), (bob, alice)]:
+                play(winner, loser)
+                archive_current_week(session)
+                reset_player_stats(session)
+        
+        week = client.get("/api/archives/weeks").json()[0]
+        assert week["total_players"] == 3
+        assert week["total_matches"] == 2
+    
+    def test_list_weeks_is_one_query(self, client: TestClient, registered_players, count_queries, play):
+        """Test that listing weeks does not look up each winner separately."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        with Session(test_engine) as session:
+            for winner, loser in [(alice, bob), (bob, alice), (alice, bob)]:
+                play(winner, loser)
+                archive_current_week(session)
+                reset_player_stats(session)
+        
+        with count_queries() as statements:
+            response = client.get("/api/archives/weeks")
+        
+        assert response.status_code == 200
+        assert len(statements) == 1
+
+
 class TestGetWeeklyLeaderboard:
     """Test GET /api/archives/weeks/{week_start} endpoint."""
     
@@ -353,3 +426,227 @@ class TestArchivesIntegration:
             assert player["losses"] == 0
             assert player["points"] == 0
 
+
+
+class TestWeeklyLeaderboardSnapshots:
+    """Test HTTP caching of archived week leaderboards."""
+    
+    @pytest.fixture
+    def week_start(self, client: TestClient, registered_players, play):
+        play(registered_players["alice"], registered_players["bob"], played_at="2025-10-27T10:00:00Z")
+        with Session(test_engine) as session:
+            archive_current_week(session)
+            reset_player_stats(session)
+        return client.get("/api/archives/weeks").json()[0]["week_start"]
+    
+    def test_cache_headers(self, client: TestClient, week_start):
+        """Test that archived weeks are served with a strong ETag and must be revalidated."""
+        response = client.get(f"/api/archives/weeks/{week_start}")
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert "immutable" not in response.headers["cache-control"]
+        assert "must-revalidate" in response.headers["cache-control"]
+        assert [row["player_name"] for row in response.json()] == ["Alice", "Bob", "Charlie"]
+    
+    def test_if_none_match_returns_304(self, client: TestClient, week_start):
+        """Test that a matching If-None-Match gets an empty 304."""
+        etag = client.get(f"/api/archives/weeks/{week_start}").headers["etag"]
+        
+        response = client.get(f"/api/archives/weeks/{week_start}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        
+        stale = client.get(f"/api/archives/weeks/{week_start}", headers={"If-None-Match": '"stale"'})
+        assert stale.status_code == 200
+    
+    def test_gzip_and_identity_bodies(self, client: TestClient, week_start):
+        """Test that gzip is served when accepted, with its own ETag."""
+        gzipped = client.get(f"/api/archives/weeks/{week_start}", headers={"Accept-Encoding": "gzip"})
+        plain = client.get(f"/api/archives/weeks/{week_start}", headers={"Accept-Encoding": "identity"})
+        
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in plain.headers
+        assert gzipped.json() == plain.json()
+        assert gzipped.headers["etag"] != plain.headers["etag"]
+    
+    def test_served_from_snapshot(self, client: TestClient, week_start, count_queries):
+        """Test that a view is one primary-key lookup rather than a leaderboard query."""
+        with count_queries() as statements:
+            client.get(f"/api/archives/weeks/{week_start}")
+        
+        assert len(statements) == 1
+        assert "FROM archivesnapshot" in statements[0][0]
+    
+    def test_missing_snapshot_is_rendered_on_first_view(self, client: TestClient, week_start):
+        """Test that weeks archived before snapshots existed are still served."""
+        from sqlalchemy import text
+        
+        expected = client.get(f"/api/archives/weeks/{week_start}").json()
+        with test_engine.begin() as conn:
+            conn.execute(text("DELETE FROM archivesnapshot"))
+        
+        assert client.get(f"/api/archives/weeks/{week_start}").json() == expected
+        with test_engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM archivesnapshot")).scalar() == 1
+    
+    def test_rearchiving_changes_etag(self, client: TestClient, registered_players, week_start, play):
+        """Test that archiving the same week again replaces its snapshot."""
+        etag = client.get(f"/api/archives/weeks/{week_start}").headers["etag"]
+        play(registered_players["bob"], registered_players["charlie"], played_at="2025-10-27T11:00:00Z")
+        with Session(test_engine) as session:
+            archive_current_week(session)
+        
+        assert client.get(f"/api/archives/weeks/{week_start}").headers["etag"] != etag
+
+
+class TestWeeklyLeaderboardBatch:
+    """Test GET /api/archives/weeks/batch endpoint."""
+    
+    def test_batch_returns_requested_weeks(self, client: TestClient, registered_players, week_starts):
+        """Test that each requested week comes back with its leaderboard, in request order."""
+        newest, middle, oldest = week_starts
+        response = client.get(f"/api/archives/weeks/batch?week_start={oldest}&week_start={newest}")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert [week["week_start"] for week in data] == [oldest, newest]
+        assert data[0]["leaderboard"] == client.get(f"/api/archives/weeks/{oldest}").json()
+        assert data[1]["leaderboard"][0]["player_id"] == registered_players["alice"]["id"]
+    
+    def test_batch_is_one_query(self, client: TestClient, week_starts, count_queries):
+        """Test that several weeks are fetched with a single statement."""
+        query = "&".join(f"week_start={week}" for week in week_starts)
+        with count_queries() as statements:
+            response = client.get(f"/api/archives/weeks/batch?{query}")
+        
+        assert len(response.json()) == 3
+        assert len(statements) == 1
+    
+    def test_batch_renders_missing_snapshots_together(self, client: TestClient, week_starts, count_queries):
+        """Test that weeks without a snapshot are rendered with one query and stored in one commit."""
+        from sqlalchemy import text
+        
+        # The fixture relabels stored snapshots, so compare with ones rendered a week at a time
+        with test_engine.begin() as conn:
+            conn.execute(text("DELETE FROM archivesnapshot"))
+        expected = [client.get(f"/api/archives/weeks/{week}").json() for week in week_starts]
+        with test_engine.begin() as conn:
+            conn.execute(text("DELETE FROM archivesnapshot"))
+        
+        query = "&".join(f"week_start={week}" for week in week_starts)
+        with count_queries() as statements:
+            data = client.get(f"/api/archives/weeks/batch?{query}").json()
+        assert [week["leaderboard"] for week in data] == expected
+        assert len(statements) == 3
+        assert sum("FROM weeklyarchive" in statement for statement, _, _ in statements) == 1
+        with test_engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM archivesnapshot")).scalar() == 3
+    
+    def test_batch_skips_unknown_weeks(self, client: TestClient, week_starts):
+        """Test that weeks with no archived data are left out."""
+        response = client.get(
+            f"/api/archives/weeks/batch?week_start=2020-01-05T00:00:00&week_start={week_starts[0]}"
+        )
+        assert [week["week_start"] for week in response.json()] == [week_starts[0]]
+    
+    def test_batch_requires_weeks(self, client: TestClient):
+        """Test that at least one and at most 52 weeks may be requested."""
+        assert client.get("/api/archives/weeks/batch").status_code == 422
+        query = "&".join(f"week_start=w{i}" for i in range(53))
+        assert client.get(f"/api/archives/weeks/batch?{query}").status_code == 422
+
+
+class TestPlayerHistory:
+    """Test GET /api/players/{id}/history endpoint."""
+    
+    def test_history_lists_weeks_newest_first(self, client: TestClient, registered_players, week_starts):
+        """Test that a player's archived weeks come back newest first with their results."""
+        alice_id = registered_players["alice"]["id"]
+        response = client.get(f"/api/players/{alice_id}/history")
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+        
+        history = response.json()
+        assert [week["week_start"] for week in history] == week_starts
+        assert all(week["player_id"] == alice_id for week in history)
+        assert [week["rank"] for week in history] == [1, 2, 1]
+        assert [(week["wins"], week["losses"], week["points"]) for week in history] == [
+            (1, 0, 3), (0, 1, 0), (1, 0, 3)
+        ]
+    
+    def test_history_keeps_archived_names(self, client: TestClient, registered_players, week_starts):
+        """Test that renaming a player leaves the names in their archived weeks alone."""
+        from app.db import Player
+        
+        alice_id = registered_players["alice"]["id"]
+        with Session(test_engine) as session:
+            alice = session.get(Player, alice_id)
+            alice.name = "Alicia"
+            session.add(alice)
+            session.commit()
+        
+        history = client.get(f"/api/players/{alice_id}/history").json()
+        assert {week["player_name"] for week in history} == {"Alice"}
+        weeks = client.get("/api/archives/weeks").json()
+        assert {week["winner_name"] for week in weeks if week["winner_id"] == alice_id} == {"Alice"}
+    
+    def test_history_cursor_walks_all_weeks(self, client: TestClient, registered_players, week_starts):
+        """Test that following X-Next-Cursor visits every week exactly once."""
+        bob_id = registered_players["bob"]["id"]
+        seen = []
+        url = f"/api/players/{bob_id}/history?limit=2"
+        response = client.get(url)
+        seen += [week["week_start"] for week in response.json()]
+        assert len(seen) == 2
+        
+        response = client.get(f"{url}&cursor={response.headers['X-Next-Cursor']}")
+        seen += [week["week_start"] for week in response.json()]
+        assert "X-Next-Cursor" not in response.headers
+        assert seen == week_starts
+    
+    def test_history_empty_for_player_never_archived(self, client: TestClient, week_starts):
+        """Test that a player who joined after the archived weeks gets an empty list."""
+        dana = client.post("/api/auth/register", json={"name": "Dana", "email": "dana@example.com"})
+        response = client.get(f"/api/players/{dana.json()['player']['id']}/history")
+        assert response.status_code == 200
+        assert response.json() == []
+    
+    def test_history_unknown_player(self, client: TestClient):
+        """Test that an unknown player returns 404."""
+        assert client.get("/api/players/9999/history").status_code == 404
+    
+    def test_history_invalid_cursor(self, client: TestClient, registered_players):
+        """Test that a malformed cursor returns 400."""
+        alice_id = registered_players["alice"]["id"]
+        assert client.get(f"/api/players/{alice_id}/history?cursor=nope").status_code == 400
+
+
+class TestWeekParameter:
+    """Test the week_start forms accepted by the archive endpoints."""
+    
+    def test_week_start_forms_are_equivalent(self, client: TestClient, week_starts):
+        """Test that the ISO datetime, plain date and integer key all find the same week."""
+        newest = week_starts[0]
+        expected = client.get(f"/api/archives/weeks/{newest}").json()
+        for form in (newest[:10], str(parse_week(newest))):
+            response = client.get(f"/api/archives/weeks/{form}")
+            assert response.status_code == 200
+            assert response.json() == expected
+    
+    def test_unparseable_week_start(self, client: TestClient, week_starts):
+        """Test that a value that is not a week returns 404, and is skipped in a batch."""
+        assert client.get("/api/archives/weeks/not-a-week").status_code == 404
+        
+        response = client.get(f"/api/archives/weeks/batch?week_start=not-a-week&week_start={week_starts[0][:10]}")
+        assert response.status_code == 200
+        assert [week["week_start"] for week in response.json()] == [week_starts[0]]
+    
+    def test_out_of_range_week_key(self, client: TestClient, week_starts):
+        """Test that a key too large for a date or an SQLite integer returns 404, and is skipped in a batch."""
+        for key in ("99999999999999999999", str(MAX_WEEK_KEY + 1), "9999-12-31"):
+            assert client.get(f"/api/archives/weeks/{key}").status_code == 404
+            
+            response = client.get(f"/api/archives/weeks/batch?week_start={key}&week_start={week_starts[0][:10]}")
+            assert response.status_code == 200
+            assert [week["week_start"] for week in response.json()] == [week_starts[0]]
@@ -4,10 +4,16 @@ Unit tests for database models and logic.
 Tests the database models, constraints, and utility functions
 without involving the API layer.
 """
+from datetime import date
+
 import pytest
 from sqlmodel import Session, select
 
-from app.db import Player, Match, GameScore, compute_winner, WIN_POINTS
+from app.db import (
+    Player, PlayerWeekStats, StatsEpoch, Match, GameScore, compute_winner, WIN_POINTS,
+    match_outcome, parse_week, week_bounds, week_key,
+)
+from app.weekly_reset import get_week_boundaries
 
 
 class TestComputeWinner:
@@ -58,6 +64,22 @@ class TestComputeWinner:
         assert compute_winner(games) == "away"
 
 
+
+class TestMatchOutcome:
+    """Test the outcome columns stored on a match."""
+    
+    def test_away_win(self):
+        """Test games won, winner and the home-minus-away point differential."""
+        games = [
+            GameScore(match_id=1, home=11, away=9),
+            GameScore(match_id=1, home=4, away=11),
+            GameScore(match_id=1, home=10, away=12),
+        ]
+        assert match_outcome(1, 2, games) == {
+            "winner_id": 2, "home_games_won": 1, "away_games_won": 2, "point_differential": -7,
+        }
+
+
 class TestPlayerModel:
     """Test Player model creation and constraints."""
     
@@ -66,14 +88,16 @@ class TestPlayerModel:
         player = Player(
             name="Test Player",
             email="test@example.com",
-            wins=5,
-            losses=3,
-            points=15,
         )
         session.add(player)
         session.commit()
         session.refresh(player)
         
+        # Stats are read from the player's current-epoch stats row
+        session.add(PlayerWeekStats(epoch=0, player_id=player.id, wins=5, losses=3, points=15))
+        session.commit()
+        session.refresh(player)
+        
         assert player.id is not None
         assert player.name == "Test Player"
         assert player.email == "test@example.com"
@@ -123,6 +147,29 @@ class TestPlayerModel:
             session.commit()
 
 
+class TestStatsEpochs:
+    """Test that Player stats follow the current stats epoch."""
+    
+    def test_new_epoch_resets_player_stats(self, session: Session):
+        """Test that starting an epoch zeroes stats without touching old rows."""
+        player = Player(name="Test Player", email="test@example.com")
+        session.add(player)
+        session.commit()
+        session.add(PlayerWeekStats(epoch=0, player_id=player.id, wins=2, losses=1, points=6))
+        session.commit()
+        session.refresh(player)
+        assert (player.wins, player.losses, player.points) == (2, 1, 6)
+        
+        session.add(StatsEpoch(epoch=1, started_at="2025-11-02T00:00:00"))
+        session.commit()
+        session.refresh(player)
+        assert (player.wins, player.losses, player.points) == (0, 0, 0)
+        
+        # The closed epoch's stats are still there to archive
+        closed = session.get(PlayerWeekStats, (0, player.id))
+        assert closed.wins == 2
+
+
 class TestMatchModel:
     """Test Match model creation."""
     
@@ -135,6 +182,10 @@ class TestMatchModel:
             played_at="2025-10-27T14:30:00Z",
             home_id=alice.id,
             away_id=bob.id,
+            winner_id=alice.id,
+            home_games_won=1,
+            away_games_won=0,
+            point_differential=2,
         )
         session.add(match)
         session.commit()
@@ -158,6 +209,10 @@ class TestGameScoreModel:
             played_at="2025-10-27T14:30:00Z",
             home_id=alice.id,
             away_id=bob.id,
+            winner_id=alice.id,
+            home_games_won=1,
+            away_games_won=0,
+            point_differential=2,
         )
         session.add(match)
         session.commit()
@@ -178,6 +233,22 @@ class TestGameScoreModel:
         assert game.away == 9
 
 
+class TestWeekKeys:
+    """Test the integer week keys archived weeks are stored under."""
+    
+    def test_week_key_round_trip(self):
+        """Test that a week's key maps back to its get_week_boundaries() bounds."""
+        week_start, week_end = get_week_boundaries()
+        assert week_bounds(week_key(week_start)) == (week_start, week_end)
+    
+    def test_parse_week_forms(self):
+        """Test that ISO datetimes, dates and integer keys parse to the same key."""
+        assert parse_week("2025-10-12T00:00:00") == week_key(date(2025, 10, 12))
+        assert parse_week("2025-10-12") == week_key(date(2025, 10, 12))
+        assert parse_week(str(week_key(date(2025, 10, 12)))) == week_key(date(2025, 10, 12))
+        assert parse_week("next week") is None
+
+
 class TestWinPointsConstant:
     """Test WIN_POINTS constant value."""
     
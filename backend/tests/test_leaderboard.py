@@ -0,0 +1,359 @@
+"""
+Integration tests for the leaderboard endpoint.
+
+Tests GET /api/leaderboard ranking, win rate and pagination, and past
+leaderboards replayed from stats checkpoints (?as_of=).
+"""
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app import stats_checkpoints
+from app.db import Match, ScoringRules, StatsCheckpoint
+from app.leaderboard_cache import leaderboard_cache
+from app.ranked_keys import RankedKeys
+from app.scoring import publish_rules
+from app.test_config import test_engine
+
+
+def cache_mismatches():
+    """Player ids whose cached stats differ from the database."""
+    with Session(test_engine) as session:
+        return leaderboard_cache.check_consistency(session)
+
+
+class TestLeaderboard:
+    """Test GET /api/leaderboard endpoint."""
+    
+    def test_empty_leaderboard(self, client: TestClient):
+        """Test leaderboard with no players."""
+        response = client.get("/api/leaderboard")
+        assert response.status_code == 200
+        assert response.json() == []
+    
+    def test_ranked_by_points_then_wins(self, client: TestClient, registered_players, play):
+        """Test ordering, ranks and win rates."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        
+        play(alice, bob)
+        play(alice, charlie)
+        play(bob, charlie)
+        
+        response = client.get("/api/leaderboard")
+        assert response.status_code == 200
+        
+        rows = response.json()
+        assert [r["name"] for r in rows] == ["Alice", "Bob", "Charlie"]
+        assert [r["rank"] for r in rows] == [1, 2, 3]
+        assert rows[0]["player_id"] == alice["id"]
+        assert rows[0]["points"] == 6
+        assert rows[0]["win_rate"] == 1.0
+        assert rows[1]["win_rate"] == 0.5
+        assert rows[2]["win_rate"] == 0.0
+    
+    def test_ties_share_rank(self, client: TestClient, registered_players, play):
+        """Test that players equal on points and wins share a rank."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        
+        play(alice, charlie)
+        play(bob, charlie)
+        
+        rows = client.get("/api/leaderboard").json()
+        assert [r["rank"] for r in rows] == [1, 1, 3]
+        assert rows[2]["name"] == "Charlie"
+    
+    def test_no_matches_win_rate_zero(self, client: TestClient, registered_players):
+        """Test that players without matches have a 0.0 win rate."""
+        rows = client.get("/api/leaderboard").json()
+        assert len(rows) == 3
+        assert all(r["win_rate"] == 0.0 for r in rows)
+        assert all(r["rank"] == 1 for r in rows)
+    
+    def test_limit_and_offset(self, client: TestClient, registered_players, play):
+        """Test paging through the leaderboard keeps global ranks."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        
+        play(alice, bob)
+        play(alice, charlie)
+        play(bob, charlie)
+        
+        first = client.get("/api/leaderboard?limit=2").json()
+        second = client.get("/api/leaderboard?limit=2&offset=2").json()
+        
+        assert [r["name"] for r in first] == ["Alice", "Bob"]
+        assert [(r["name"], r["rank"]) for r in second] == [("Charlie", 3)]
+    
+    def test_invalid_paging(self, client: TestClient):
+        """Test that out-of-range paging parameters are rejected."""
+        assert client.get("/api/leaderboard?limit=0").status_code == 422
+        assert client.get("/api/leaderboard?offset=-1").status_code == 422
+
+
+class TestLeaderboardCache:
+    """Test the in-memory leaderboard cache behind GET /api/leaderboard."""
+    
+    def test_reads_hit_cache_after_first_miss(self, client: TestClient, registered_players, play):
+        """Test that match writes update the cache instead of invalidating it."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        before = client.get("/api/leaderboard/cache").json()
+        
+        client.get("/api/leaderboard")
+        play(alice, bob)
+        play(bob, alice)
+        play(alice, bob)
+        rows = client.get("/api/leaderboard").json()
+        
+        assert [(r["name"], r["points"]) for r in rows[:2]] == [("Alice", 6), ("Bob", 3)]
+        stats = client.get("/api/leaderboard/cache").json()
+        assert stats["misses"] - before["misses"] == 1
+        assert stats["hits"] - before["hits"] == 1
+        assert cache_mismatches() == []
+    
+    def test_reads_issue_no_sql_when_cached(
+        self, client: TestClient, registered_players, count_queries
+    ):
+        """Test that a cached read does not touch the database."""
+        client.get("/api/leaderboard")
+        with count_queries() as statements:
+            client.get("/api/leaderboard")
+        assert statements == []
+    
+    def test_new_player_invalidates_cache(self, client: TestClient, registered_players):
+        """Test that registering a player shows up on the next read."""
+        assert len(client.get("/api/leaderboard").json()) == 3
+        client.post("/api/auth/register", json={"name": "Dana", "email": "dana@example.com"})
+        assert len(client.get("/api/leaderboard").json()) == 4
+    
+    def test_bulk_upload_updates_cache(self, client: TestClient, registered_players):
+        """Test that bulk uploads apply their aggregated deltas to the cache."""
+        alice = registered_players["alice"]
+        charlie = registered_players["charlie"]
+        client.get("/api/leaderboard")
+        
+        client.post("/api/matches/bulk", json=[{
+            "played_at": "2025-10-27T14:30:00Z",
+            "home_id": charlie["id"],
+            "away_id": alice["id"],
+            "games": [{"home": 11, "away": 9}]
+        }] * 2, headers=charlie["headers"])
+        
+        rows = client.get("/api/leaderboard").json()
+        assert (rows[0]["name"], rows[0]["wins"], rows[0]["points"]) == ("Charlie", 2, 6)
+        assert cache_mismatches() == []
+    
+    def test_reset_rebuilds_cache(self, client: TestClient, registered_players, play):
+        """Test that the weekly reset leaves the cache matching the database."""
+        from sqlmodel import Session
+        from app.test_config import test_engine
+        from app.weekly_reset import archive_current_week, reset_player_stats
+        
+        play(registered_players["alice"], registered_players["bob"])
+        client.get("/api/leaderboard")
+        
+        with Session(test_engine) as session:
+            archive_current_week(session)
+            reset_player_stats(session)
+        
+        rows = client.get("/api/leaderboard").json()
+        assert all(r["points"] == 0 for r in rows)
+        assert cache_mismatches() == []
+    
+    def test_consistency_check_detects_drift(self, client: TestClient, registered_players):
+        """Test that out-of-band SQL writes are reported as inconsistencies."""
+        from sqlalchemy import text
+        from app.test_config import test_engine
+        
+        client.get("/api/leaderboard")
+        with test_engine.begin() as conn:
+            conn.execute(text("INSERT INTO playerweekstats (epoch, player_id, wins, losses, points) "
+                              "VALUES (0, :id, 0, 0, 99)"),
+                         {"id": registered_players["bob"]["id"]})
+        
+        assert cache_mismatches() == [registered_players["bob"]["id"]]
+    
+    def test_stats_endpoint_does_not_scan_players(self, client: TestClient, registered_players, count_queries):
+        """Test that the public counters endpoint is served without SQL."""
+        client.get("/api/leaderboard")
+        with count_queries() as statements:
+            stats = client.get("/api/leaderboard/cache").json()
+        assert statements == []
+        assert (stats["built"], stats["size"]) == (True, 3)
+
+
+class TestRankedKeys:
+    """Test the skip list holding the cache's ranking keys."""
+    
+    def test_matches_sorted_list(self):
+        """Test adds, removes, positions and bisects against a sorted list."""
+        rng = random.Random(7)
+        keys = RankedKeys(seed=7)
+        expected = []
+        for _ in range(2000):
+            if expected and rng.random() < 0.4:
+                key = rng.choice(expected)
+                expected.remove(key)
+                keys.remove(key)
+            else:
+                key = (rng.randint(-20, 0), rng.randint(-5, 0), rng.randint(1, 50))
+                expected.append(key)
+                expected.sort()
+                keys.add(key)
+            probe = (rng.randint(-20, 0), rng.randint(-5, 0))
+            assert keys.bisect_left(probe) == sum(k < probe for k in expected)
+            assert keys.bisect_right(probe + (float("inf"),)) == sum(k[:2] <= probe for k in expected)
+        
+        assert len(keys) == len(expected)
+        assert list(keys) == expected
+        assert [keys[i] for i in range(len(expected))] == expected
+        assert list(keys.iter_from(len(expected) // 2)) == expected[len(expected) // 2:]
+        
+        rebuilt = RankedKeys.from_sorted(expected, seed=7)
+        assert [rebuilt[i] for i in range(len(expected))] == expected
+        rebuilt.remove(expected[0])
+        rebuilt.add((1, 0, 0))
+        assert list(rebuilt) == expected[1:] + [(1, 0, 0)]
+    
+    def test_missing_key_and_index(self):
+        """Test that absent keys and out-of-range positions raise."""
+        keys = RankedKeys([(0, 0, 1)])
+        with pytest.raises(ValueError):
+            keys.remove((0, 0, 2))
+        with pytest.raises(IndexError):
+            keys[1]
+
+
+class TestLeaderboardAsOf:
+    """Test GET /api/leaderboard?as_of= replayed from stats checkpoints."""
+    
+    @pytest.fixture
+    def history(self, client: TestClient, registered_players, play):
+        """Matches across two Sunday-to-Saturday weeks, posted in played order."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        play(alice, bob, played_at="2025-10-20T10:00:00Z")
+        play(bob, charlie, played_at="2025-10-21T10:00:00Z")
+        play(alice, charlie, played_at="2025-10-27T10:00:00Z")
+        play(charlie, bob, played_at="2025-10-28T10:00:00Z")
+        return registered_players
+    
+    def as_of(self, client: TestClient, as_of: str):
+        response = client.get("/api/leaderboard", params={"as_of": as_of})
+        assert response.status_code == 200
+        return {row["name"]: row for row in response.json()}
+    
+    def test_counts_week_to_date_matches(self, client: TestClient, history):
+        """Test that only the as_of week's matches played by then are counted."""
+        rows = self.as_of(client, "2025-10-22")
+        assert [(rows[name]["rank"], rows[name]["wins"], rows[name]["losses"]) for name in ("Alice", "Bob", "Charlie")] == [
+            (1, 1, 0), (1, 1, 1), (3, 0, 1)
+        ]
+        
+        # A new week starts from zero
+        rows = self.as_of(client, "2025-10-27T12:00:00Z")
+        assert rows["Alice"]["points"] == 3
+        assert rows["Bob"]["wins"] == rows["Bob"]["losses"] == 0
+        assert rows["Charlie"]["losses"] == 1
+    
+    def test_ratings_carry_across_weeks(self, client: TestClient, history):
+        """Test that ratings as of now match the players' current ratings."""
+        rows = self.as_of(client, "2030-01-01")
+        for name, player in history.items():
+            current = client.get(f"/api/players/{player['id']}").json()["rating"]
+            assert rows[name.capitalize()]["rating"] == pytest.approx(current)
+        assert all(row["wins"] == row["losses"] == 0 for row in rows.values())
+    
+    def test_date_means_end_of_day(self, client: TestClient, history):
+        """Test that a date-only as_of counts every match played that day."""
+        rows = self.as_of(client, "2025-10-21")
+        assert rows["Charlie"]["losses"] == 1
+    
+    def test_offset_is_converted_to_utc(self, client: TestClient, history):
+        """Test that as_of offsets are applied before comparing with played_at."""
+        # 10:00Z, when Bob beat Charlie
+        assert self.as_of(client, "2025-10-21T12:00:00+02:00")["Bob"]["wins"] == 1
+        assert self.as_of(client, "2025-10-21T11:59:59+02:00")["Bob"]["wins"] == 0
+    
+    @pytest.mark.parametrize("page_size", [1, 2])
+    def test_pages_match_the_full_leaderboard(self, client: TestClient, history, monkeypatch, page_size):
+        """Test that pages split across scored and tied players agree with one full page."""
+        # One id per IN list, as a week with more active players than the chunk size would use
+        monkeypatch.setattr(stats_checkpoints, "IN_CLAUSE_CHUNK_SIZE", 1)
+        for name in ("Dana", "Erin", "Frank"):
+            client.post("/api/auth/register", json={"name": name, "email": f"{name.lower()}@example.com"})
+        with Session(test_engine) as session:
+            publish_rules(session, ScoringRules(loss_points=-1))
+            session.commit()
+        
+        full = client.get("/api/leaderboard?as_of=2025-10-22&limit=10").json()
+        assert [row["rank"] for row in full] == [1, 2, 3, 3, 3, 6]
+        assert full[-1]["name"] == "Charlie"
+        pages = [
+            client.get(f"/api/leaderboard?as_of=2025-10-22&limit={page_size}&offset={offset}").json()
+            for offset in range(0, 6, page_size)
+        ]
+        assert [row for page in pages for row in page] == full
+    
+    def test_reads_do_not_write_checkpoints(self, client: TestClient, history, monkeypatch):
+        """Test that an as_of query leaves checkpoints to build_checkpoints."""
+        monkeypatch.setattr(stats_checkpoints, "CHECKPOINT_INTERVAL", 1)
+        self.as_of(client, "2030-01-01")
+        with Session(test_engine) as session:
+            assert session.exec(select(StatsCheckpoint)).first() is None
+    
+    def test_checkpoints_give_the_same_answer(self, client: TestClient, history, monkeypatch):
+        """Test that replaying from checkpoints matches a replay from the start."""
+        from_start = self.as_of(client, "2025-10-27T12:00:00Z")
+        monkeypatch.setattr(stats_checkpoints, "CHECKPOINT_INTERVAL", 1)
+        with Session(test_engine) as session:
+            assert stats_checkpoints.build_checkpoints(session) == 4
+            assert stats_checkpoints.build_checkpoints(session) == 0
+        
+        assert self.as_of(client, "2025-10-27T12:00:00Z") == from_start
+    
+    def test_backdated_match_invalidates_later_checkpoints(self, client: TestClient, history, monkeypatch, play):
+        """Test that recording an earlier match drops checkpoints that miss it."""
+        monkeypatch.setattr(stats_checkpoints, "CHECKPOINT_INTERVAL", 1)
+        with Session(test_engine) as session:
+            stats_checkpoints.build_checkpoints(session)
+        
+        play(history["charlie"], history["alice"], played_at="2025-10-22T10:00:00Z")
+        with Session(test_engine) as session:
+            remaining = session.exec(select(StatsCheckpoint.played_at)).all()
+        assert sorted(remaining) == ["2025-10-20T10:00:00Z", "2025-10-21T10:00:00Z"]
+        assert self.as_of(client, "2025-10-22T12:00:00Z")["Charlie"]["wins"] == 1
+    
+    def test_build_discards_checkpoints_missing_a_new_match(self, client: TestClient, history, monkeypatch):
+        """Test that a backdated match recorded mid-build leaves no checkpoint after it."""
+        monkeypatch.setattr(stats_checkpoints, "CHECKPOINT_INTERVAL", 1)
+        
+        def record_backdated_match(session, flush_context, instances):
+            # Stands in for a POST committed after the build read the matches
+            with Session(test_engine) as other:
+                other.add(Match(
+                    played_at="2025-10-20T12:00:00Z", home_id=history["bob"]["id"],
+                    away_id=history["alice"]["id"], winner_id=history["bob"]["id"],
+                    home_games_won=1, away_games_won=0, point_differential=2,
+                ))
+                other.commit()
+        
+        with Session(test_engine) as session:
+            event.listen(session, "before_flush", record_backdated_match, once=True)
+            assert stats_checkpoints.build_checkpoints(session) == 0
+            assert session.exec(select(StatsCheckpoint)).first() is None
+            
+            assert stats_checkpoints.build_checkpoints(session) == 5
+    
+    def test_invalid_as_of(self, client: TestClient):
+        """Test that a value that is not an ISO date is rejected."""
+        assert client.get("/api/leaderboard?as_of=yesterday").status_code == 422
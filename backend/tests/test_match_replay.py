@@ -0,0 +1,169 @@
+"""
+Tests for the match-log replay.
+
+Tests that replay_matches rebuilds weekly archives and the current week's
+stats from the match and gamescore tables, streaming them in chunks.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import weekly_reset
+from app.db import ArchiveWeek, Player, PlayerWeekStats, StatsCheckpoint, StatsEpoch, WeeklyArchive, parse_week
+from app.match_replay import rank_players, replay_matches
+from app.test_config import test_engine
+from app.weekly_reset import get_week_boundaries, perform_weekly_reset
+
+
+@pytest.fixture
+def history(client: TestClient, registered_players, play):
+    """Two matches in each of two past weeks and one this week."""
+    alice = registered_players["alice"]
+    bob = registered_players["bob"]
+    charlie = registered_players["charlie"]
+    play(alice, bob, played_at="2025-10-20T10:00:00Z")
+    play(bob, charlie, played_at="2025-10-21T10:00:00Z")
+    play(charlie, alice, played_at="2025-10-27T10:00:00Z")
+    play(charlie, bob, played_at="2025-10-28T10:00:00Z")
+    play(bob, alice, played_at=datetime.now().isoformat())
+    return registered_players
+
+
+class TestRankPlayers:
+    """Test the ranking used for replayed weeks."""
+    
+    def test_ties_share_rank(self):
+        """Test that players tied on points and wins share a rank, as RANK() does."""
+        ranked = rank_players([(3, 1, 0, 3), (1, 1, 1, 3), (2, 0, 1, 0), (4, 2, 0, 6)])
+        assert [(rank, player_id) for rank, player_id, *_ in ranked] == [(1, 4), (2, 1), (2, 3), (4, 2)]
+
+
+class TestReplayMatches:
+    """Test rebuilding archives and stats with replay_matches."""
+    
+    def test_archives_past_weeks(self, client: TestClient, history):
+        """Test that each past week with matches is archived with ranks and a winner."""
+        with Session(test_engine) as session:
+            report = replay_matches(session)
+            weeks = session.exec(select(ArchiveWeek).order_by(ArchiveWeek.week)).all()
+        assert (report.matches, report.archived_weeks) == (5, 2)
+        assert [(week.week_start[:10], week.winner_name, week.total_matches) for week in weeks] == [
+            ("2025-10-19", "Alice", 2), ("2025-10-26", "Charlie", 2)
+        ]
+        
+        response = client.get("/api/archives/weeks/2025-10-19")
+        assert response.status_code == 200
+        assert [(row["player_name"], row["rank"]) for row in response.json()] == [
+            ("Alice", 1), ("Bob", 1), ("Charlie", 3)
+        ]
+    
+    def test_rebuilds_current_stats(self, client: TestClient, history):
+        """Test that drifted current-week stats are recomputed from this week's matches."""
+        with Session(test_engine) as session:
+            for stats in session.exec(select(PlayerWeekStats)).all():
+                stats.points = 99
+            session.commit()
+            replay_matches(session)
+        
+        leaderboard = {row["name"]: row for row in client.get("/api/leaderboard").json()}
+        assert (leaderboard["Bob"]["wins"], leaderboard["Bob"]["points"]) == (1, 3)
+        assert (leaderboard["Alice"]["losses"], leaderboard["Alice"]["points"]) == (1, 0)
+        assert leaderboard["Charlie"]["points"] == 0
+    
+    def test_replaces_stale_archives(self, client: TestClient, history):
+        """Test that archive rows not backed by matches are removed."""
+        with Session(test_engine) as session:
+            replay_matches(session)
+            first = session.exec(select(WeeklyArchive.week, WeeklyArchive.player_id, WeeklyArchive.rank)).all()
+            session.add(WeeklyArchive(week=20_000, player_id=history["alice"]["id"], player_name="Alice", rank=1))
+            session.commit()
+            replay_matches(session)
+            second = session.exec(select(WeeklyArchive.week, WeeklyArchive.player_id, WeeklyArchive.rank)).all()
+        assert sorted(second) == sorted(first)
+    
+    def test_chunk_size_does_not_change_result(self, client: TestClient, history):
+        """Test that streaming one match per query gives the same archives."""
+        with Session(test_engine) as session:
+            replay_matches(session)
+            whole = session.exec(select(WeeklyArchive.week, WeeklyArchive.player_id, WeeklyArchive.rank)).all()
+            assert replay_matches(session, chunk_size=1).matches == 5
+            chunked = session.exec(select(WeeklyArchive.week, WeeklyArchive.player_id, WeeklyArchive.rank)).all()
+        assert sorted(chunked) == sorted(whole)
+    
+    def test_later_players_are_not_archived(self, client: TestClient, history):
+        """Test that a player registered after a week is left out of its replayed archive."""
+        client.post("/api/auth/register", json={"name": "Dana", "email": "dana@example.com"})
+        with Session(test_engine) as session:
+            replay_matches(session)
+            header = session.get(ArchiveWeek, parse_week("2025-10-19"))
+            assert header.total_players == 3
+        
+        rows = client.get("/api/archives/weeks/2025-10-19").json()
+        assert "Dana" not in [row["player_name"] for row in rows]
+    
+    def test_keeps_archived_players(self, client: TestClient, history):
+        """Test that players a week was archived with stay in it, under the archived names."""
+        week = parse_week("2025-10-19")
+        client.post("/api/auth/register", json={"name": "Dana", "email": "dana@example.com"})
+        with Session(test_engine) as session:
+            dana = session.exec(select(Player).where(Player.name == "Dana")).one()
+            session.add(WeeklyArchive(week=week, player_id=dana.id, player_name="Dana Old", rank=4))
+            session.add(WeeklyArchive(week=week, player_id=history["alice"]["id"], player_name="Alicia", rank=1))
+            session.commit()
+            replay_matches(session)
+            header = session.get(ArchiveWeek, week)
+            assert (header.total_players, header.winner_name) == (4, "Alicia")
+        
+        rows = client.get("/api/archives/weeks/2025-10-19").json()
+        assert [(row["player_name"], row["rank"], row["points"]) for row in rows] == [
+            ("Alicia", 1, 3), ("Bob", 1, 3), ("Charlie", 3, 0), ("Dana Old", 3, 0)
+        ]
+    
+    def test_clears_checkpoints(self, client: TestClient, history):
+        """Test that rewritten standings drop stats checkpoints built from the old ones."""
+        with Session(test_engine) as session:
+            session.add(StatsCheckpoint(match_id=1, played_at="2025-10-20T10:00:00Z", week=0, players=b""))
+            session.commit()
+            replay_matches(session)
+            assert session.exec(select(StatsCheckpoint)).first() is None
+    
+    @pytest.mark.parametrize("earlier_resets", [0, 1])
+    def test_files_weeks_as_the_weekly_reset_does(
+        self, client: TestClient, registered_players, play, monkeypatch, earlier_resets
+    ):
+        """Test that replaying after a Sunday reset keeps the week it archived."""
+        last_week = get_week_boundaries()[0] - timedelta(days=7)
+        with Session(test_engine) as session:
+            if earlier_resets:
+                # The reset that opened last week's epoch
+                session.add(StatsEpoch(epoch=1, started_at=last_week.isoformat()))
+                session.commit()
+        play(registered_players["alice"], registered_players["bob"], played_at=(last_week + timedelta(days=2)).isoformat())
+        
+        monkeypatch.setattr(weekly_reset, "engine", test_engine)
+        perform_weekly_reset()
+        with Session(test_engine) as session:
+            archived = session.exec(select(ArchiveWeek.week, ArchiveWeek.total_matches)).all()
+            replay_matches(session)
+            replayed = session.exec(select(ArchiveWeek.week, ArchiveWeek.total_matches)).all()
+        assert archived == [(parse_week(last_week.isoformat()), 1)]
+        assert replayed == archived
+    
+    def test_skips_missing_players(self, client: TestClient, history):
+        """Test that a match whose player row is gone still counts for the opponent."""
+        with Session(test_engine) as session:
+            session.delete(session.get(Player, history["bob"]["id"]))
+            session.commit()
+            report = replay_matches(session)
+            header = session.get(ArchiveWeek, parse_week("2025-10-19"))
+            assert (report.matches, report.archived_weeks) == (5, 2)
+            assert (header.winner_name, header.total_players) == ("Alice", 2)
+            current = session.exec(select(PlayerWeekStats.player_id)).all()
+            assert history["bob"]["id"] not in current
+        
+        rows = client.get("/api/archives/weeks/2025-10-19").json()
+        assert [(row["player_name"], row["wins"], row["losses"]) for row in rows] == [
+            ("Alice", 1, 0), ("Charlie", 0, 1)
+        ]
@@ -57,6 +57,96 @@ class TestListMatches:
         assert matches[1]["played_at"] == "2025-10-26T10:00:00Z"
 
 
+class TestListMatchesQueryCount:
+    """Test that GET /api/matches does not issue one query per match."""
+    
+    def _play(self, play, registered_players, count: int):
+        for i in range(count):
+            play(
+                registered_players["alice"], registered_players["bob"],
+                games=[(11, 9), (11, 7)], played_at=f"2025-10-27T14:{i:02d}:00Z",
+            )
+    
+    def test_statement_count_independent_of_match_count(
+        self, client: TestClient, registered_players, count_queries, play
+    ):
+        """Test that listing 1 or 10 matches issues the same number of statements."""
+        self._play(play, registered_players, 1)
+        with count_queries() as few:
+            response = client.get("/api/matches")
+        assert len(response.json()) == 1
+        
+        self._play(play, registered_players, 9)
+        with count_queries() as many:
+            response = client.get("/api/matches")
+        assert len(response.json()) == 10
+        
+        assert len(many) == len(few)
+    
+    def test_games_grouped_by_match(self, client: TestClient, registered_players, play):
+        """Test that batched loading attaches each game to the right match."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        play(alice, bob, games=[(11, 1), (11, 2), (3, 11)], played_at="2025-10-26T10:00:00Z")
+        play(bob, alice, games=[(4, 11)], played_at="2025-10-27T10:00:00Z")
+        
+        matches = client.get("/api/matches").json()
+        assert matches[0]["games"] == [{"home": 4, "away": 11}]
+        assert matches[1]["games"] == [
+            {"home": 11, "away": 1},
+            {"home": 11, "away": 2},
+            {"home": 3, "away": 11},
+        ]
+
+
+class TestListMatchesPagination:
+    """Test limit and before_id keyset pagination on GET /api/matches."""
+    
+    def _play(self, play, registered_players, count: int):
+        return [
+            play(registered_players["alice"], registered_players["bob"], played_at=f"2025-10-27T14:{i:02d}:00Z")["id"]
+            for i in range(count)
+        ]
+    
+    def test_limit_returns_most_recent(self, client: TestClient, registered_players, play):
+        """Test that limit returns the newest matches and a next cursor."""
+        ids = self._play(play, registered_players, 5)
+        
+        response = client.get("/api/matches?limit=2")
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()] == [ids[4], ids[3]]
+        assert response.headers["X-Next-Cursor"] == str(ids[3])
+    
+    def test_walk_all_pages(self, client: TestClient, registered_players, play):
+        """Test that following cursors visits every match exactly once."""
+        ids = self._play(play, registered_players, 5)
+        
+        seen = []
+        url = "/api/matches?limit=2"
+        while True:
+            response = client.get(url)
+            seen.extend(m["id"] for m in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            url = f"/api/matches?limit=2&before_id={cursor}"
+        
+        assert seen == list(reversed(ids))
+    
+    def test_no_cursor_on_exact_last_page(self, client: TestClient, registered_players, play):
+        """Test that no cursor is returned when the page holds the final rows."""
+        self._play(play, registered_players, 2)
+        
+        response = client.get("/api/matches?limit=2")
+        assert len(response.json()) == 2
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_invalid_limit(self, client: TestClient):
+        """Test that out-of-range limits are rejected."""
+        assert client.get("/api/matches?limit=0").status_code == 422
+        assert client.get("/api/matches?limit=100000").status_code == 422
+
+
 class TestCreateMatch:
     """Test POST /api/matches endpoint."""
     
@@ -352,3 +442,127 @@ class TestMatchPersistence:
         assert matches[0]["home_id"] == alice.id
         assert matches[0]["away_id"] == bob.id
 
+
+
+class TestBulkCreateMatches:
+    """Test POST /api/matches/bulk endpoint."""
+    
+    def test_bulk_create_and_aggregate_stats(self, client: TestClient, registered_players):
+        """Test that bulk upload stores all matches and aggregates stats per player."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        
+        payload = [
+            {
+                "played_at": "2025-10-27T10:00:00Z",
+                "home_id": alice["id"],
+                "away_id": bob["id"],
+                "games": [{"home": 11, "away": 9}, {"home": 11, "away": 7}]
+            },
+            {
+                "played_at": "2025-10-27T11:00:00Z",
+                "home_id": charlie["id"],
+                "away_id": alice["id"],
+                "games": [{"home": 11, "away": 9}]
+            },
+            {
+                "played_at": "2025-10-27T12:00:00Z",
+                "home_id": alice["id"],
+                "away_id": charlie["id"],
+                "games": [{"home": 11, "away": 9}, {"home": 5, "away": 11}, {"home": 11, "away": 3}]
+            },
+        ]
+        
+        response = client.post("/api/matches/bulk", json=payload, headers=alice["headers"])
+        assert response.status_code == 201
+        
+        created = response.json()
+        assert len(created) == 3
+        assert [m["played_at"] for m in created] == [p["played_at"] for p in payload]
+        assert len(created[2]["games"]) == 3
+        
+        listed = {m["id"]: m for m in client.get("/api/matches").json()}
+        for match in created:
+            assert listed[match["id"]] == match
+        
+        # The outcome is stored with each match
+        outcome_keys = ("winner_id", "home_games_won", "away_games_won", "point_differential")
+        assert {key: created[2][key] for key in outcome_keys} == {
+            "winner_id": alice["id"], "home_games_won": 2, "away_games_won": 1, "point_differential": 4
+        }
+        assert created[1]["winner_id"] == charlie["id"]
+        
+        players = {p["id"]: p for p in client.get("/api/players").json()}
+        assert (players[alice["id"]]["wins"], players[alice["id"]]["losses"]) == (2, 1)
+        assert players[alice["id"]]["points"] == 6
+        assert (players[bob["id"]]["wins"], players[bob["id"]]["losses"]) == (0, 1)
+        assert (players[charlie["id"]]["wins"], players[charlie["id"]]["losses"]) == (1, 1)
+        assert players[charlie["id"]]["points"] == 3
+    
+    def test_bulk_reports_errors_per_item_and_writes_nothing(
+        self, client: TestClient, registered_players
+    ):
+        """Test that one invalid item rejects the whole batch with indexed errors."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        
+        payload = [
+            {
+                "played_at": "2025-10-27T10:00:00Z",
+                "home_id": alice["id"],
+                "away_id": bob["id"],
+                "games": [{"home": 11, "away": 9}]
+            },
+            {
+                "played_at": "2025-10-27T11:00:00Z",
+                "home_id": alice["id"],
+                "away_id": bob["id"],
+                "games": [{"home": 11, "away": 9}, {"home": 9, "away": 11}]
+            },
+        ]
+        
+        response = client.post("/api/matches/bulk", json=payload, headers=alice["headers"])
+        assert response.status_code == 422
+        
+        detail = response.json()["detail"]
+        assert [e["index"] for e in detail] == [1]
+        assert "winner" in detail[0]["errors"][0].lower()
+        
+        assert client.get("/api/matches").json() == []
+    
+    def test_bulk_rejects_unknown_players_and_other_players_matches(
+        self, client: TestClient, registered_players
+    ):
+        """Test that existence and participation checks are reported per item."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        
+        payload = [
+            {
+                "played_at": "2025-10-27T10:00:00Z",
+                "home_id": alice["id"],
+                "away_id": 9999,
+                "games": [{"home": 11, "away": 9}]
+            },
+            {
+                "played_at": "2025-10-27T11:00:00Z",
+                "home_id": bob["id"],
+                "away_id": charlie["id"],
+                "games": [{"home": 11, "away": 9}]
+            },
+        ]
+        
+        response = client.post("/api/matches/bulk", json=payload, headers=alice["headers"])
+        assert response.status_code == 422
+        
+        detail = response.json()["detail"]
+        assert [e["index"] for e in detail] == [0, 1]
+        assert "existing players" in detail[0]["errors"][0].lower()
+        assert "one of the players" in detail[1]["errors"][0].lower()
+    
+    def test_bulk_requires_authentication(self, client: TestClient):
+        """Test that bulk upload without a token is rejected."""
+        response = client.post("/api/matches/bulk", json=[])
+        assert response.status_code == 403
@@ -0,0 +1,352 @@
+"""
+Performance tests for hot write and read paths, and archive storage size.
+
+Run only these with: pytest -m slow -s
+Latency figures are printed rather than asserted, since absolute timings
+depend on the machine; structural properties (commit counts) are asserted.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, ForeignKey, Index, Integer, MetaData, String, Table, event, insert, text
+from sqlmodel import Session
+
+from app.db import (
+    INITIAL_RATING, ArchiveWeek, GameScore, Match, Player, PlayerWeekStats, WeeklyArchive,
+    match_outcome, week_bounds,
+)
+from app.match_replay import replay_matches
+from app.ratings import replay_ratings
+from app.scoring import recompute_scores
+from app.test_config import test_engine
+from app.weekly_reset import reset_player_stats
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile (0-100) of samples using nearest rank."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def match_payload(home_id, away_id, minute=0):
+    return {
+        "played_at": f"2025-10-27T14:{minute % 60:02d}:00Z",
+        "home_id": home_id,
+        "away_id": away_id,
+        "games": [{"home": 11, "away": 9}, {"home": 7, "away": 11}, {"home": 11, "away": 5}]
+    }
+
+
+class TestCreateMatchWritePath:
+    """Test that POST /api/matches writes everything in one transaction."""
+    
+    def test_create_match_commits_once(self, client: TestClient, registered_players):
+        """Test that a match, its games and stat updates share a single commit."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        
+        commits = []
+        listener = lambda conn: commits.append(conn)
+        event.listen(test_engine, "commit", listener)
+        try:
+            response = client.post(
+                "/api/matches", json=match_payload(alice["id"], bob["id"]), headers=alice["headers"]
+            )
+        finally:
+            event.remove(test_engine, "commit", listener)
+        
+        assert response.status_code == 201
+        assert len(commits) == 1
+    
+    @pytest.mark.slow
+    def test_create_match_latency_under_concurrent_load(self, client: TestClient, registered_players):
+        """Report p50/p99 latency for POST /api/matches from several concurrent writers."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        workers = 8
+        requests_per_worker = 25
+        
+        def post_matches(worker):
+            latencies = []
+            for i in range(requests_per_worker):
+                start = time.perf_counter()
+                response = client.post(
+                    "/api/matches",
+                    json=match_payload(alice["id"], bob["id"], minute=i),
+                    headers=alice["headers"],
+                )
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 201
+            return latencies
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = [l for batch in pool.map(post_matches, range(workers)) for l in batch]
+        
+        total = workers * requests_per_worker
+        print(
+            f"\nPOST /api/matches x{total} ({workers} writers): "
+            f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+            f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+            f"mean={statistics.mean(latencies) * 1000:.1f}ms"
+        )
+        
+        listed = client.get(f"/api/matches?limit={total}").json()
+        assert len(listed) == total
+
+
+class TestConcurrentStatUpdates:
+    """Stress test that concurrent match posts never lose stat updates."""
+    
+    @pytest.mark.slow
+    def test_totals_consistent_after_concurrent_posts(self, client: TestClient, registered_players):
+        """Post thousands of matches from many threads and verify every player's totals."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        workers = 8
+        requests_per_worker = 250
+        
+        # Each writer alternates opponents and winners so rows for the same
+        # player are contended by every thread
+        pairings = [
+            (alice, bob, [{"home": 11, "away": 9}]),
+            (bob, alice, [{"home": 11, "away": 9}]),
+            (charlie, alice, [{"home": 5, "away": 11}]),
+            (bob, charlie, [{"home": 8, "away": 11}, {"home": 11, "away": 3}, {"home": 9, "away": 11}]),
+        ]
+        
+        def post_matches(worker):
+            for i in range(requests_per_worker):
+                home, away, games = pairings[(worker + i) % len(pairings)]
+                response = client.post("/api/matches", json={
+                    "played_at": "2025-10-27T14:30:00Z",
+                    "home_id": home["id"],
+                    "away_id": away["id"],
+                    "games": games,
+                }, headers=home["headers"])
+                assert response.status_code == 201
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(post_matches, range(workers)))
+        
+        # Recompute expected totals from the match log itself
+        expected = {p["id"]: {"wins": 0, "losses": 0} for p in registered_players.values()}
+        matches = []
+        cursor = None
+        while True:
+            url = "/api/matches?limit=200" + (f"&before_id={cursor}" if cursor else "")
+            response = client.get(url)
+            matches.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        assert len(matches) == workers * requests_per_worker
+        
+        for match in matches:
+            home_games = sum(1 for g in match["games"] if g["home"] > g["away"])
+            home_won = home_games * 2 > len(match["games"])
+            winner, loser = (
+                (match["home_id"], match["away_id"]) if home_won
+                else (match["away_id"], match["home_id"])
+            )
+            expected[winner]["wins"] += 1
+            expected[loser]["losses"] += 1
+        
+        players = {p["id"]: p for p in client.get("/api/players").json()}
+        for player_id, totals in expected.items():
+            assert players[player_id]["wins"] == totals["wins"]
+            assert players[player_id]["losses"] == totals["losses"]
+            assert players[player_id]["points"] == totals["wins"] * 3
+
+
+class TestResetBenchmark:
+    """Benchmark the weekly stat reset at increasing league sizes."""
+    
+    @pytest.mark.slow
+    @pytest.mark.parametrize("players", [1_000, 10_000, 100_000])
+    def test_reset_duration(self, client: TestClient, players):
+        """Report reset_player_stats duration for a league of the given size."""
+        with Session(test_engine) as session:
+            player_ids = session.exec(
+                insert(Player).returning(Player.id, sort_by_parameter_order=True),
+                params=[
+                    {"name": f"Player {i}", "email": f"player{i}@example.com"}
+                    for i in range(players)
+                ],
+            ).scalars().all()
+            session.exec(insert(PlayerWeekStats), params=[
+                {"epoch": 0, "player_id": player_id,
+                 "wins": i % 7, "losses": i % 5, "points": 3 * (i % 7)}
+                for i, player_id in enumerate(player_ids)
+            ])
+            session.commit()
+            
+            start = time.perf_counter()
+            reset = reset_player_stats(session)
+            elapsed = time.perf_counter() - start
+        
+        print(f"\nreset_player_stats x{players} players: {elapsed * 1000:.1f}ms")
+        assert reset == players
+
+
+# WeeklyArchive as it was stored before the header/result split: the week's
+# boundaries, winner and the player's name repeated on every row
+legacy_metadata = MetaData()
+legacy_weekly_archive = Table(
+    "legacyweeklyarchive", legacy_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("week_start", String, nullable=False),
+    Column("week_end", String, nullable=False, index=True),
+    Column("winner_id", Integer, ForeignKey(Player.__table__.c.id), nullable=False),
+    Column("player_id", Integer, ForeignKey(Player.__table__.c.id), nullable=False),
+    Column("player_name", String, nullable=False, index=True),
+    Column("wins", Integer, nullable=False),
+    Column("losses", Integer, nullable=False),
+    Column("points", Integer, nullable=False),
+    Column("rank", Integer, nullable=False),
+    Index("ix_legacyweeklyarchive_week_start_rank", "week_start", "rank"),
+    Index("ix_legacyweeklyarchive_player_id_week_start", "player_id", "week_start"),
+)
+
+
+def table_bytes(session: Session, table: str) -> int:
+    """Bytes of database pages used by a table and its indexes (SQLite dbstat)."""
+    return session.exec(text(
+        "SELECT sum(pgsize) FROM dbstat WHERE name IN "
+        "(SELECT name FROM sqlite_master WHERE tbl_name = :table)"
+    ), params={"table": table}).scalar()
+
+
+class TestArchiveStorageBenchmark:
+    """Compare archive storage for the normalized layout against the old wide rows."""
+    
+    @pytest.mark.slow
+    @pytest.mark.parametrize("years", [1, 5])
+    def test_archive_storage_size(self, client: TestClient, years):
+        """Report archive bytes per week for both layouts over several simulated years."""
+        players = 50
+        weeks = range(20_000, 20_000 + 52 * years)
+        legacy_metadata.create_all(test_engine)
+        try:
+            with Session(test_engine) as session:
+                player_ids = session.exec(
+                    insert(Player).returning(Player.id, sort_by_parameter_order=True),
+                    params=[
+                        {"name": f"Player {i}", "email": f"player{i}@example.com"}
+                        for i in range(players)
+                    ],
+                ).scalars().all()
+                # Same simulated results in both layouts
+                results = [
+                    {"week": week, "player_id": player_id, "player_name": f"Player {rank}", "wins": (week + rank) % 9,
+                     "losses": rank % 7, "points": 3 * ((week + rank) % 9), "rank": rank + 1}
+                    for week in weeks
+                    for rank, player_id in enumerate(player_ids)
+                ]
+                session.exec(insert(ArchiveWeek), params=[
+                    {"week": week, "winner_id": player_ids[0], "winner_name": "Player 0",
+                     "total_players": players, "total_matches": 100}
+                    for week in weeks
+                ])
+                session.exec(insert(WeeklyArchive), params=results)
+                session.exec(insert(legacy_weekly_archive), params=[
+                    {
+                        "week_start": week_bounds(row["week"])[0].isoformat(),
+                        "week_end": week_bounds(row["week"])[1].isoformat(),
+                        "winner_id": player_ids[0],
+                        **{key: value for key, value in row.items() if key != "week"},
+                    }
+                    for row in results
+                ])
+                session.commit()
+                
+                normalized = table_bytes(session, "weeklyarchive") + table_bytes(session, "archiveweek")
+                legacy = table_bytes(session, "legacyweeklyarchive")
+        finally:
+            legacy_metadata.drop_all(test_engine)
+        
+        print(
+            f"\narchive storage, {years}y x {players} players: "
+            f"normalized {normalized / 1024:.0f} KiB ({normalized / len(weeks):.0f} B/week), "
+            f"legacy {legacy / 1024:.0f} KiB ({legacy / len(weeks):.0f} B/week), "
+            f"{legacy / normalized:.1f}x"
+        )
+        assert normalized < legacy
+
+
+class TestRatingReplayBenchmark:
+    """Benchmark the full-history Elo replay."""
+    
+    @pytest.mark.slow
+    @pytest.mark.parametrize("players", [10, 1_000])
+    def test_replay_one_million_matches(self, players):
+        """Report replay_ratings duration for 1M random matches."""
+        matches = 1_000_000
+        rng = np.random.default_rng(42)
+        home = rng.integers(0, players, matches)
+        away = (home + rng.integers(1, players, matches)) % players
+        home_won = rng.random(matches) < 0.5
+        
+        start = time.perf_counter()
+        ratings = replay_ratings(home, away, home_won, players)
+        elapsed = time.perf_counter() - start
+        
+        print(f"\nreplay_ratings x{matches} matches, {players} players: {elapsed:.2f}s")
+        # Elo only moves points between players
+        assert ratings.mean() == pytest.approx(INITIAL_RATING)
+
+
+class TestMatchReplayBenchmark:
+    """Benchmark rebuilding stats and archives from the match log."""
+    
+    @pytest.mark.slow
+    @pytest.mark.parametrize("matches", [10_000, 100_000])
+    def test_replay_throughput(self, client: TestClient, matches):
+        """Report replay_matches and recompute_scores throughput for a history of the given length."""
+        players = 100
+        rng = np.random.default_rng(42)
+        home = rng.integers(0, players, matches)
+        away = (home + rng.integers(1, players, matches)) % players
+        # About 500 matches a week, starting on a Sunday
+        offsets = np.sort(rng.integers(0, matches * 1200, matches))
+        with Session(test_engine) as session:
+            player_ids = session.exec(
+                insert(Player).returning(Player.id, sort_by_parameter_order=True),
+                params=[
+                    {"name": f"Player {i}", "email": f"player{i}@example.com"}
+                    for i in range(players)
+                ],
+            ).scalars().all()
+            start = week_bounds(20_000)[0]
+            # One game per match; every third one is won by the away player
+            games = [GameScore(home=11, away=9 if i % 3 else 13) for i in range(matches)]
+            match_ids = session.exec(
+                insert(Match).returning(Match.id, sort_by_parameter_order=True),
+                params=[
+                    {"played_at": (start + timedelta(seconds=int(offset))).isoformat(),
+                     "home_id": player_ids[h], "away_id": player_ids[a],
+                     **match_outcome(player_ids[h], player_ids[a], [game])}
+                    for offset, h, a, game in zip(offsets.tolist(), home.tolist(), away.tolist(), games)
+                ],
+            ).scalars().all()
+            session.exec(insert(GameScore), params=[
+                {"match_id": match_id, "home": game.home, "away": game.away}
+                for match_id, game in zip(match_ids, games)
+            ])
+            session.commit()
+            
+            report = replay_matches(session)
+            vectorized = recompute_scores(session)
+        
+        print(
+            f"\nreplay_matches x{matches} matches, {report.archived_weeks} weeks: "
+            f"{report.seconds:.2f}s ({report.matches_per_second:,.0f} matches/s), "
+            f"recompute_scores: {vectorized.seconds:.2f}s ({vectorized.matches_per_second:,.0f} matches/s)"
+        )
+        assert report.matches == vectorized.matches == matches
@@ -65,6 +65,77 @@ class TestListPlayers:
         assert response.json() == []
 
 
+class TestListPlayersPagination:
+    """Test SQL-side ordering, cursor pagination and ids= lookup on GET /api/players."""
+    
+    @pytest.fixture
+    def roster(self, client: TestClient):
+        ids = {}
+        for name in ["bob", "Alice", "dave", "Charlie", "Eve"]:
+            response = client.post("/api/auth/register", json={
+                "name": name,
+                "email": f"{name.lower()}@example.com"
+            })
+            ids[name] = response.json()["player"]["id"]
+        return ids
+    
+    def test_ordered_case_insensitively(self, client: TestClient, roster):
+        """Test that names sort ignoring case."""
+        names = [p["name"] for p in client.get("/api/players").json()]
+        assert names == ["Alice", "bob", "Charlie", "dave", "Eve"]
+    
+    def test_cursor_walks_every_page(self, client: TestClient, roster):
+        """Test that following X-Next-Cursor returns each player exactly once."""
+        response = client.get("/api/players?limit=2")
+        names = [p["name"] for p in response.json()]
+        while "X-Next-Cursor" in response.headers:
+            response = client.get(f"/api/players?limit=2&cursor={response.headers['X-Next-Cursor']}")
+            assert response.status_code == 200
+            names += [p["name"] for p in response.json()]
+        
+        assert names == ["Alice", "bob", "Charlie", "dave", "Eve"]
+    
+    def test_cursor_with_non_ascii_names(self, client: TestClient):
+        """Test that cursors follow SQL's lower(), which leaves non-ASCII letters as they are."""
+        for name, email in [("Zed", "zed@example.com"), ("Élodie", "elodie@example.com"), ("Émile", "emile@example.com")]:
+            client.post("/api/auth/register", json={"name": name, "email": email})
+        
+        response = client.get("/api/players?limit=1")
+        names = [p["name"] for p in response.json()]
+        while "X-Next-Cursor" in response.headers:
+            response = client.get(f"/api/players?limit=1&cursor={response.headers['X-Next-Cursor']}")
+            names += [p["name"] for p in response.json()]
+        
+        assert names == [p["name"] for p in client.get("/api/players").json()]
+        assert sorted(names) == ["Zed", "Élodie", "Émile"]
+    
+    def test_last_page_has_no_cursor(self, client: TestClient, roster):
+        """Test that the header is omitted when no players remain."""
+        response = client.get("/api/players?limit=5")
+        assert len(response.json()) == 5
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_invalid_cursor(self, client: TestClient, roster):
+        """Test that a malformed cursor is rejected."""
+        assert client.get("/api/players?cursor=not-a-cursor").status_code == 400
+    
+    def test_limit_bounds(self, client: TestClient):
+        """Test that limit must be between 1 and 200."""
+        assert client.get("/api/players?limit=0").status_code == 422
+        assert client.get("/api/players?limit=201").status_code == 422
+    
+    def test_ids_batch_lookup(self, client: TestClient, roster):
+        """Test fetching specific players by id in one request."""
+        response = client.get(f"/api/players?ids={roster['Eve']}&ids={roster['bob']}&ids=9999")
+        assert response.status_code == 200
+        assert [p["name"] for p in response.json()] == ["bob", "Eve"]
+    
+    def test_ids_combined_with_query(self, client: TestClient, roster):
+        """Test that ids and q filter together."""
+        response = client.get(f"/api/players?ids={roster['Eve']}&ids={roster['dave']}&q=ev")
+        assert [p["name"] for p in response.json()] == ["Eve"]
+
+
 class TestCreatePlayer:
     """Test POST /api/players endpoint."""
     
@@ -166,3 +237,134 @@ class TestPlayerPersistence:
         assert players[0]["id"] == created_id
         assert players[0]["name"] == "Test Player"
 
+
+
+class TestPlayerRank:
+    """Test GET /api/players/{id}/rank endpoint."""
+    
+    def test_rank_with_neighbours(self, client: TestClient, registered_players, play):
+        """Test rank, percentile and neighbours for the middle player."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        play(alice, bob)
+        play(alice, charlie)
+        play(bob, charlie)
+        
+        response = client.get(f"/api/players/{bob['id']}/rank")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["player"]["rank"] == 2
+        assert data["player"]["points"] == 3
+        assert data["above"]["player_id"] == alice["id"]
+        assert data["below"]["player_id"] == charlie["id"]
+        assert data["total_players"] == 3
+        assert data["percentile"] == 50.0
+    
+    def test_rank_at_edges(self, client: TestClient, registered_players, play):
+        """Test that the first and last players have no neighbour beyond the edge."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        play(alice, bob)
+        play(bob, charlie)
+        play(alice, charlie)
+        
+        top = client.get(f"/api/players/{alice['id']}/rank").json()
+        assert top["above"] is None
+        assert top["percentile"] == 100.0
+        
+        bottom = client.get(f"/api/players/{charlie['id']}/rank").json()
+        assert bottom["below"] is None
+        assert bottom["player"]["rank"] == 3
+        assert bottom["percentile"] == 0.0
+    
+    def test_tied_players_share_rank(self, client: TestClient, registered_players):
+        """Test that tied players report the same rank and percentile."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        
+        alice_rank = client.get(f"/api/players/{alice['id']}/rank").json()
+        bob_rank = client.get(f"/api/players/{bob['id']}/rank").json()
+        assert alice_rank["player"]["rank"] == bob_rank["player"]["rank"] == 1
+        assert alice_rank["percentile"] == bob_rank["percentile"] == 0.0
+    
+    def test_rank_unknown_player(self, client: TestClient):
+        """Test that an unknown player id returns 404."""
+        response = client.get("/api/players/9999/rank")
+        assert response.status_code == 404
+
+
+class TestPlayerSearch:
+    """Test GET /api/players/search endpoint."""
+    
+    @pytest.fixture
+    def roster(self, client: TestClient):
+        for name in ["Alice", "Alicia", "Natalia", "Bob", "Robert", "Malik"]:
+            client.post("/api/auth/register", json={
+                "name": name,
+                "email": f"{name.lower()}@example.com"
+            })
+    
+    def _names(self, client: TestClient, query: str):
+        response = client.get(f"/api/players/search?{query}")
+        assert response.status_code == 200
+        return [p["name"] for p in response.json()]
+    
+    def test_prefix_matches_rank_first(self, client: TestClient, roster):
+        """Test that prefix matches come before substring matches."""
+        names = self._names(client, "q=ali")
+        assert names[:2] == ["Alice", "Alicia"]
+        assert set(names[2:]) >= {"Natalia", "Malik"}
+    
+    def test_case_insensitive(self, client: TestClient, roster):
+        """Test that matching ignores case."""
+        assert self._names(client, "q=ROBERT")[0] == "Robert"
+    
+    def test_fuzzy_match_with_typo(self, client: TestClient, roster):
+        """Test that a misspelled query still finds the intended player."""
+        assert self._names(client, "q=robrt")[0] == "Robert"
+    
+    def test_short_query_uses_prefix(self, client: TestClient, roster):
+        """Test that one- and two-letter queries match name prefixes."""
+        assert self._names(client, "q=b") == ["Bob"]
+        assert self._names(client, "q=al") == ["Alice", "Alicia"]
+    
+    def test_non_ascii_prefix(self, client: TestClient, roster):
+        """Test that short non-ASCII queries are folded as SQL's lower() folds names."""
+        for name, email in [("Émile", "emile@example.com"), ("Élodie", "elodie@example.com")]:
+            client.post("/api/auth/register", json={"name": name, "email": email})
+        
+        for q, expected in [("É", ["Élodie", "Émile"]), ("Ém", ["Émile"]), ("\U0010ffff", [])]:
+            response = client.get("/api/players/search", params={"q": q})
+            assert response.status_code == 200
+            assert [p["name"] for p in response.json()] == expected
+    
+    def test_limit(self, client: TestClient, roster):
+        """Test that limit caps the number of results."""
+        assert len(self._names(client, "q=ali&limit=1")) == 1
+    
+    def test_wildcards_are_literal(self, client: TestClient, roster):
+        """Test that LIKE wildcards in the query are not expanded."""
+        assert self._names(client, "q=%25") == []
+        assert self._names(client, "q=_") == []
+    
+    def test_search_index_follows_renames(self, client: TestClient, roster):
+        """Test that the search index stays in sync with the player table."""
+        from sqlmodel import Session, select
+        from app.test_config import test_engine
+        from app.db import Player
+        
+        with Session(test_engine) as session:
+            bob = session.exec(select(Player).where(Player.name == "Bob")).one()
+            bob.name = "Zebedee"
+            session.add(bob)
+            session.commit()
+        
+        assert self._names(client, "q=zeb") == ["Zebedee"]
+        assert "Bob" not in self._names(client, "q=bob")
+    
+    def test_missing_query(self, client: TestClient):
+        """Test that q is required."""
+        assert client.get("/api/players/search").status_code == 422
@@ -0,0 +1,132 @@
+"""
+Query-plan regression tests.
+
+Exercises every router endpoint, captures the SQL each one issues, and runs
+EXPLAIN QUERY PLAN on it. A statement fails the suite if SQLite would scan a
+whole table to answer it, unless the scan is bounded (rows come back in index
+or rowid order and the statement has a LIMIT) or is listed in ALLOWED_SCANS.
+"""
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.test_config import test_engine
+from app.weekly_reset import archive_current_week, reset_player_stats
+
+
+# Full scans that are intentional, keyed by (table, SQL regex) with the reason
+ALLOWED_SCANS = {
+    ("player", r"FROM player WHERE lower\(player\.name\) LIKE"): "substring search cannot use a b-tree index",
+    ("player", r"ORDER BY stats\.points DESC, stats\.wins DESC, stats\.player_id$"): "leaderboard cache rebuild loads the roster once",
+    ("archiveweek", r"FROM archiveweek ORDER BY archiveweek\.week DESC$"): "weeks list returns one summary row per week",
+}
+
+SCAN_PATTERN = re.compile(r"^SCAN (\w+)")
+VIRTUAL_INDEX_PATTERN = re.compile(r"VIRTUAL TABLE INDEX \d+:\S+")
+
+
+def explain(statement: str, parameters) -> list:
+    """Return the detail column of EXPLAIN QUERY PLAN for a statement."""
+    with test_engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def unbounded_scans(statement: str, plan: list) -> list:
+    """Return tables the plan scans in full, ignoring bounded and allowed scans."""
+    statement = " ".join(statement.split())
+    # Virtual-table (FTS5) scans are index-driven unless the index string
+    # after "INDEX n:" is empty
+    scanned = [
+        SCAN_PATTERN.match(line).group(1) for line in plan
+        if SCAN_PATTERN.match(line) and not VIRTUAL_INDEX_PATTERN.search(line)
+    ]
+    sorts_in_memory = any("USE TEMP B-TREE" in line for line in plan)
+    if scanned and " LIMIT " in statement and not sorts_in_memory:
+        # Walks rows in the requested order and stops after LIMIT rows
+        return []
+    return [
+        table for table in scanned
+        if not any(
+            table == allowed_table and re.search(pattern, statement)
+            for allowed_table, pattern in ALLOWED_SCANS
+        )
+    ]
+
+
+@pytest.fixture
+def captured_statements(client: TestClient, registered_players, count_queries, play):
+    """Drive every router endpoint with realistic data and capture the SQL issued."""
+    alice = registered_players["alice"]
+    bob = registered_players["bob"]
+
+    with count_queries() as statements:
+        client.post("/api/auth/register", json={"name": "Dana", "email": "dana@example.com"})
+        client.post("/api/auth/login", json={"name": "Alice", "email": "alice@example.com"})
+        for i in range(3):
+            play(alice, bob, played_at=f"2025-10-27T14:{i:02d}:00Z")
+        client.post("/api/matches/bulk", json=[{
+            "played_at": "2025-10-27T15:00:00Z",
+            "home_id": bob["id"],
+            "away_id": alice["id"],
+            "games": [{"home": 11, "away": 9}]
+        }], headers=alice["headers"])
+
+        first_page = client.get("/api/matches?limit=2")
+        client.get(f"/api/matches?limit=2&before_id={first_page.headers['X-Next-Cursor']}")
+        players_page = client.get("/api/players?limit=2")
+        client.get(f"/api/players?limit=2&cursor={players_page.headers['X-Next-Cursor']}")
+        client.get("/api/players?q=ali")
+        client.get("/api/players?q=al")
+        client.get(f"/api/players?ids={alice['id']}&ids={bob['id']}")
+        client.get("/api/players/search?q=alce")
+        client.get(f"/api/players/{alice['id']}")
+        client.get("/api/leaderboard?limit=2&offset=1")
+        client.get("/api/leaderboard?as_of=2025-10-27T14:01:00Z&limit=2&offset=1")
+        client.get(f"/api/players/{alice['id']}/rank")
+
+    # Two archived weeks, so player history has a second page
+    for _ in range(2):
+        with Session(test_engine) as session:
+            archive_current_week(session)
+            reset_player_stats(session)
+        play(alice, bob, played_at="2025-10-28T14:00:00Z")
+
+    with count_queries() as archive_statements:
+        weeks = client.get("/api/archives/weeks").json()
+        client.get(f"/api/archives/weeks/{weeks[0]['week_start']}")
+        client.get(f"/api/archives/weeks/batch?week_start={weeks[0]['week_start']}&week_start=2020-01-05")
+        history_page = client.get(f"/api/players/{alice['id']}/history?limit=1")
+        client.get(f"/api/players/{alice['id']}/history?cursor={history_page.headers['X-Next-Cursor']}")
+
+    return statements + archive_statements
+
+
+class TestQueryPlans:
+    """Fail if any router query degrades to a full table scan."""
+
+    def test_no_full_table_scans(self, captured_statements):
+        """Test that every captured SELECT/UPDATE/DELETE is index-backed."""
+        failures = []
+        explained = 0
+        for statement, parameters, executemany in captured_statements:
+            if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            if executemany:
+                parameters = parameters[0]
+            plan = explain(statement, parameters)
+            explained += 1
+            tables = unbounded_scans(statement, plan)
+            if tables:
+                failures.append(f"{statement}\n    plan: {plan}")
+
+        assert explained > 0
+        assert not failures, "Full table scans found:\n" + "\n".join(failures)
+
+    def test_detects_full_scan(self):
+        """Test that the checker flags an unindexed lookup."""
+        statement = "SELECT * FROM gamescore WHERE home = ?"
+        plan = explain(statement, (11,))
+        assert unbounded_scans(statement, plan) == ["gamescore"]
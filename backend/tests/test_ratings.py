@@ -0,0 +1,176 @@
+"""
+Tests for Elo ratings.
+
+Tests the incremental updates made when matches are created, the NumPy
+full-history recompute, and the rating exposed on players.
+"""
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.db import INITIAL_RATING, Player
+from app.ratings import K_FACTOR, expected_score, rating_change, recompute_ratings, replay_ratings
+from app.test_config import test_engine
+from app.weekly_reset import reset_player_stats
+
+
+def rating(client: TestClient, player) -> float:
+    return client.get(f"/api/players/{player['id']}").json()["rating"]
+
+
+class TestRatingMath:
+    """Test the Elo formulas."""
+    
+    def test_equal_ratings_split_k_factor(self):
+        """Test that evenly rated players are expected to draw and swing half of K."""
+        assert expected_score(1500, 1500) == 0.5
+        assert rating_change(1500, 1500) == K_FACTOR / 2
+    
+    def test_upset_gains_more(self):
+        """Test that beating a stronger player is worth more than beating a weaker one."""
+        assert rating_change(1400, 1600) > rating_change(1600, 1400)
+        assert expected_score(1600, 1400) + expected_score(1400, 1600) == pytest.approx(1.0)
+
+
+class TestIncrementalRatings:
+    """Test rating updates on POST /api/matches and /api/matches/bulk."""
+    
+    def test_new_players_start_at_initial_rating(self, client: TestClient, registered_players):
+        """Test that a registered player has the initial rating."""
+        assert rating(client, registered_players["alice"]) == INITIAL_RATING
+    
+    def test_match_moves_both_ratings(self, client: TestClient, registered_players, play):
+        """Test that the winner gains what the loser drops."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        play(alice, bob)
+    
+        assert rating(client, alice) == INITIAL_RATING + K_FACTOR / 2
+        assert rating(client, bob) == INITIAL_RATING - K_FACTOR / 2
+        assert rating(client, registered_players["charlie"]) == INITIAL_RATING
+    
+    def test_bulk_applies_matches_in_played_order(self, client: TestClient, registered_players):
+        """Test that bulk uploads rate each match in played_at order."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        response = client.post("/api/matches/bulk", json=[
+            {"played_at": "2025-10-27T15:00:00Z", "home_id": bob["id"], "away_id": alice["id"],
+             "games": [{"home": 11, "away": 9}]},
+            {"played_at": "2025-10-27T14:00:00Z", "home_id": alice["id"], "away_id": bob["id"],
+             "games": [{"home": 11, "away": 9}]},
+        ], headers=alice["headers"])
+        assert response.status_code == 201
+    
+        # Alice won first (+16), then lost to the lower-rated Bob
+        after_first = INITIAL_RATING + K_FACTOR / 2
+        expected = after_first - rating_change(INITIAL_RATING - K_FACTOR / 2, after_first)
+        assert rating(client, alice) == pytest.approx(expected)
+    
+    def test_backdated_match_is_rated_in_played_order(self, client: TestClient, registered_players, play):
+        """Test that a match posted after later ones leaves ratings as a recompute and as_of give them."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        play(bob, charlie, played_at="2025-10-27T15:00:00Z")
+        play(charlie, alice, played_at="2025-10-27T16:00:00Z")
+        play(alice, bob, played_at="2025-10-27T14:00:00Z")
+        posted = {name: rating(client, player) for name, player in registered_players.items()}
+    
+        as_of = client.get("/api/leaderboard", params={"as_of": "2030-01-01"}).json()
+        for row in as_of:
+            assert posted[row["name"].lower()] == pytest.approx(row["rating"])
+        with Session(test_engine) as session:
+            recompute_ratings(session)
+        for name, player in registered_players.items():
+            assert rating(client, player) == pytest.approx(posted[name])
+    
+    def test_backdated_bulk_is_rated_in_played_order(self, client: TestClient, registered_players, play):
+        """Test that a bulk upload played before recorded matches is rated in played order."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        play(bob, alice, played_at="2025-10-27T16:00:00Z")
+        response = client.post("/api/matches/bulk", json=[
+            {"played_at": "2025-10-27T14:00:00Z", "home_id": alice["id"], "away_id": bob["id"],
+             "games": [{"home": 11, "away": 9}]},
+        ], headers=alice["headers"])
+        assert response.status_code == 201
+    
+        # Alice won first (+16), then lost to the lower-rated Bob
+        after_first = INITIAL_RATING + K_FACTOR / 2
+        expected = after_first - rating_change(INITIAL_RATING - K_FACTOR / 2, after_first)
+        assert rating(client, alice) == pytest.approx(expected)
+    
+    def test_ratings_survive_weekly_reset(self, client: TestClient, registered_players, play):
+        """Test that resetting weekly stats keeps ratings."""
+        alice = registered_players["alice"]
+        play(alice, registered_players["bob"])
+        with Session(test_engine) as session:
+            reset_player_stats(session)
+    
+        player = client.get(f"/api/players/{alice['id']}").json()
+        assert player["points"] == 0
+        assert player["rating"] == INITIAL_RATING + K_FACTOR / 2
+
+
+class TestRecomputeRatings:
+    """Test the NumPy full-history recompute."""
+    
+    def test_recompute_matches_incremental(self, client: TestClient, registered_players, play):
+        """Test that replaying the history reproduces the incrementally updated ratings."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        for minute, (winner, loser) in enumerate([
+            (alice, bob), (bob, charlie), (charlie, alice), (alice, bob), (alice, charlie),
+        ]):
+            play(winner, loser, played_at=f"2025-10-27T14:{minute:02d}:00Z")
+        incremental = {name: rating(client, player) for name, player in registered_players.items()}
+    
+        with Session(test_engine) as session:
+            assert recompute_ratings(session) == 5
+    
+        for name, player in registered_players.items():
+            assert rating(client, player) == pytest.approx(incremental[name])
+    
+    def test_recompute_with_a_deleted_player(self, client: TestClient, registered_players, play):
+        """Test that a match against a player whose row is gone still counts for the opponent."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        play(bob, charlie, played_at="2025-10-27T14:00:00Z")
+        play(alice, bob, played_at="2025-10-27T14:01:00Z")
+        incremental = {name: rating(client, registered_players[name]) for name in ("alice", "charlie")}
+        
+        with Session(test_engine) as session:
+            session.delete(session.get(Player, bob["id"]))
+            session.commit()
+            assert recompute_ratings(session) == 2
+        
+        for name in ("alice", "charlie"):
+            assert rating(client, registered_players[name]) == pytest.approx(incremental[name])
+    
+    def test_recompute_without_matches(self, client: TestClient, registered_players):
+        """Test that a history with no matches resets everyone to the initial rating."""
+        with Session(test_engine) as session:
+            assert recompute_ratings(session) == 0
+        assert rating(client, registered_players["bob"]) == INITIAL_RATING
+    
+    @pytest.mark.parametrize("players", [4, 200])
+    def test_replay_equals_sequential(self, players):
+        """Test that replay (scalar for few players, round-batched for many) equals one match at a time."""
+        rng = random.Random(7)
+        matches = [tuple(rng.sample(range(players), 2)) + (rng.random() < 0.5,) for _ in range(2_000)]
+    
+        sequential = [INITIAL_RATING] * players
+        for home, away, home_won in matches:
+            winner, loser = (home, away) if home_won else (away, home)
+            change = rating_change(sequential[winner], sequential[loser])
+            sequential[winner] += change
+            sequential[loser] -= change
+    
+        home, away, home_won = (np.array(column) for column in zip(*matches))
+        replayed = replay_ratings(home, away, home_won, players)
+        assert replayed.tolist() == pytest.approx(sequential)
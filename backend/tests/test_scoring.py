@@ -0,0 +1,175 @@
+"""
+Tests for versioned scoring rules.
+
+Tests the points awarded under a rule set, that new matches use the rules
+in force, and that recompute_scores re-scores history exactly as the
+match-log replay does.
+"""
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.db import (
+    ArchiveWeek, Player, PlayerWeekStats, ScoringRules, StatsCheckpoint, WeeklyArchive, WIN_POINTS,
+    parse_week, scoring_rules,
+)
+from app.match_replay import replay_matches
+from app.scoring import publish_rules, recompute_scores
+from app.test_config import test_engine
+
+
+def standings(session: Session):
+    """Every archive row, week header and current stats row, for comparisons."""
+    return (
+        sorted(session.exec(select(
+            WeeklyArchive.week, WeeklyArchive.player_id, WeeklyArchive.player_name, WeeklyArchive.wins,
+            WeeklyArchive.losses, WeeklyArchive.points, WeeklyArchive.rank,
+        )).all()),
+        sorted(session.exec(select(
+            ArchiveWeek.week, ArchiveWeek.winner_id, ArchiveWeek.winner_name, ArchiveWeek.total_players,
+            ArchiveWeek.total_matches,
+        )).all()),
+        sorted(session.exec(select(
+            PlayerWeekStats.player_id, PlayerWeekStats.wins, PlayerWeekStats.losses, PlayerWeekStats.points,
+        )).all()),
+    )
+
+
+@pytest.fixture
+def history(client: TestClient, registered_players, play):
+    """Sweeps and close matches over two past weeks and this week."""
+    alice = registered_players["alice"]
+    bob = registered_players["bob"]
+    charlie = registered_players["charlie"]
+    play(alice, bob, played_at="2025-10-20T10:00:00Z", games=[(11, 9), (11, 7)])
+    play(bob, charlie, played_at="2025-10-21T10:00:00Z", games=[(11, 9), (9, 11), (11, 5)])
+    play(charlie, alice, played_at="2025-10-27T10:00:00Z")
+    play(bob, charlie, played_at="2025-10-28T10:00:00Z", games=[(11, 3), (11, 4), (11, 5)])
+    play(charlie, bob, played_at=datetime.now().isoformat(), games=[(8, 11), (11, 9), (11, 9)])
+    return registered_players
+
+
+class TestScoringRules:
+    """Test rule versions and the points they award."""
+    
+    def test_defaults_before_any_version(self, session: Session):
+        """Test that the default rules give WIN_POINTS per win and nothing else."""
+        rules = scoring_rules(session)
+        assert rules.version == 0
+        assert rules.match_points(3, 0) == (WIN_POINTS, 0)
+    
+    def test_match_points(self):
+        """Test the sweep bonus and game difference points."""
+        rules = ScoringRules(version=1, win_points=2, loss_points=1, sweep_bonus=1, game_difference_points=2)
+        assert rules.match_points(2, 0) == (2 + 1 + 4, 1)
+        assert rules.match_points(2, 1) == (2 + 2, 1)
+    
+    def test_latest_version_in_force(self, session: Session):
+        """Test that publishing adds the next version and it takes over."""
+        publish_rules(session, ScoringRules(win_points=2))
+        publish_rules(session, ScoringRules(win_points=5))
+        session.commit()
+        assert (scoring_rules(session).version, scoring_rules(session).win_points) == (2, 5)
+    
+    def test_new_matches_use_rules_in_force(self, client: TestClient, registered_players, play):
+        """Test that recording a match awards points under the current rules."""
+        with Session(test_engine) as session:
+            publish_rules(session, ScoringRules(win_points=2, loss_points=1, sweep_bonus=1))
+            session.commit()
+        play(registered_players["alice"], registered_players["bob"], played_at=datetime.now().isoformat())
+        
+        leaderboard = {row["name"]: row["points"] for row in client.get("/api/leaderboard").json()}
+        assert (leaderboard["Alice"], leaderboard["Bob"]) == (3, 1)
+
+
+class TestRecomputeScores:
+    """Test re-scoring history with recompute_scores."""
+    
+    def test_current_week_from_its_own_matches(self, client: TestClient, history):
+        """Test that only this week's matches count towards the current stats."""
+        with Session(test_engine) as session:
+            report = recompute_scores(session)
+        assert (report.matches, report.archived_weeks) == (5, 2)
+        
+        leaderboard = {row["name"]: row for row in client.get("/api/leaderboard").json()}
+        assert (leaderboard["Charlie"]["wins"], leaderboard["Charlie"]["points"]) == (1, WIN_POINTS)
+        assert (leaderboard["Bob"]["losses"], leaderboard["Bob"]["points"]) == (1, 0)
+        assert leaderboard["Alice"]["wins"] == leaderboard["Alice"]["losses"] == 0
+    
+    def test_new_rules_rescore_past_weeks(self, client: TestClient, history):
+        """Test that new rules change archived points, ranks and winners."""
+        with Session(test_engine) as session:
+            publish_rules(session, ScoringRules(win_points=1, game_difference_points=1))
+            recompute_scores(session)
+        
+        # Week of 10-19: Alice won 2-0 (3 points), Bob 2-1 (2 points)
+        rows = client.get("/api/archives/weeks/2025-10-19").json()
+        assert [(row["player_name"], row["points"], row["rank"]) for row in rows] == [
+            ("Alice", 3, 1), ("Bob", 2, 2), ("Charlie", 0, 3)
+        ]
+        # Week of 10-26: Bob's 3-0 sweep (4 points) beats Charlie's 1-0 (2 points)
+        with Session(test_engine) as session:
+            header = session.get(ArchiveWeek, parse_week("2025-10-26"))
+        assert header.winner_name == "Bob"
+    
+    @pytest.mark.parametrize("rules", [
+        ScoringRules(),
+        ScoringRules(win_points=2, loss_points=1, sweep_bonus=3),
+        ScoringRules(win_points=0, game_difference_points=1),
+    ])
+    def test_matches_replay(self, client: TestClient, history, rules):
+        """Test that the vectorized recompute equals the match-by-match replay."""
+        with Session(test_engine) as session:
+            publish_rules(session, ScoringRules(**rules.model_dump(exclude={"version", "created_at"})))
+            replay_matches(session)
+            replayed = standings(session)
+            recompute_scores(session)
+            assert standings(session) == replayed
+    
+    def test_matches_replay_rosters(self, client: TestClient, history):
+        """Test that the vectorized recompute keeps replay_matches' per-week rosters and names."""
+        client.post("/api/auth/register", json={"name": "Dana", "email": "dana@example.com"})
+        with Session(test_engine) as session:
+            dana = session.exec(select(Player).where(Player.name == "Dana")).one()
+            session.add(WeeklyArchive(week=parse_week("2025-10-26"), player_id=dana.id, player_name="Dana Old", rank=4))
+            session.add(WeeklyArchive(week=parse_week("2025-10-19"), player_id=history["alice"]["id"], player_name="Alicia", rank=1))
+            session.commit()
+            replay_matches(session)
+            replayed = standings(session)
+            recompute_scores(session)
+            assert standings(session) == replayed
+        
+        archived = {(week, name) for week, _, name, *_ in replayed[0]}
+        assert (parse_week("2025-10-26"), "Dana Old") in archived
+        assert (parse_week("2025-10-19"), "Dana") not in archived
+        assert (parse_week("2025-10-19"), "Dana Old") not in archived
+        assert [(total_players, winner_name) for _, _, winner_name, total_players, _ in replayed[1]] == [
+            (3, "Alicia"), (4, "Bob")
+        ]
+    
+    def test_matches_replay_without_a_deleted_player(self, client: TestClient, history):
+        """Test that both paths credit a deleted player's opponents and give them no rows."""
+        with Session(test_engine) as session:
+            session.delete(session.get(Player, history["bob"]["id"]))
+            session.commit()
+            replay_matches(session)
+            replayed = standings(session)
+            recompute_scores(session)
+            assert standings(session) == replayed
+        
+        archived, _, current = replayed
+        assert history["bob"]["id"] not in {row[1] for row in archived} | {row[0] for row in current}
+        assert (history["charlie"]["id"], 1, 0) in {(row[0], row[1], row[2]) for row in current}
+    
+    def test_deletes_checkpoints(self, client: TestClient, history, monkeypatch):
+        """Test that checkpoints holding points under the old rules are dropped."""
+        from app import stats_checkpoints
+        monkeypatch.setattr(stats_checkpoints, "CHECKPOINT_INTERVAL", 1)
+        with Session(test_engine) as session:
+            stats_checkpoints.build_checkpoints(session)
+            assert session.exec(select(StatsCheckpoint)).first() is not None
+            publish_rules(session, ScoringRules(loss_points=1))
+            recompute_scores(session)
+            assert session.exec(select(StatsCheckpoint)).first() is None
@@ -155,6 +155,41 @@ class TestArchiveCurrentWeek:
             for archive in archives:
                 assert archive.week_start == week_start.isoformat()
                 assert archive.week_end == week_end.isoformat()
+    
+    def test_archive_tied_players_share_rank(self, client: TestClient, registered_players, play):
+        """Test that players with equal points and wins get the same rank."""
+        alice = registered_players["alice"]
+        bob = registered_players["bob"]
+        charlie = registered_players["charlie"]
+        
+        # Alice and Charlie each beat Bob once
+        play(alice, bob)
+        play(charlie, bob)
+        
+        with Session(test_engine) as session:
+            assert archive_current_week(session) == 3
+            archives = session.exec(select(WeeklyArchive).order_by(WeeklyArchive.id)).all()
+        
+        ranks = {a.player_id: a.rank for a in archives}
+        assert ranks == {alice["id"]: 1, charlie["id"]: 1, bob["id"]: 3}
+        # Rows are written in rank order; the earliest tied player is the winner
+        assert [a.player_id for a in archives] == [alice["id"], charlie["id"], bob["id"]]
+        assert {a.winner_id for a in archives} == {alice["id"]}
+    
+    def test_archive_is_a_single_snapshot_statement(
+        self, client: TestClient, registered_players, count_queries, play
+    ):
+        """Test that archiving snapshots players with one INSERT ... SELECT regardless of roster size."""
+        play(registered_players["alice"], registered_players["bob"])
+        
+        with Session(test_engine) as session, count_queries() as statements:
+            assert archive_current_week(session) == 3
+        
+        # One snapshot INSERT plus a constant number of week summary and
+        # serialized leaderboard statements
+        sql = [statement for statement, _, _ in statements]
+        assert len([s for s in sql if s.startswith("INSERT INTO weeklyarchive")]) == 1
+        assert len(sql) <= 10
 
 
 class TestResetPlayerStats:
@@ -207,6 +242,33 @@ class TestResetPlayerStats:
             assert player["wins"] == 0
             assert player["losses"] == 0
             assert player["points"] == 0
+    
+    def test_reset_does_not_rewrite_players(self, client: TestClient, registered_players, count_queries):
+        """Test that reset writes one epoch row instead of updating every player."""
+        with Session(test_engine) as session, count_queries() as statements:
+            assert reset_player_stats(session) == 3
+        
+        writes = [
+            statement for statement, _, _ in statements
+            if statement.startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        assert len(writes) == 1
+        assert writes[0].startswith("INSERT INTO statsepoch")
+    
+    def test_reset_keeps_previous_epoch(self, client: TestClient, registered_players, play):
+        """Test that the closed epoch can still be archived after a reset."""
+        alice = registered_players["alice"]
+        play(alice, registered_players["bob"])
+        
+        with Session(test_engine) as session:
+            reset_player_stats(session)
+            assert archive_current_week(session) == 0  # New epoch has no activity
+            assert archive_current_week(session, epoch=0) == 3
+            
+            archive = session.exec(
+                select(WeeklyArchive).where(WeeklyArchive.player_id == alice["id"])
+            ).one()
+            assert (archive.wins, archive.points, archive.rank) == (1, 3, 1)
 
 
 class TestPerformWeeklyReset:
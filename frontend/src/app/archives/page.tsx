@@ -1,10 +1,14 @@
 "use client";
 import { useEffect, useState } from "react";
 import { useRouter } from "next/navigation";
-import { getArchivedWeeks, getWeeklyLeaderboard, type WeekInfo, type WeeklyArchive } from "@/lib/api";
+import { getArchivedWeeks, getWeeklyLeaderboards, type WeekInfo, type WeeklyArchive } from "@/lib/api";
 import { formatDateRange } from "@/lib/utils";
 import WeekArchiveCard from "@/components/WeekArchiveCard";
 
+// Weeks fetched per request: the clicked week plus the next unloaded ones,
+// so browsing down the list rarely waits on the network
+const PREFETCH_WEEKS = 8;
+
 export default function ArchivesPage() {
   const router = useRouter();
   const [weeks, setWeeks] = useState<WeekInfo[]>([]);
@@ -41,11 +45,17 @@ export default function ArchivesPage() {
       return;
     }
 
-    // Otherwise, fetch the data
+    // Otherwise, fetch it together with the following unloaded weeks
+    const index = weeks.findIndex((week) => week.week_start === weekStart);
+    const following = weeks
+      .slice(index + 1)
+      .map((week) => week.week_start)
+      .filter((start) => !leaderboards[start])
+      .slice(0, PREFETCH_WEEKS - 1);
     setLoadingWeek(weekStart);
     try {
-      const data = await getWeeklyLeaderboard(weekStart);
-      setLeaderboards((prev) => ({ ...prev, [weekStart]: data }));
+      const data = await getWeeklyLeaderboards([weekStart, ...following]);
+      setLeaderboards((prev) => ({ ...prev, ...data, [weekStart]: data[weekStart] ?? [] }));
       setExpandedWeek(weekStart);
     } catch (error) {
       console.error("Failed to load weekly leaderboard:", error);
@@ -4,6 +4,7 @@ import {
   getPlayers, 
   createMatch, 
   getMatches,
+  getLeaderboard,
   register,
   login,
   logout,
@@ -12,6 +13,7 @@ import {
   setCurrentUser as saveCurrentUser,
   type Player, 
   type Match,
+  type LeaderboardEntry,
   type MatchInput,
   type RegisterRequest,
   type LoginRequest
@@ -27,6 +29,7 @@ export default function Home() {
   // State for data
   const [players, setPlayers] = useState<Player[]>([]);
   const [matches, setMatches] = useState<Match[]>([]);
+  const [leaderboard, setLeaderboard] = useState<LeaderboardEntry[]>([]);
   const [loading, setLoading] = useState(true);
   
   // Auth state
@@ -51,16 +54,31 @@ export default function Home() {
 
   async function loadData() {
     try {
-      const [playersData, matchesData] = await Promise.all([
+      const [playersData, matchPage, leaderboardData] = await Promise.all([
         getPlayers(),
-        getMatches()
+        getMatches(10),
+        getLeaderboard()
       ]);
-      setPlayers(playersData);
-      setMatches(matchesData);
+      
+      // Resolve match participants and the current user that are not on the
+      // first page of players with a single ids= lookup
+      const known = new Set(playersData.map(p => p.id));
+      const missing = new Set<number>();
+      matchPage.matches.forEach(m => [m.home_id, m.away_id].forEach(id => {
+        if (!known.has(id)) missing.add(id);
+      }));
+      if (currentUser && !known.has(currentUser.id)) missing.add(currentUser.id);
+      const allPlayers = missing.size > 0
+        ? [...playersData, ...await getPlayers({ ids: Array.from(missing) })]
+        : playersData;
+      
+      setPlayers(allPlayers);
+      setMatches(matchPage.matches);
+      setLeaderboard(leaderboardData);
       
       // Update current user's data if they're logged in
       if (currentUser) {
-        const updatedUser = playersData.find(p => p.id === currentUser.id);
+        const updatedUser = allPlayers.find(p => p.id === currentUser.id);
         if (updatedUser) {
           setCurrentUser(updatedUser);
           saveCurrentUser(updatedUser);
@@ -142,7 +160,7 @@ export default function Home() {
         />
 
         <LeaderboardTable 
-          players={players}
+          entries={leaderboard}
           weekStart={formatWeekStart()}
         />
 
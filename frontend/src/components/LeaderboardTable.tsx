@@ -1,26 +1,23 @@
 "use client";
-import { type Player } from "@/lib/api";
+import { type LeaderboardEntry } from "@/lib/api";
 
 interface LeaderboardTableProps {
-  players: Player[];
+  entries: LeaderboardEntry[];
   weekStart: string;
 }
 
-function calculateWinRate(wins: number, losses: number): string {
-  const totalGames = wins + losses;
-  return totalGames > 0 ? ((wins / totalGames) * 100).toFixed(1) : "0.0";
+function formatWinRate(winRate: number): string {
+  return (winRate * 100).toFixed(1);
 }
 
-function getRankBadgeClass(index: number): string {
-  if (index === 0) return 'bg-gradient-to-br from-yellow-500 to-orange-500 text-white shadow-lg';
-  if (index === 1) return 'bg-gradient-to-br from-slate-400 to-slate-500 text-white shadow-lg';
-  if (index === 2) return 'bg-gradient-to-br from-orange-700 to-orange-800 text-white shadow-lg';
+function getRankBadgeClass(rank: number): string {
+  if (rank === 1) return 'bg-gradient-to-br from-yellow-500 to-orange-500 text-white shadow-lg';
+  if (rank === 2) return 'bg-gradient-to-br from-slate-400 to-slate-500 text-white shadow-lg';
+  if (rank === 3) return 'bg-gradient-to-br from-orange-700 to-orange-800 text-white shadow-lg';
   return 'bg-slate-800 text-slate-400';
 }
 
-export default function LeaderboardTable({ players, weekStart }: LeaderboardTableProps) {
-  // Sort players by points (descending)
-  const sortedPlayers = [...players].sort((a, b) => b.points - a.points);
+export default function LeaderboardTable({ entries, weekStart }: LeaderboardTableProps) {
 
   return (
     <div className="bg-gradient-to-br from-slate-900/90 to-slate-950/90 rounded-2xl shadow-2xl p-8 mb-8 border border-slate-700/50 backdrop-blur-sm">
@@ -35,7 +32,7 @@ export default function LeaderboardTable({ players, weekStart }: LeaderboardTabl
         </p>
       </div>
       
-      {sortedPlayers.length === 0 ? (
+      {entries.length === 0 ? (
         <div className="text-center py-12">
           <p className="text-slate-500 text-lg">No players yet. Be the first to join!</p>
         </div>
@@ -53,14 +50,14 @@ export default function LeaderboardTable({ players, weekStart }: LeaderboardTabl
               </tr>
             </thead>
             <tbody>
-              {sortedPlayers.map((player, index) => {
-                const winRate = calculateWinRate(player.wins, player.losses);
+              {entries.map((player) => {
+                const winRate = formatWinRate(player.win_rate);
                 
                 return (
-                  <tr key={player.id} className="border-b border-slate-800/50 hover:bg-slate-800/40 transition-colors duration-150">
+                  <tr key={player.player_id} className="border-b border-slate-800/50 hover:bg-slate-800/40 transition-colors duration-150">
                     <td className="py-4 px-4">
-                      <div className={`inline-flex items-center justify-center w-10 h-10 rounded-lg font-bold ${getRankBadgeClass(index)}`}>
-                        #{index + 1}
+                      <div className={`inline-flex items-center justify-center w-10 h-10 rounded-lg font-bold ${getRankBadgeClass(player.rank)}`}>
+                        #{player.rank}
                       </div>
                     </td>
                     <td className="py-4 px-4">
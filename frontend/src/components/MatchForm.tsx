@@ -1,6 +1,6 @@
 "use client";
-import { useState } from "react";
-import { type Player, type MatchInput } from "@/lib/api";
+import { useEffect, useState } from "react";
+import { searchPlayers, type Player, type MatchInput } from "@/lib/api";
 
 interface MatchFormProps {
   currentUser: Player;
@@ -11,10 +11,33 @@ interface MatchFormProps {
 export default function MatchForm({ currentUser, players, onSubmit }: MatchFormProps) {
   const [showForm, setShowForm] = useState(false);
   const [awayId, setAwayId] = useState<number | "">("");
+  const [opponentQuery, setOpponentQuery] = useState("");
+  const [opponentResults, setOpponentResults] = useState<Player[] | null>(null);
   const [gameScores, setGameScores] = useState<Array<{ home: number; away: number }>>([
     { home: 0, away: 0 }
   ]);
 
+  // Ask the server for matching opponents instead of filtering the full roster
+  useEffect(() => {
+    const query = opponentQuery.trim();
+    if (!query) {
+      setOpponentResults(null);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      searchPlayers(query, 20)
+        .then((results) => { if (!cancelled) setOpponentResults(results); })
+        .catch((error) => console.error("Failed to search players:", error));
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [opponentQuery]);
+
+  const opponentOptions = (opponentResults ?? players).filter((p) => p.id !== currentUser.id);
+
   const addGame = () => {
     setGameScores([...gameScores, { home: 0, away: 0 }]);
   };
@@ -43,6 +66,7 @@ export default function MatchForm({ currentUser, players, onSubmit }: MatchFormP
     
     // Reset form
     setAwayId("");
+    setOpponentQuery("");
     setGameScores([{ home: 0, away: 0 }]);
     setShowForm(false);
   };
@@ -50,6 +74,7 @@ export default function MatchForm({ currentUser, players, onSubmit }: MatchFormP
   const handleCancel = () => {
     setShowForm(false);
     setAwayId("");
+    setOpponentQuery("");
     setGameScores([{ home: 0, away: 0 }]);
   };
 
@@ -78,6 +103,13 @@ export default function MatchForm({ currentUser, players, onSubmit }: MatchFormP
             </div>
             <div>
               <label className="block text-sm font-semibold mb-2 text-slate-300 uppercase tracking-wide">Opponent</label>
+              <input
+                type="text"
+                value={opponentQuery}
+                onChange={(e) => setOpponentQuery(e.target.value)}
+                placeholder="Search players..."
+                className="w-full mb-2 px-4 py-2 bg-slate-800/50 border border-slate-700 text-white rounded-xl focus:outline-none focus:ring-2 focus:ring-green-500 focus:border-transparent transition-all duration-200"
+              />
               <select
                 value={awayId}
                 onChange={(e) => setAwayId(Number(e.target.value))}
@@ -85,7 +117,7 @@ export default function MatchForm({ currentUser, players, onSubmit }: MatchFormP
                 required
               >
                 <option value="">Select opponent...</option>
-                {players.filter((p) => p.id !== currentUser.id).map((p) => (
+                {opponentOptions.map((p) => (
                   <option key={p.id} value={p.id}>{p.name}</option>
                 ))}
               </select>
@@ -11,9 +11,11 @@ function findPlayer(players: Player[], id: number): Player | undefined {
 }
 
 function getMatchWinner(match: Match, homePlayer: Player | undefined, awayPlayer: Player | undefined) {
-  const homeWins = match.games.filter(g => g.home > g.away).length;
-  const awayWins = match.games.length - homeWins;
-  return { homeWins, awayWins, winner: homeWins > awayWins ? homePlayer : awayPlayer };
+  return {
+    homeWins: match.home_games_won,
+    awayWins: match.away_games_won,
+    winner: match.winner_id === match.home_id ? homePlayer : awayPlayer,
+  };
 }
 
 export default function RecentMatches({ matches, players }: RecentMatchesProps) {
@@ -29,7 +31,7 @@ export default function RecentMatches({ matches, players }: RecentMatchesProps)
         </div>
       ) : (
         <div className="space-y-3">
-          {matches.slice(0, 10).map((match) => {
+          {matches.map((match) => {
             const homePlayer = findPlayer(players, match.home_id);
             const awayPlayer = findPlayer(players, match.away_id);
             const { homeWins, awayWins, winner } = getMatchWinner(match, homePlayer, awayPlayer);
@@ -51,6 +51,10 @@ export default function WeekArchiveCard({
               <span className="text-slate-400">
                 {week.total_players} {week.total_players === 1 ? "player" : "players"}
               </span>
+              <span className="text-slate-600">•</span>
+              <span className="text-slate-400">
+                {week.total_matches} {week.total_matches === 1 ? "match" : "matches"}
+              </span>
             </div>
           </div>
         </div>
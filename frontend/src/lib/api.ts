@@ -76,6 +76,7 @@ export interface Player {
   wins: number;
   losses: number;
   points: number;
+  rating: number;
 }
 
 // Auth types
@@ -144,6 +145,10 @@ export interface Match {
   home_id: number;
   away_id: number;
   games: GameScore[];
+  winner_id: number;
+  home_games_won: number;
+  away_games_won: number;
+  point_differential: number; // home points minus away points
 }
 
 export interface MatchInput {
@@ -154,18 +159,43 @@ export interface MatchInput {
 }
 
 // API Functions
-export async function getPlayers(): Promise<Player[]> {
-  const res = await fetch(`${API_BASE}/api/players`);
+export interface PlayerQuery {
+  limit?: number;
+  cursor?: string;
+  ids?: number[];
+}
+
+// Players ordered by name; pass ids to fetch specific players in one request
+export async function getPlayers({ limit = 50, cursor, ids }: PlayerQuery = {}): Promise<Player[]> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set("cursor", cursor);
+  ids?.forEach((id) => params.append("ids", String(id)));
+  const res = await fetch(`${API_BASE}/api/players?${params}`);
   if (!res.ok) throw new Error("Failed to fetch players");
   return res.json();
 }
 
-export async function getMatches(): Promise<Match[]> {
-  const res = await fetch(`${API_BASE}/api/matches`);
-  if (!res.ok) throw new Error("Failed to fetch matches");
+export interface MatchPage {
+  matches: Match[];
+  nextCursor: number | null;
+}
+
+export async function searchPlayers(query: string, limit = 10): Promise<Player[]> {
+  const params = new URLSearchParams({ q: query, limit: String(limit) });
+  const res = await fetch(`${API_BASE}/api/players/search?${params}`);
+  if (!res.ok) throw new Error("Failed to search players");
   return res.json();
 }
 
+export async function getMatches(limit = 10, beforeId?: number): Promise<MatchPage> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (beforeId !== undefined) params.set("before_id", String(beforeId));
+  const res = await fetch(`${API_BASE}/api/matches?${params}`);
+  if (!res.ok) throw new Error("Failed to fetch matches");
+  const cursor = res.headers.get("X-Next-Cursor");
+  return { matches: await res.json(), nextCursor: cursor ? Number(cursor) : null };
+}
+
 export async function createMatch(match: MatchInput): Promise<Match> {
   const res = await fetch(`${API_BASE}/api/matches`, {
     method: "POST",
@@ -179,6 +209,26 @@ export async function createMatch(match: MatchInput): Promise<Match> {
   return res.json();
 }
 
+// Leaderboard types
+export interface LeaderboardEntry {
+  rank: number;
+  player_id: number;
+  name: string;
+  wins: number;
+  losses: number;
+  points: number;
+  win_rate: number;
+  rating?: number | null; // only set when asOf is given
+}
+
+export async function getLeaderboard(limit = 50, offset = 0, asOf?: string): Promise<LeaderboardEntry[]> {
+  const params = new URLSearchParams({ limit: String(limit), offset: String(offset) });
+  if (asOf) params.set("as_of", asOf);
+  const res = await fetch(`${API_BASE}/api/leaderboard?${params}`);
+  if (!res.ok) throw new Error("Failed to fetch leaderboard");
+  return res.json();
+}
+
 // Archive types
 export interface WeekInfo {
   week_start: string;
@@ -186,6 +236,7 @@ export interface WeekInfo {
   winner_id: number;
   winner_name: string;
   total_players: number;
+  total_matches: number;
 }
 
 export interface WeeklyArchive {
@@ -213,3 +264,14 @@ export async function getWeeklyLeaderboard(weekStart: string): Promise<WeeklyArc
   if (!res.ok) throw new Error("Failed to fetch weekly leaderboard");
   return res.json();
 }
+
+// Fetch several weeks' leaderboards in one request, keyed by week_start.
+// Weeks with no archived data are missing from the result.
+export async function getWeeklyLeaderboards(weekStarts: string[]): Promise<Record<string, WeeklyArchive[]>> {
+  const params = new URLSearchParams();
+  weekStarts.forEach((weekStart) => params.append("week_start", weekStart));
+  const res = await fetch(`${API_BASE}/api/archives/weeks/batch?${params}`);
+  if (!res.ok) throw new Error("Failed to fetch weekly leaderboards");
+  const weeks: { week_start: string; leaderboard: WeeklyArchive[] }[] = await res.json();
+  return Object.fromEntries(weeks.map((week) => [week.week_start, week.leaderboard]));
+}